@@ -26,30 +26,11 @@ def parse_fjsp_dataset(dataset):
     
     return jobs_data, num_jobs, num_machines
 
-def main() -> None:
-    dataset = """
-    10 6 2
-    6  2 1 5 3 4 3 5 3 3 5 2 1 2 3 4 6 2 3 6 5 2 6 1 1 1 3 1 3 6 6 3 6 4 3  
-    5  1 2 6 1 3 1 1 1 2 2 2 6 4 6 3 6 5 2 6 1 1 
-    5  1 2 6 2 3 4 6 2 3 6 5 2 6 1 1 3 3 4 2 6 6 6 2 1 1 5 5 
-    5  3 6 5 2 6 1 1 1 2 6 1 3 1 3 5 3 3 5 2 1 2 3 4 6 2
-    6  3 5 3 3 5 2 1 3 6 5 2 6 1 1 1 2 6 2 1 5 3 4 2 2 6 4 6 3 3 4 2 6 6 6
-    6  2 3 4 6 2 1 1 2 3 3 4 2 6 6 6 1 2 6 3 6 5 2 6 1 1 2 1 3 4 2
-    5  1 6 1 2 1 3 4 2 3 3 4 2 6 6 6 3 2 6 5 1 1 6 1 3 1
-    5  2 3 4 6 2 3 3 4 2 6 6 6 3 6 5 2 6 1 1 1 2 6 2 2 6 4 6
-    6  1 6 1 2 1 1 5 5 3 6 6 3 6 4 3 1 1 2 3 3 4 2 6 6 6 2 2 6 4 6
-    6  2 3 4 6 2 3 3 4 2 6 6 6 3 5 3 3 5 2 1 1 6 1 2 2 6 4 6 2 1 3 4 2
-    """
-
-    # Parse the dataset
-    jobs_data, num_jobs, num_machines = parse_fjsp_dataset(dataset)
-
-    # Start the timer to measure the time taken to solve the problem
-    start_time = time.time()
-
-    # Create the model
-    model = gp.Model("flexible_job_shop_scheduling")
-
+# Function to add the per-option model to a Gurobi model: start, end and
+# assignment variables for every machine option and a big-M disjunction for
+# every pair of options on the same machine. Returns the task variables and
+# the makespan variable.
+def build_model(model, jobs_data, num_machines):
     # Named tuple to store information about created variables
     task_type = collections.namedtuple("task_type", "start end assign")
     all_tasks = {}
@@ -125,6 +106,32 @@ def main() -> None:
             f"makespan_constraint_{job_id}"
         )
     model.setObjective(makespan, GRB.MINIMIZE)
+    return all_tasks, makespan
+
+def main() -> None:
+    dataset = """
+    10 6 2
+    6  2 1 5 3 4 3 5 3 3 5 2 1 2 3 4 6 2 3 6 5 2 6 1 1 1 3 1 3 6 6 3 6 4 3  
+    5  1 2 6 1 3 1 1 1 2 2 2 6 4 6 3 6 5 2 6 1 1 
+    5  1 2 6 2 3 4 6 2 3 6 5 2 6 1 1 3 3 4 2 6 6 6 2 1 1 5 5 
+    5  3 6 5 2 6 1 1 1 2 6 1 3 1 3 5 3 3 5 2 1 2 3 4 6 2
+    6  3 5 3 3 5 2 1 3 6 5 2 6 1 1 1 2 6 2 1 5 3 4 2 2 6 4 6 3 3 4 2 6 6 6
+    6  2 3 4 6 2 1 1 2 3 3 4 2 6 6 6 1 2 6 3 6 5 2 6 1 1 2 1 3 4 2
+    5  1 6 1 2 1 3 4 2 3 3 4 2 6 6 6 3 2 6 5 1 1 6 1 3 1
+    5  2 3 4 6 2 3 3 4 2 6 6 6 3 6 5 2 6 1 1 1 2 6 2 2 6 4 6
+    6  1 6 1 2 1 1 5 5 3 6 6 3 6 4 3 1 1 2 3 3 4 2 6 6 6 2 2 6 4 6
+    6  2 3 4 6 2 3 3 4 2 6 6 6 3 5 3 3 5 2 1 1 6 1 2 2 6 4 6 2 1 3 4 2
+    """
+
+    # Parse the dataset
+    jobs_data, num_jobs, num_machines = parse_fjsp_dataset(dataset)
+
+    # Start the timer to measure the time taken to solve the problem
+    start_time = time.time()
+
+    # Create the model
+    model = gp.Model("flexible_job_shop_scheduling")
+    all_tasks, makespan = build_model(model, jobs_data, num_machines)
 
     # Optimize model
     model.optimize()
@@ -1,165 +1,292 @@
-import collections
+import argparse
+import math
+import numpy as np
 import gurobipy as gp
 from gurobipy import GRB
-import os
 import time
+from jsspCache import load_family
+from jsspInstance import from_jobs_data
+from batchRunner import run_batch
+from heuristics import best_dispatch, compute_horizon
+from trajectory import Incumbent, save_checkpoint
+from lowerBounds import format_gap, gap, lower_bounds
+from disjunctions import all_disjunctions, plan_disjunctions
+from gurobiModels import BUILDERS, FORMULATIONS, LazyDisjunctions, set_start
+from modelCache import load_gurobi_model, model_key, save_gurobi_model
+from profiles import profile_for
+from resultsDb import RESULTS_DB
+from schedule import Schedule
 
-# Directory where the dataset files are located
-#mac path
-#directory_path = "/Users/mariopinto/Desktop/Bolsa2024/jssp/taillard"
-
-#windows path
-directory_path = "C:/Users/Mario/Desktop/Bolsa2024/jssp/taillard"
-#
-
-# Function to parse the dataset from the selected file
-def parse_dataset(file_content):
-    lines = file_content.strip().splitlines()
-    
-    data = []
-    for line in lines:
-        # Skip comment lines or empty lines
-        if line.startswith("#") or line.strip() == "":
-            continue
-        # Convert the line to a list of integers
-        row = list(map(int, line.split()))
-        data.append(row)
-
-    # Ignore the first data line which contains the number of machines and jobs
-    jobs_data = []
-    for job in data[1:]:  # Skip the first data row
-        job_tasks = []
-        for i in range(0, len(job), 2):
-            machine_id = job[i]
-            processing_time = job[i + 1]
-            job_tasks.append((machine_id, processing_time))
-        jobs_data.append(job_tasks)
-    
-    return jobs_data
+# Instance family to solve, loaded from the jssp/ binary cache (jsspCache.py)
+family = "taillard"
+
+# Function to build a Gurobi callback that records every improving incumbent
+# with the solver run time and the best bound at that moment. With lazy
+# disjunctions the callback first cuts the machine overlaps of the incumbent;
+# an incumbent that needed cuts is rejected and not recorded. checkpoint is
+# an optional (path, start variables, jobs) triple: the start times of every
+# recorded incumbent are saved to path.
+def incumbent_callback(trajectory, lazy=None, checkpoint=None):
+    def callback(model, where):
+        if where == GRB.Callback.MIPSOL:
+            if lazy is not None and lazy.separate(model):
+                return
+            makespan = int(round(model.cbGet(GRB.Callback.MIPSOL_OBJ)))
+            if trajectory and makespan >= trajectory[-1].makespan:
+                return
+            # The objective is integer, so a fractional bound rounds up; a
+            # start found before the root relaxation has no bound yet
+            bound = max(0, math.ceil(model.cbGet(GRB.Callback.MIPSOL_OBJBND) - 1e-6))
+            trajectory.append(Incumbent(model.cbGet(GRB.Callback.RUNTIME), makespan, bound))
+            if checkpoint is not None:
+                path, start_vars, num_jobs = checkpoint
+                starts = np.rint(model.cbGetSolution(start_vars)).astype(np.int64).reshape(num_jobs, -1)
+                save_checkpoint(path, starts, makespan)
+    return callback
 
 # Gurobi Job Shop Solver function
-def solve_jobshop(jobs_data, output_file):
+#   params       -- Gurobi parameters, e.g. {"MIPGap": 0.01}; None applies the
+#                   tuned profile of the family and size class
+#                   (profiles/gurobi.json, see gurobiTuning.py), if any. The
+#                   extra key "branch_priority" sets the BranchPriority of
+#                   the binaries.
+#   family       -- jssp/ family of the instance, for the profile lookup
+#   time_limit   -- TimeLimit in seconds, applied over the parameters
+#   horizon_mode -- "heuristic" uses the best dispatching-rule makespan as the
+#                   horizon (variable upper bound and big-M), "sum" the sum of
+#                   all durations
+#   warm_start   -- set the Start attributes from the dispatching-rule schedule
+#   hint         -- start times ([jobs, ops]) of a schedule to start from
+#                   instead, e.g. the checkpoint of an interrupted solve
+#   checkpoint_path -- save the start times of every improving incumbent here
+#   known_optimum -- (lower, upper) best-known values from optimum.csv
+#   disjunction_mode -- "tight" gives every machine pair its own big-M from the
+#                   operation time windows and drops or fixes pairs whose
+#                   order is already decided; "global" keeps one binary and
+#                   the horizon as big-M for every pair
+#   builder      -- "matrix" builds the model from the instance arrays in one
+#                   sparse call, "loop" with one addVar/addConstr per item
+#   names        -- name the variables and constraints of the matrix model
+#                   (slower to build; the loop builder always names them)
+#   lazy         -- start from the precedence-only model and add the rows of
+#                   a machine pair from a callback once an incumbent overlaps
+#                   it, instead of adding every disjunction up front
+#   formulation  -- "disjunctive" (the big-M model above), "time_indexed" or
+#                   "rank"; builder, lazy and disjunction_mode only apply to
+#                   the disjunctive model
+#   model_cache  -- load the built model from the on-disk model cache
+#                   (modelCache.py) when it is there, and save it otherwise
+#   stats        -- optional dict that receives horizon, timings, the
+#                   parameters used and the result, with the start times as
+#                   a [jobs, ops] array and the Schedule
+def solve_jobshop(jobs_data, output_file, threads=None, params=None, horizon_mode="heuristic", warm_start=False,
+                  known_optimum=None, disjunction_mode="tight", builder="matrix", names=False, lazy=False,
+                  formulation="disjunctive", model_cache=False, family=None, time_limit=None, hint=None,
+                  checkpoint_path=None, stats=None):
     # Start the timer to measure the time taken to solve the problem
     inicio = time.time()
 
-    machines_count = 1 + max(task[0] for job in jobs_data for task in job)
-    horizon = sum(task[1] for job in jobs_data for task in job)
-
-    # Create the model
-    model = gp.Model("job_shop_scheduling")
-
-    # Named tuple to store information about created variables
-    task_type = collections.namedtuple("task_type", "start end")
-    all_tasks = {}
-
-    # Create variables and add them to the model
-    for job_id, job in enumerate(jobs_data):
-        for task_id, (machine, duration) in enumerate(job):
-            suffix = f"_{job_id}_{task_id}"
-            start_var = model.addVar(vtype=GRB.INTEGER, name=f"start{suffix}")
-            end_var = model.addVar(vtype=GRB.INTEGER, name=f"end{suffix}")
-            all_tasks[job_id, task_id] = task_type(start=start_var, end=end_var)
-
-            # Add constraint to ensure end = start + duration
-            model.addConstr(end_var == start_var + duration, f"duration{suffix}")
-
-    # Add disjunctive constraints to avoid overlap on the same machine
-    for machine in range(machines_count):
-        machine_tasks = [
-            (job_id, task_id)
-            for job_id, job in enumerate(jobs_data)
-            for task_id, task in enumerate(job)
-            if task[0] == machine
-        ]
-        for i in range(len(machine_tasks)):
-            for j in range(i + 1, len(machine_tasks)):
-                job_i, task_i = machine_tasks[i]
-                job_j, task_j = machine_tasks[j]
-
-                # Binary variable for disjunction
-                bin_var = model.addVar(vtype=GRB.BINARY)
-
-                model.addConstr(
-                    all_tasks[job_i, task_i].end <= all_tasks[job_j, task_j].start + (1 - bin_var) * horizon,
-                    f"disjunctive_{job_i}_{task_i}_{job_j}_{task_j}_1"
-                )
-                model.addConstr(
-                    all_tasks[job_j, task_j].end <= all_tasks[job_i, task_i].start + bin_var * horizon,
-                    f"disjunctive_{job_j}_{task_j}_{job_i}_{task_i}_2"
-                )
-
-    # Add precedence constraints within the same job
-    for job_id, job in enumerate(jobs_data):
-        for task_id in range(len(job) - 1):
-            model.addConstr(
-                all_tasks[job_id, task_id + 1].start >= all_tasks[job_id, task_id].end,
-                f"precedence_{job_id}_{task_id}",
-            )
-
-    # Objective: minimize makespan (maximum end time across all jobs)
-    makespan = model.addVar(vtype=GRB.INTEGER, name="makespan")
-    for job_id, job in enumerate(jobs_data):
-        model.addConstr(
-            makespan >= all_tasks[job_id, len(job) - 1].end,
-            f"makespan_constraint_{job_id}",
+    duration_sum = sum(task[1] for job in jobs_data for task in job)
+    horizon, heuristic = compute_horizon(jobs_data, horizon_mode)
+    if warm_start and heuristic is None:
+        heuristic = best_dispatch(jobs_data)
+
+    # Lower bound on the makespan: job, machine and Jackson bounds. The
+    # best-known values only report the gap to best known.
+    bounds = lower_bounds(jobs_data)
+    lower_bound = bounds.best
+    known_low, known_high = known_optimum or (None, None)
+    # A heuristic schedule that already reaches the bound is optimal: start
+    # from it and Gurobi stops as soon as it has checked the start.
+    if heuristic is not None and heuristic.makespan <= lower_bound:
+        warm_start = True
+
+    # Time windows and machine pairs of the disjunctive model
+    if disjunction_mode == "tight":
+        plan = plan_disjunctions(jobs_data, horizon)
+    elif disjunction_mode == "global":
+        plan = all_disjunctions(jobs_data, horizon)
+    else:
+        raise ValueError(f"unknown disjunction mode {disjunction_mode!r}, expected 'tight' or 'global'")
+    heuristic_time = time.time() - inicio
+
+    if formulation != "disjunctive" and formulation not in FORMULATIONS:
+        raise ValueError(f"unknown formulation {formulation!r}, expected 'disjunctive' or "
+                         f"{', '.join(repr(name) for name in FORMULATIONS)}")
+    lazy = lazy and formulation == "disjunctive"
+
+    # Load the model from the model cache; every option that changes the
+    # model is part of the key
+    job_shop_model = None
+    cache_key = None
+    if model_cache:
+        cache_key = model_key(
+            "gurobi", jobs_data, formulation=formulation, disjunction_mode=disjunction_mode, lazy=lazy,
+            names=names, horizon=horizon, lower_bound=lower_bound,
         )
-    model.setObjective(makespan, GRB.MINIMIZE)
+        job_shop_model = load_gurobi_model(cache_key, params)
+    cache_hit = job_shop_model is not None
+
+    # Build the model: the disjunctive one with the chosen builder, or one of
+    # the other formulations over the same time windows
+    if not cache_hit:
+        model = gp.Model("job_shop_scheduling")
+        if formulation == "disjunctive":
+            job_shop_model = BUILDERS[builder](model, jobs_data, plan, lower_bound, horizon, names=names, lazy=lazy)
+        else:
+            job_shop_model = FORMULATIONS[formulation](model, jobs_data, plan, lower_bound, horizon, names=names)
+        if model_cache:
+            save_gurobi_model(cache_key, job_shop_model)
+    model = job_shop_model.model
+    # Explicit threads and time_limit arguments win over the parameter profile
+    profile = params is None
+    if profile:
+        params = profile_for("gurobi", jobs_data, family) or {}
+    for name, value in params.items():
+        if name == "branch_priority":
+            if job_shop_model.binaries.shape[0]:
+                job_shop_model.binaries.BranchPriority = value
+        else:
+            model.setParam(name, value)
+    if threads:
+        model.setParam("Threads", threads)
+    if time_limit:
+        model.setParam("TimeLimit", time_limit)
+
+    makespan = job_shop_model.makespan
+    num_binaries = job_shop_model.binaries.shape[0]
+    lazy_disjunctions = None
+    if lazy:
+        model.setParam("LazyConstraints", 1)
+        lazy_disjunctions = LazyDisjunctions(job_shop_model, jobs_data, plan)
+
+    # Warm start: the given or the heuristic schedule gives a value to every
+    # variable.
+    if hint is not None:
+        hint = np.asarray(hint)
+        instance = from_jobs_data(jobs_data)
+        hint_makespan = int((hint + instance.durations).max())
+        set_start(job_shop_model, jobs_data, hint, hint_makespan)
+    elif warm_start:
+        set_start(job_shop_model, jobs_data, heuristic.starts, heuristic.makespan)
+
+    build_time = time.time() - inicio - heuristic_time
 
     # Optimize model
-    model.optimize()
+    trajectory = []
+    checkpoint = (checkpoint_path, job_shop_model.start.tolist(), len(jobs_data)) if checkpoint_path else None
+    model.optimize(incumbent_callback(trajectory, lazy_disjunctions, checkpoint))
+    solve_time = time.time() - inicio - heuristic_time - build_time
+
+    schedule = None
+    if model.SolCount:
+        schedule = Schedule.from_starts(jobs_data, np.rint(job_shop_model.start.X).astype(np.int64))
 
     # Write the results to output file
-    if model.status == GRB.OPTIMAL:
-        output_file.write(f"Optimal Schedule Length: {makespan.X}\n")
-        for machine in range(machines_count):
-            assigned_jobs = []
-            for job_id, job in enumerate(jobs_data):
-                for task_id, (task_machine, _) in enumerate(job):
-                    if task_machine == machine:
-                        start_time = all_tasks[job_id, task_id].start.X
-                        duration = jobs_data[job_id][task_id][1]
-                        assigned_jobs.append((start_time, f"job_{job_id}_task_{task_id}", duration))
-            assigned_jobs.sort()
-            sol_line_tasks = f"Machine {machine}: "
-            sol_line = "           "
-            for start_time, name, duration in assigned_jobs:
-                sol_line_tasks += f"{name:15}"
-                sol_tmp = f"[{int(start_time)},{int(start_time + duration)}]"
-                sol_line += f"{sol_tmp:15}"
-            sol_line += "\n"
-            sol_line_tasks += "\n"
-            output_file.write(sol_line_tasks)
-            output_file.write(sol_line)
+    if model.SolCount:
+        if model.status == GRB.OPTIMAL:
+            output_file.write(f"Optimal Schedule Length: {makespan.X[0]}\n")
+        else:
+            output_file.write(f"Best Schedule Length: {makespan.X[0]} (bound {model.ObjBound})\n")
+        # Per machine output lines, streamed from the op-indexed start times
+        schedule.write_text(output_file)
     else:
         output_file.write("No solution found.\n")
 
+    found_makespan = makespan.X[0] if model.SolCount else None
+    final_bound = lower_bound
+    if model.SolCount:
+        final_bound = max(lower_bound, math.ceil(model.ObjBound - 1e-6))
+
     # Write statistics
     output_file.write("\nStatistics\n")
     output_file.write(f"  - Number of variables: {model.NumVars}\n")
     output_file.write(f"  - Number of constraints: {model.NumConstrs}\n")
+    output_file.write(f"  - Formulation: {formulation} ({num_binaries} binaries)\n")
+    if formulation == "disjunctive":
+        output_file.write(
+            f"  - Disjunctions: {len(plan.pairs)} binary, {len(plan.fixed)} fixed, {plan.dropped} dropped ({disjunction_mode})\n"
+        )
+        if lazy:
+            output_file.write(f"  - Lazy disjunctions: {lazy_disjunctions.cuts} of {len(plan.pairs)} pairs added\n")
+        output_file.write(f"  - Model builder: {builder}\n")
+    if params:
+        output_file.write(f"  - Parameters: {params}{' (tuned profile)' if profile else ''}\n")
+    if model_cache:
+        output_file.write(f"  - Model cache: {'hit' if cache_hit else 'miss'} ({cache_key})\n")
+    if heuristic is not None:
+        output_file.write(f"  - Horizon: {horizon} ({heuristic.rule} dispatching rule, sum of durations {duration_sum})\n")
+    else:
+        output_file.write(f"  - Horizon: {horizon} (sum of durations)\n")
+    output_file.write(f"  - Horizon heuristic time: {heuristic_time}s\n")
+    output_file.write(f"  - Model build time: {build_time}s\n")
+    if trajectory:
+        output_file.write(f"  - Time to first incumbent: {trajectory[0].time}s\n")
+    if hint is not None:
+        output_file.write(f"  - Warm start: given schedule, makespan {hint_makespan}\n")
+    elif warm_start:
+        output_file.write(f"  - Warm start: {heuristic.rule} dispatching rule, makespan {heuristic.makespan}\n")
+    output_file.write(f"  - Lower bound: {final_bound} (job {bounds.job}, machine {bounds.machine}, jackson {bounds.jackson})\n")
+    output_file.write(f"  - Gap: {format_gap(gap(found_makespan, final_bound))}\n")
+    if known_high is not None:
+        output_file.write(f"  - Best known: {known_low}..{known_high}, gap to best known: {format_gap(gap(found_makespan, known_high))}\n")
+    output_file.write(f"  - Solver time: {solve_time}s\n")
     output_file.write(f"  - Time taken to solve the problem: {time.time() - inicio}s\n\n")
 
-# Function to process all files in the directory
-def process_all_files():
-    # Create or open the output file
-    with open("output_resultsGurobi.txt", "w") as output_file:
-        for file_number in range(1, 101):  # Assuming there are 100 files (ta01.js to ta100.js)
-            file_name = f"ta{str(file_number).zfill(2)}.jss"  # Format the file name
-            file_path = os.path.join(directory_path, file_name)
-
-            
-            if os.path.exists(file_path):
-                with open(file_path, "r") as f:
-                    file_content = f.read()
-                    jobs_data = parse_dataset(file_content)
-                    if jobs_data:
-                        output_file.write(f"Processing file: {file_name}\n")
-                        solve_jobshop(jobs_data, output_file)
-                        output_file.write("\n\n")
-                    else:
-                        output_file.write(f"Failed to parse data from file: {file_name}\n\n")
-            else:
-                output_file.write(f"File {file_name} not found\n\n")
+    if stats is not None:
+        stats.update(
+            horizon=horizon,
+            duration_sum=duration_sum,
+            heuristic_time=heuristic_time,
+            build_time=build_time,
+            solve_time=solve_time,
+            status=model.status,
+            makespan=found_makespan,
+            best_bound=final_bound,
+            lower_bound=lower_bound,
+            gap=gap(found_makespan, final_bound),
+            known_optimum=known_optimum,
+            first_incumbent_time=trajectory[0].time if trajectory else None,
+            time_to_optimal=model.Runtime if model.status == GRB.OPTIMAL else None,
+            trajectory=trajectory,
+            num_vars=model.NumVars,
+            num_constrs=model.NumConstrs,
+            num_binaries=num_binaries,
+            formulation=formulation,
+            model_cache=("hit" if cache_hit else "miss") if model_cache else None,
+            lazy_cuts=lazy_disjunctions.cuts if lazy else None,
+            # Gurobi has no conflict count; branches is its node count
+            conflicts=None,
+            branches=int(model.NodeCount),
+            params=params,
+            starts=schedule.starts if schedule is not None else None,
+            schedule=schedule,
+        )
+
+# Function to process all files in the directory and record every solve in
+# the results database
+def process_all_files(core_budget=None, threads_per_solve=1, pin=False, warm_start=False, lazy=False,
+                      formulation="disjunctive", model_cache=False, db_path=RESULTS_DB, resume=True):
+    # With a core budget several instances at once, each with its own share of cores
+    run_batch("gurobi", family, list(load_family(family)), core_budget, threads_per_solve, pin,
+              options={"warm_start": warm_start, "lazy": lazy, "formulation": formulation,
+                       "model_cache": model_cache},
+              db_path=db_path, resume=resume)
 
 if __name__ == "__main__":
-    process_all_files()
+    parser = argparse.ArgumentParser(description="Solve the Taillard instances with Gurobi")
+    parser.add_argument("--cores", type=int, help="total core budget; enables the parallel batch mode")
+    parser.add_argument("--threads", type=int, default=1, help="Gurobi Threads per solve in parallel mode")
+    parser.add_argument("--pin", action="store_true", help="pin every worker process to its own cores")
+    parser.add_argument("--warm-start", action="store_true", help="start every solve from a dispatching-rule schedule")
+    parser.add_argument("--lazy", action="store_true", help="add the machine disjunctions lazily from a callback")
+    parser.add_argument("--formulation", default="disjunctive",
+                        choices=["disjunctive", "time_indexed", "rank"], help="MIP formulation")
+    parser.add_argument("--model-cache", action="store_true", help="reuse built models from jssp/.cache/models")
+    parser.add_argument("--db", default=RESULTS_DB, help="results database file")
+    parser.add_argument("--rerun", action="store_true",
+                        help="solve again the instances the database already has for this configuration")
+    args = parser.parse_args()
+
+    process_all_files(args.cores, args.threads, args.pin, args.warm_start, args.lazy, args.formulation,
+                      args.model_cache, args.db, not args.rerun)
@@ -1,69 +1,91 @@
+import argparse
 import collections
+import threading
 from ortools.sat.python import cp_model
 import time
 import os
+import numpy as np
+from jsspCache import load_family
+from batchRunner import run_batch
+from trajectory import Incumbent, save_checkpoint, save_trajectory
+from heuristics import best_dispatch, compute_horizon
+from lowerBounds import format_gap, gap, lower_bounds
+from modelCache import load_cp_model, model_key, save_cp_model
+from profiles import profile_for
+from resultsDb import RESULTS_DB
+from schedule import Schedule
 
-# Path to the dataset folder
-#mac
-#folder_path = '/Users/mariopinto/Desktop/Bolsa2024/jssp/taillard/'
-
-#windows
-folder_path = 'C:/Users/Mario/Desktop/Bolsa2024/jssp/taillard'
-
-# Function to parse the dataset from a file
-def parse_dataset(file_path):
-    with open(file_path, 'r') as file:
-        file_content = file.read()
-
-    lines = file_content.strip().splitlines()
-    
-    data = []
-    for line in lines:
-        # Skip comment lines or empty lines
-        if line.startswith("#") or line.strip() == "":
-            continue
-        # Convert the line to a list of integers
+# Instance family to solve, loaded from the jssp/ binary cache (jsspCache.py)
+family = "taillard"
+
+# Solution callback that records every improving makespan with the solver
+# wall time and the best bound at that moment. With stall_time set, a
+# watchdog thread stops the search once no better makespan has been found
+# for that many seconds. With checkpoint_path set, the start times of every
+# improving incumbent are saved there (start_vars is a [jobs, ops] grid).
+class IncumbentRecorder(cp_model.CpSolverSolutionCallback):
+    def __init__(self, stall_time=None, checkpoint_path=None, start_vars=None):
+        cp_model.CpSolverSolutionCallback.__init__(self)
+        self.trajectory = []
+        self.stall_time = stall_time
+        self.checkpoint_path = checkpoint_path
+        self.start_vars = start_vars
+        self._last_improvement = time.time()
+        self._done = threading.Event()
+
+    def on_solution_callback(self):
+        makespan = int(self.objective_value)
+        if self.trajectory and makespan >= self.trajectory[-1].makespan:
+            return
+        self.trajectory.append(Incumbent(self.wall_time, makespan, int(self.best_objective_bound)))
+        self._last_improvement = time.time()
+        if self.checkpoint_path:
+            starts = [[self.value(var) for var in job] for job in self.start_vars]
+            save_checkpoint(self.checkpoint_path, starts, makespan)
+
+    # Function to run solver.solve under the stall watchdog
+    def solve(self, solver, model):
+        if not self.stall_time:
+            return solver.solve(model, self)
+        watchdog = threading.Thread(target=self._watch, args=(solver,), daemon=True)
+        self._last_improvement = time.time()
+        watchdog.start()
         try:
-            row = list(map(int, line.split()))
-            data.append(row)
-        except ValueError:
-            print(f"Could not parse line: {line}")
-            return []
-
-    # Ignore the first data line which contains the number of machines and jobs
-    jobs_data = []
-    for job in data[1:]:  # Skip the first data row
-        job_tasks = []
-        for i in range(0, len(job), 2):
-            machine_id = job[i]
-            processing_time = job[i + 1]
-            job_tasks.append((machine_id, processing_time))
-        jobs_data.append(job_tasks)
-    
-    return jobs_data
+            return solver.solve(model, self)
+        finally:
+            self._done.set()
+            watchdog.join()
 
-# OR-Tools Job Shop Solver function
-def solve_jobshop(jobs_data):
-    # Start the timer to measure the time taken to solve the problem
-    inicio = time.time()
+    def _watch(self, solver):
+        while not self._done.wait(0.1):
+            if time.time() - self._last_improvement > self.stall_time:
+                solver.stop_search()
+                return
+
+# Function to set CP-SAT parameters given as {name: value}; enum values are
+# given by name, e.g. {"search_branching": "FIXED_SEARCH"}
+def set_parameters(solver, params):
+    for name, value in params.items():
+        if isinstance(value, bool):
+            value = "true" if value else "false"
+        solver.parameters.merge_text_format(f"{name}: {value}")
 
+# Named tuple to store information about created variables.
+task_type = collections.namedtuple("task_type", "start end interval")
+
+# Function to build the CP-SAT job-shop model: one interval per operation,
+# one add_no_overlap per machine, the job precedences and the makespan.
+# Returns the model, the task variables by (job, task) and the makespan
+# variable.
+def build_model(jobs_data, horizon, lower_bound):
     machines_count = 1 + max(task[0] for job in jobs_data for task in job)
     all_machines = range(machines_count)
-    # Computes horizon dynamically as the sum of all durations.
-    horizon = sum(task[1] for job in jobs_data for task in job)
 
     # Create the model.
     model = cp_model.CpModel()
-
-    # Named tuple to store information about created variables.
-    task_type = collections.namedtuple("task_type", "start end interval")
-    # Named tuple to manipulate solution information.
-    assigned_task_type = collections.namedtuple(
-        "assigned_task_type", "start job index duration"
-    )
+    all_tasks = {}
 
     # Creates job intervals and adds them to the corresponding machine lists.
-    all_tasks = {}
     machine_to_intervals = collections.defaultdict(list)
 
     for job_id, job in enumerate(jobs_data):
@@ -92,95 +114,242 @@ def solve_jobshop(jobs_data):
             )
 
     # Makespan objective.
-    obj_var = model.new_int_var(0, horizon, "makespan")
+    obj_var = model.new_int_var(lower_bound, horizon, "makespan")
     model.add_max_equality(
         obj_var,
         [all_tasks[job_id, len(job) - 1].end for job_id, job in enumerate(jobs_data)],
     )
     model.minimize(obj_var)
+    return model, all_tasks, obj_var
+
+# OR-Tools Job Shop Solver function
+#   time_limit      -- max solver seconds per instance (None = no limit)
+#   stall_time      -- stop when the makespan has not improved for this long
+#   trajectory_path -- JSON file for the incumbent trajectory
+#   horizon_mode    -- "heuristic" bounds every domain by the best
+#                      dispatching-rule makespan, "sum" by the sum of all durations
+#   warm_start      -- hint the solver with the dispatching-rule schedule
+#   hint            -- start times ([jobs, ops]) of a schedule to hint instead,
+#                      e.g. the checkpoint of an interrupted solve
+#   checkpoint_path -- save the start times of every improving incumbent here
+#   model_cache     -- load the built CpModel from the on-disk model cache
+#                      (modelCache.py) when it is there, and save it otherwise
+#   params          -- CP-SAT parameters as {name: value}; None applies the
+#                      tuned profile of the family and size class
+#                      (profiles/cpsat.json, see cpsatTuning.py), if any
+#   family          -- jssp/ family of the instance, for the profile lookup
+#   known_optimum   -- (lower, upper) best-known values from optimum.csv
+#   stats           -- optional dict that receives horizon, timings, the
+#                      parameters used and the result, with the start times
+#                      as a [jobs, ops] array and the Schedule
+def solve_jobshop(jobs_data, num_workers=None, time_limit=None, stall_time=None, trajectory_path=None,
+                  horizon_mode="heuristic", warm_start=False, known_optimum=None, model_cache=False,
+                  params=None, family=None, hint=None, checkpoint_path=None, stats=None):
+    # Start the timer to measure the time taken to solve the problem
+    inicio = time.time()
+
+    # Computes the horizon from a dispatching-rule schedule (a feasible
+    # makespan), or as the sum of all durations.
+    duration_sum = sum(task[1] for job in jobs_data for task in job)
+    horizon, heuristic = compute_horizon(jobs_data, horizon_mode)
+    if warm_start and heuristic is None:
+        heuristic = best_dispatch(jobs_data)
+
+    # Lower bound on the makespan: job, machine and Jackson bounds. The
+    # best-known values only report the gap to best known.
+    bounds = lower_bounds(jobs_data)
+    lower_bound = bounds.best
+    known_low, known_high = known_optimum or (None, None)
+    # A heuristic schedule that already reaches the bound is optimal: hint it
+    # and the solver stops on its first solution.
+    if heuristic is not None and heuristic.makespan <= lower_bound:
+        warm_start = True
+    heuristic_time = time.time() - inicio
+
+    # Load the model from the model cache; the horizon and the lower bound
+    # are part of the key because they set the variable domains
+    cached = None
+    cache_key = None
+    if model_cache:
+        cache_key = model_key("ortools", jobs_data, horizon=horizon, lower_bound=lower_bound)
+        cached = load_cp_model(cache_key)
+
+    if cached is not None:
+        model, layout = cached
+        all_tasks = {}
+        for (job_id, task_id), index in np.ndenumerate(layout["start"]):
+            all_tasks[job_id, task_id] = task_type(
+                start=model.get_int_var_from_proto_index(int(index)),
+                end=model.get_int_var_from_proto_index(int(layout["end"][job_id, task_id])),
+                interval=None,
+            )
+        obj_var = model.get_int_var_from_proto_index(int(layout["makespan"][0]))
+    else:
+        model, all_tasks, obj_var = build_model(jobs_data, horizon, lower_bound)
+
+        # Save the model before any hint is added: hints are part of the proto
+        if model_cache:
+            num_jobs, num_ops = len(jobs_data), len(jobs_data[0])
+            starts = np.zeros((num_jobs, num_ops), dtype=np.int64)
+            ends = np.zeros((num_jobs, num_ops), dtype=np.int64)
+            for (job_id, task_id), task in all_tasks.items():
+                starts[job_id, task_id] = task.start.index
+                ends[job_id, task_id] = task.end.index
+            save_cp_model(cache_key, model, starts, ends, obj_var.index)
+
+    # Warm start: hint the given schedule, or the heuristic one (both are
+    # complete feasible solutions).
+    if hint is not None:
+        hint = np.asarray(hint)
+        hint_makespan = 0
+        for (job_id, task_id), task in all_tasks.items():
+            start = int(hint[job_id, task_id])
+            end = start + jobs_data[job_id][task_id][1]
+            model.add_hint(task.start, start)
+            model.add_hint(task.end, end)
+            hint_makespan = max(hint_makespan, end)
+        model.add_hint(obj_var, hint_makespan)
+    elif warm_start:
+        for (job_id, task_id), task in all_tasks.items():
+            start = int(heuristic.starts[job_id, task_id])
+            model.add_hint(task.start, start)
+            model.add_hint(task.end, start + jobs_data[job_id][task_id][1])
+        model.add_hint(obj_var, heuristic.makespan)
+
+    build_time = time.time() - inicio - heuristic_time
 
     # Creates the solver and solves.
     solver = cp_model.CpSolver()
-    status = solver.solve(model)
+    # Explicit num_workers and time_limit win over the parameter profile
+    profile = params is None
+    if profile:
+        params = profile_for("cpsat", jobs_data, family) or {}
+    set_parameters(solver, params)
+    if num_workers:
+        solver.parameters.num_workers = num_workers
+    if time_limit:
+        solver.parameters.max_time_in_seconds = time_limit
+    start_vars = [[all_tasks[job_id, task_id].start for task_id in range(len(job))]
+                  for job_id, job in enumerate(jobs_data)]
+    recorder = IncumbentRecorder(stall_time, checkpoint_path, start_vars)
+    status = recorder.solve(solver, model)
 
     output = ""
 
+    schedule = None
     if status == cp_model.OPTIMAL or status == cp_model.FEASIBLE:
         output += "Solution:\n"
-        # Create one list of assigned tasks per machine.
-        assigned_jobs = collections.defaultdict(list)
-        for job_id, job in enumerate(jobs_data):
-            for task_id, task in enumerate(job):
-                machine = task[0]
-                assigned_jobs[machine].append(
-                    assigned_task_type(
-                        start=solver.value(all_tasks[job_id, task_id].start),
-                        job=job_id,
-                        index=task_id,
-                        duration=task[1],
-                    )
-                )
-
-        # Create per machine output lines.
-        for machine in all_machines:
-            # Sort by starting time.
-            assigned_jobs[machine].sort()
-            sol_line_tasks = "Machine " + str(machine) + ": "
-            sol_line = "           "
-
-            for assigned_task in assigned_jobs[machine]:
-                name = f"job_{assigned_task.job}_task_{assigned_task.index}"
-                # add spaces to output to align columns.
-                sol_line_tasks += f"{name:15}"
-
-                start = assigned_task.start
-                duration = assigned_task.duration
-                sol_tmp = f"[{start},{start + duration}]"
-                # add spaces to output to align columns.
-                sol_line += f"{sol_tmp:15}"
-
-            sol_line += "\n"
-            sol_line_tasks += "\n"
-            output += sol_line_tasks
-            output += sol_line
+        # Per machine output lines, rendered from the op-indexed start times.
+        schedule = Schedule.from_starts(jobs_data, [[solver.value(var) for var in job] for job in start_vars])
+        output += schedule.text()
 
         # Finally, print the solution found.
-        output += f"Optimal Schedule Length: {solver.objective_value}\n"
+        if status == cp_model.OPTIMAL:
+            output += f"Optimal Schedule Length: {solver.objective_value}\n"
+        else:
+            output += f"Best Schedule Length: {solver.objective_value} (bound {solver.best_objective_bound})\n"
     else:
         output += "No solution found.\n"
 
+    # Incumbent trajectory: every improving makespan found during the search.
+    output += "\nIncumbents (wall time, makespan, bound)\n"
+    for incumbent in recorder.trajectory:
+        output += f"  {incumbent.time:10.3f}s {incumbent.makespan:8d} {incumbent.bound:8d}\n"
+    if trajectory_path:
+        save_trajectory(
+            trajectory_path,
+            recorder.trajectory,
+            status=solver.status_name(status),
+            best_bound=solver.best_objective_bound,
+            wall_time=solver.wall_time,
+            time_limit=time_limit,
+        )
+
+    found = status in (cp_model.OPTIMAL, cp_model.FEASIBLE)
+    makespan = solver.objective_value if found else None
+    final_bound = max(lower_bound, int(solver.best_objective_bound)) if found else lower_bound
+
     # Statistics.
     output += "\nStatistics\n"
     output += f"  - conflicts: {solver.num_conflicts}\n"
     output += f"  - branches : {solver.num_branches}\n"
     output += f"  - wall time: {solver.wall_time}s\n"
+    if heuristic is not None:
+        output += f"  - horizon: {horizon} ({heuristic.rule} dispatching rule, sum of durations {duration_sum})\n"
+    else:
+        output += f"  - horizon: {horizon} (sum of durations)\n"
+    output += f"  - horizon heuristic time: {heuristic_time}s\n"
+    output += f"  - model build time: {build_time}s\n"
+    output += f"  - lower bound: {final_bound} (job {bounds.job}, machine {bounds.machine}, jackson {bounds.jackson})\n"
+    output += f"  - gap: {format_gap(gap(makespan, final_bound))}\n"
+    if known_high is not None:
+        output += f"  - best known: {known_low}..{known_high}, gap to best known: {format_gap(gap(makespan, known_high))}\n"
+    if recorder.trajectory:
+        output += f"  - time to first incumbent: {recorder.trajectory[0].time}s\n"
+    if hint is not None:
+        output += f"  - warm start: given schedule, makespan {hint_makespan}\n"
+    elif warm_start:
+        output += f"  - warm start: {heuristic.rule} dispatching rule, makespan {heuristic.makespan}\n"
+    if params:
+        output += f"  - parameters: {params}{' (tuned profile)' if profile else ''}\n"
+    if model_cache:
+        output += f"  - model cache: {'hit' if cached is not None else 'miss'} ({cache_key})\n"
     output += f"  - time taken to solve the problem: {time.time()-inicio}s\n"
 
+    if stats is not None:
+        stats.update(
+            horizon=horizon,
+            duration_sum=duration_sum,
+            heuristic_time=heuristic_time,
+            build_time=build_time,
+            solve_time=solver.wall_time,
+            status=solver.status_name(status),
+            makespan=makespan,
+            best_bound=final_bound,
+            lower_bound=lower_bound,
+            gap=gap(makespan, final_bound),
+            known_optimum=known_optimum,
+            first_incumbent_time=recorder.trajectory[0].time if recorder.trajectory else None,
+            time_to_optimal=solver.wall_time if status == cp_model.OPTIMAL else None,
+            trajectory=recorder.trajectory,
+            conflicts=solver.num_conflicts,
+            branches=solver.num_branches,
+            model_cache=("hit" if cached is not None else "miss") if model_cache else None,
+            params=params,
+            starts=schedule.starts if schedule is not None else None,
+            schedule=schedule,
+        )
+
     return output
 
-# Function to automatically solve all dataset files
-def process_all_files():
-    #mac
-    #output_path = "/Users/mariopinto/Desktop/Bolsa2024/output_resultsERTOOLS.txt"
-
-    #windows
-    output_path= 'C:/Users/Mario/Desktop/Bolsa2024/output_resultsERTOOLS.txt'
-
-    with open(output_path, "w") as output_file:
-        for i in range(1, 14):  # Assuming 10 files (ta01.js to ta10.js)
-            file_name = f"ta{i:02d}.jss"
-            file_path = os.path.join(folder_path, file_name)
-            print(f"Processing file: {file_name}")
-            jobs_data = parse_dataset(file_path)
-
-            if jobs_data:
-                result = solve_jobshop(jobs_data)
-                output_file.write(f"Results for {file_name}:\n")
-                output_file.write(result)
-                output_file.write("\n" + "="*40 + "\n")
-            else:
-                output_file.write(f"Error parsing {file_name}\n")
-                output_file.write("\n" + "="*40 + "\n")
-
-# Automatically process all files
-process_all_files()
+# Function to automatically solve all dataset files and record every solve in
+# the results database
+def process_all_files(core_budget=None, threads_per_solve=1, pin=False, time_limit=None, stall_time=None,
+                      warm_start=False, model_cache=False, db_path=RESULTS_DB, resume=True):
+    # Incumbent trajectories are saved next to the database, one JSON per instance
+    trajectory_dir = os.path.join(os.path.dirname(db_path), "trajectories")
+    options = {"time_limit": time_limit, "stall_time": stall_time, "warm_start": warm_start,
+               "model_cache": model_cache, "trajectory_dir": trajectory_dir}
+
+    # Every instance of the family, in file order; with a core budget several
+    # instances at once, each with its own share of cores
+    run_batch("ortools", family, list(load_family(family)), core_budget, threads_per_solve, pin, options=options,
+              db_path=db_path, resume=resume)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Solve the Taillard instances with OR-Tools")
+    parser.add_argument("--cores", type=int, help="total core budget; enables the parallel batch mode")
+    parser.add_argument("--threads", type=int, default=1, help="CP-SAT num_workers per solve in parallel mode")
+    parser.add_argument("--pin", action="store_true", help="pin every worker process to its own cores")
+    parser.add_argument("--time-limit", type=float, help="solver time budget per instance, in seconds")
+    parser.add_argument("--stall-time", type=float, help="stop a solve after this many seconds without improvement")
+    parser.add_argument("--warm-start", action="store_true", help="hint every solve with a dispatching-rule schedule")
+    parser.add_argument("--model-cache", action="store_true", help="reuse built models from jssp/.cache/models")
+    parser.add_argument("--db", default=RESULTS_DB, help="results database file")
+    parser.add_argument("--rerun", action="store_true",
+                        help="solve again the instances the database already has for this configuration")
+    args = parser.parse_args()
+
+    # Automatically process all files
+    process_all_files(args.cores, args.threads, args.pin, args.time_limit, args.stall_time, args.warm_start,
+                      args.model_cache, args.db, not args.rerun)
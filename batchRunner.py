@@ -0,0 +1,220 @@
+import concurrent.futures
+import importlib
+import io
+import multiprocessing
+import os
+import traceback
+from jsspCache import family_index, load_family, optimum_of
+from modelCache import instance_hash
+from profiles import profile_for
+from resultsDb import RESULTS_DB, ResultsWriter, completed, config_hash, new_batch, run_row
+from trajectory import load_checkpoint
+
+# Batch mode for autoORTOOL.py and autoGurobi.py.
+#
+# Every solve becomes one row of the results database (resultsDb.py).
+# Several instances can be solved at the same time in a process pool. A total
+# core budget is split into processes x solver threads, where the threads are
+# given to CP-SAT through num_workers and to Gurobi through Threads. With
+# pinning enabled every worker process is bound to its own set of cores, so a
+# solve never competes with its neighbours and timings stay comparable with a
+# dedicated run.
+
+BACKENDS = {
+    "ortools": "autoORTOOL",
+    "gurobi": "autoGurobi",
+}
+
+# Parameter profile of each backend (profiles.py)
+PROFILES = {
+    "ortools": "cpsat",
+    "gurobi": "gurobi",
+}
+
+
+# Function to split a core budget into (processes, threads per solve)
+def plan_cores(core_budget, threads_per_solve):
+    if core_budget < 1 or threads_per_solve < 1:
+        raise ValueError("core budget and threads per solve must be at least 1")
+    threads_per_solve = min(threads_per_solve, core_budget)
+    return core_budget // threads_per_solve, threads_per_solve
+
+
+# Function to pick the cores to pin the workers to: the first core_budget
+# cores this process may run on, cut into one slice per worker
+def core_slices(processes, threads_per_solve):
+    if hasattr(os, "sched_getaffinity"):
+        available = sorted(os.sched_getaffinity(0))
+    else:
+        available = list(range(os.cpu_count() or 1))
+    needed = processes * threads_per_solve
+    if needed > len(available):
+        raise ValueError(f"core budget of {needed} exceeds the {len(available)} available cores")
+    return [
+        available[i * threads_per_solve:(i + 1) * threads_per_solve]
+        for i in range(processes)
+    ]
+
+
+# Pool initializer: take a free slice of cores and pin this worker to it
+def _pin_worker(slot_queue):
+    cores = slot_queue.get()
+    if hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, cores)
+
+
+# Options that say where a run is logged rather than how it is solved; they
+# are not part of the configuration recorded with the run
+_LOG_OPTIONS = ("trajectory_dir", "trajectory_path", "checkpoint_dir", "known_optimum", "family")
+
+
+# Function to resolve the configuration of one solve: the solver parameters
+# (the explicit "params" option or the tuned profile), the run options and
+# their hash, as recorded in the results database
+def run_config(backend, family, file_name, threads, options=None):
+    options = options or {}
+    params = options.get("params")
+    if params is None:
+        params = profile_for(PROFILES[backend], load_family(family)[file_name], family) or {}
+    run_options = {name: value for name, value in options.items() if name not in _LOG_OPTIONS and name != "params"}
+    run_options["threads"] = threads
+    return params, run_options, config_hash(backend, params, run_options)
+
+
+# Function to name the incumbent checkpoint of one instance and configuration
+def checkpoint_path(checkpoint_dir, backend, config, jobs_data):
+    return os.path.join(checkpoint_dir, f"{backend}-{config}-{instance_hash(jobs_data)[:16]}.npz")
+
+
+# Function to solve one instance, inside a worker process or in-process, and
+# return its results database row and its checkpoint file. The instance
+# comes from the memory-mapped cache, so nothing is pickled but its name.
+# Extra solver options are passed on to solve_jobshop; a trajectory_dir
+# option becomes the per-instance trajectory_path. With a checkpoint_dir
+# option every improving incumbent is saved there, and a checkpoint left by
+# an interrupted solve of the same configuration is the hint of this one.
+def solve_one(backend, family, file_name, threads, options=None, batch=None):
+    module = importlib.import_module(BACKENDS[backend])
+    jobs_data = load_family(family)[file_name]
+    params, run_options, config = run_config(backend, family, file_name, threads, options)
+    options = dict(options or {}, params=params)
+    options.setdefault("known_optimum", optimum_of(family, file_name))
+    trajectory_dir = options.pop("trajectory_dir", None)
+    if trajectory_dir:
+        options["trajectory_path"] = os.path.join(trajectory_dir, os.path.splitext(file_name)[0] + ".json")
+    checkpoint_dir = options.pop("checkpoint_dir", None)
+    checkpoint = None
+    if checkpoint_dir:
+        checkpoint = checkpoint_path(checkpoint_dir, backend, config, jobs_data)
+        saved = load_checkpoint(checkpoint)
+        if saved is not None:
+            print(f"Resuming file: {file_name} from its checkpoint, makespan {saved[1]}")
+            options["hint"] = saved[0]
+        options["checkpoint_path"] = checkpoint
+    options.setdefault("family", family)
+    stats = {}
+    if backend == "ortools":
+        module.solve_jobshop(jobs_data, num_workers=threads, stats=stats, **options)
+    else:
+        module.solve_jobshop(jobs_data, io.StringIO(), threads=threads, stats=stats, **options)
+    return file_name, run_row(backend, family, file_name, jobs_data, stats, run_options, batch), checkpoint
+
+
+def _report(file_name, row):
+    makespan = "-" if row["makespan"] is None else f"{row['makespan']:.0f}"
+    print(f"Finished file: {file_name} ({row['status']}, makespan {makespan}, {row['solve_time']:.2f}s)")
+
+
+# Function to solve a list of instances of a family and append one row per
+# instance to the results database (resultsDb.py). Without a core budget the
+# instances are solved one after the other in this process, with the
+# solver's default threads. With a core budget they are solved in a process
+# pool, largest first so the pool does not end on one long straggler.
+#
+# Runs are resumable: every row is committed on its own as soon as its
+# instance finishes, and with resume set an instance that already has a row
+# for the same configuration is skipped. Incumbents are checkpointed under
+# checkpoints/ next to the database, so an instance interrupted mid-solve
+# starts again from its best schedule; the checkpoint is deleted once the
+# row is committed. An instance whose solve raises is reported and left
+# without a row, so the next resumed run solves it again; the other
+# instances of the batch still run and are committed.
+def run_batch(backend, family, file_names, core_budget=None, threads_per_solve=1, pin=False, options=None,
+              db_path=RESULTS_DB, resume=True):
+    if backend not in BACKENDS:
+        raise ValueError(f"unknown backend {backend!r}, expected one of {sorted(BACKENDS)}")
+    batch = new_batch()
+    options = dict(options or {})
+    options.setdefault("checkpoint_dir", os.path.join(os.path.dirname(db_path), "checkpoints"))
+    processes, threads = plan_cores(core_budget, threads_per_solve) if core_budget else (1, None)
+
+    sizes = {entry["name"]: entry["total_ops"] for entry in family_index(family)["instances"]}
+    for file_name in file_names:
+        if file_name not in sizes:
+            print(f"File {file_name} not found")
+    file_names = [f for f in file_names if f in sizes]
+
+    failed = []
+
+    def finish(file_name, row, checkpoint):
+        writer.add(row)
+        _report(file_name, row)
+        if checkpoint and os.path.exists(checkpoint):
+            os.remove(checkpoint)
+
+    def fail(file_name, error):
+        failed.append(file_name)
+        print(f"Failed file: {file_name}")
+        traceback.print_exception(error)
+
+    with ResultsWriter(db_path, batch_size=1) as writer:
+        if resume:
+            done = completed(writer.connection, backend)
+            instances = load_family(family)
+            remaining = []
+            for file_name in file_names:
+                key = (instance_hash(instances[file_name]), run_config(backend, family, file_name, threads, options)[2])
+                if key in done:
+                    print(f"Skipping file: {file_name} (solved in batch {done[key]})")
+                else:
+                    remaining.append(file_name)
+            file_names = remaining
+
+        if not core_budget:
+            print(f"Solving {len(file_names)} instances, batch {batch}")
+            for file_name in file_names:
+                print(f"Processing file: {file_name}")
+                try:
+                    finish(*solve_one(backend, family, file_name, None, options, batch))
+                except Exception as error:
+                    fail(file_name, error)
+        else:
+            file_names.sort(key=lambda f: -sizes[f])
+            pool_args = {"max_workers": processes}
+            if pin:
+                # The queue is inherited by the workers, so use a start method
+                # that passes it at creation time on every platform
+                context = multiprocessing.get_context()
+                slot_queue = context.Queue()
+                for cores in core_slices(processes, threads):
+                    slot_queue.put(cores)
+                pool_args.update(mp_context=context, initializer=_pin_worker, initargs=(slot_queue,))
+
+            print(f"Solving {len(file_names)} instances with {processes} processes x {threads} threads, batch {batch}")
+            with concurrent.futures.ProcessPoolExecutor(**pool_args) as executor:
+                futures = {
+                    executor.submit(solve_one, backend, family, file_name, threads, options, batch): file_name
+                    for file_name in file_names
+                }
+                # Every finished instance is committed as it comes in, whatever
+                # happened to the others
+                for future in concurrent.futures.as_completed(futures):
+                    try:
+                        result = future.result()
+                    except Exception as error:
+                        fail(futures[future], error)
+                    else:
+                        finish(*result)
+    if failed:
+        print(f"{len(failed)} instances failed: {', '.join(failed)}")
+    return batch
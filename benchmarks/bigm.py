@@ -0,0 +1,53 @@
+import argparse
+import io
+from jsspCache import load_family, query
+from lowerBounds import format_gap
+
+# Big-M benchmark for the Gurobi disjunctive model: build and solve every
+# selected instance with the global horizon as big-M for every pair and with
+# the per-pair big-M / pruned disjunctions, and report model size and time.
+#
+#   python -m benchmarks.bigm taillard la --time-limit 300
+
+
+# Function to solve one instance with one disjunction mode and return its stats
+def run(jobs_data, disjunction_mode, time_limit, known_optimum):
+    import autoGurobi
+    stats = {}
+    params = {"OutputFlag": 0}
+    if time_limit:
+        params["TimeLimit"] = time_limit
+    autoGurobi.solve_jobshop(
+        jobs_data, io.StringIO(), params=params, known_optimum=known_optimum,
+        disjunction_mode=disjunction_mode, stats=stats,
+    )
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare global and per-pair big-M disjunctions")
+    parser.add_argument("families", nargs="+")
+    parser.add_argument("--time-limit", type=float, default=300)
+    parser.add_argument("--max-ops", type=int, help="skip instances with more operations")
+    args = parser.parse_args()
+
+    print(
+        f"{'instance':20}{'bin before':>11}{'bin after':>10}{'cons before':>12}{'cons after':>11}"
+        f"{'build before':>13}{'build after':>12}{'solve before':>13}{'solve after':>12}{'gap before':>11}{'gap after':>10}"
+    )
+    for row in query(args.families, max_ops=args.max_ops):
+        jobs_data = load_family(row["family"])[row["name"]]
+        known_optimum = (row["optimum_lo"], row["optimum_hi"])
+        before = run(jobs_data, "global", args.time_limit, known_optimum)
+        after = run(jobs_data, "tight", args.time_limit, known_optimum)
+        print(
+            f"{row['name']:20}{before['num_binaries']:>11}{after['num_binaries']:>10}"
+            f"{before['num_constrs']:>12}{after['num_constrs']:>11}"
+            f"{before['build_time']:>13.3f}{after['build_time']:>12.3f}"
+            f"{before['solve_time']:>13.3f}{after['solve_time']:>12.3f}"
+            f"{format_gap(before['gap']):>11}{format_gap(after['gap']):>10}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+import argparse
+import time
+import numpy as np
+from jsspCache import FAMILIES, load_family, query
+
+# Decode benchmark for the genetic algorithm: decode the same random
+# population of operation-based chromosomes of every selected instance with
+# the batched NumPy decoders of geneticAlgorithm.py, in this process and on
+# pools of worker processes, and report schedules per second. The "loop"
+# column decodes the chromosomes one at a time with a plain Python
+# semi-active decoder, for comparison. Every figure is the best of --repeat
+# runs; the pools are started before the clock runs.
+#
+#   python -m benchmarks.decode ft la taillard --names ft10 la40 ta71
+#   python -m benchmarks.decode taillard --names ta71 --population 512 --workers 1 2 4 8
+
+
+# Function to decode one chromosome at a time in Python; returns the makespans
+def loop_decode(instance, chromosomes):
+    machines = instance.machines.tolist()
+    durations = instance.durations.tolist()
+    makespans = []
+    for chromosome in chromosomes.tolist():
+        next_op = [0] * instance.num_jobs
+        job_ready = [0] * instance.num_jobs
+        machine_ready = [0] * instance.num_machines
+        for job in chromosome:
+            op = next_op[job]
+            machine = machines[job][op]
+            end = max(job_ready[job], machine_ready[machine]) + durations[job][op]
+            job_ready[job] = machine_ready[machine] = end
+            next_op[job] = op + 1
+        makespans.append(max(machine_ready))
+    return makespans
+
+
+def _rate(function, chromosomes, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function(chromosomes)
+        best = min(best, time.perf_counter() - start)
+    return chromosomes.shape[0] / best
+
+
+def main():
+    from geneticAlgorithm import DECODERS, PopulationDecoder
+    from jsspInstance import from_jobs_data
+
+    parser = argparse.ArgumentParser(description="Measure decode throughput of the genetic algorithm")
+    parser.add_argument("families", nargs="+", choices=FAMILIES)
+    parser.add_argument("--names", nargs="+", help="only these instances")
+    parser.add_argument("--population", type=int, default=256)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2], help="pool sizes to measure")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    columns = [(decoder, workers) for decoder in DECODERS for workers in args.workers]
+    print(f"{'instance':20}{'ops':>6}{'loop':>10}" + "".join(f"{f'{d} x{w}':>18}" for d, w in columns))
+    rng = np.random.default_rng(args.seed)
+    for row in query(args.families):
+        name = row["name"]
+        if args.names and name not in args.names and name.rsplit(".", 1)[0] not in args.names:
+            continue
+        instance = from_jobs_data(load_family(row["family"])[name])
+        base = np.repeat(np.arange(instance.num_jobs, dtype=np.int32), instance.num_ops)
+        chromosomes = rng.permuted(np.tile(base, (args.population, 1)), axis=1)
+
+        line = f"{row['family'] + '/' + name:20}{row['total_ops']:>6}"
+        line += f"{_rate(lambda batch: loop_decode(instance, batch), chromosomes, args.repeat):>10.0f}"
+        for decoder, workers in columns:
+            with PopulationDecoder(instance, decoder, workers) as population_decoder:
+                population_decoder(chromosomes[:workers])
+                line += f"{_rate(population_decoder, chromosomes, args.repeat):>18.0f}"
+        print(line, flush=True)
+    print("\nschedules decoded per second")
+
+
+if __name__ == "__main__":
+    main()
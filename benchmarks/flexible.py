@@ -0,0 +1,99 @@
+import argparse
+import time
+from jsspInstance import load_flexible_instance
+
+# Flexible job-shop MIP benchmark: on the same .fjs files, build the
+# per-option model of FlexibleJssp/FlexGurobiBrandimarte.py (start, end and
+# assignment variables for every option, a disjunction for every pair of
+# options on a machine, horizon = sum of the shortest times) and the compact
+# model of gurobiModels.build_flexible_model (one start per operation, order
+# binaries only per operation pair sharing a machine, dispatching-rule
+# horizon), and record their size, build time, LP relaxation bound and the
+# result of a time-limited solve. A model Gurobi refuses to solve, as with a
+# size-limited license, gets "-" for the solve columns.
+#
+#   python -m benchmarks.flexible FlexibleJssp/mk01.fjs jssp/car/car1.fjs --time-limit 60
+
+MODELS = ("per_option", "compact")
+
+
+# Function to build one model; returns (model, build seconds)
+def build(instance, name, env):
+    import gurobipy as gp
+    from FlexibleJssp.FlexGurobiBrandimarte import build_model
+    from gurobiModels import build_flexible_model
+    from heuristics import best_flexible_dispatch
+    from lowerBounds import flexible_lower_bounds
+
+    start = time.time()
+    model = gp.Model("flexible_job_shop_scheduling", env=env)
+    if name == "per_option":
+        build_model(model, instance.jobs_data, instance.num_machines)
+    else:
+        horizon = best_flexible_dispatch(instance).makespan
+        build_flexible_model(model, instance, min(flexible_lower_bounds(instance).best, horizon), horizon)
+    model.update()
+    return model, time.time() - start
+
+
+# Function to run one model: its LP bound and the time-limited solve, with
+# None for what Gurobi refused to solve
+def run(model, time_limit):
+    import gurobipy as gp
+    result = {"lp_bound": None, "makespan": None, "bound": None, "time_to_optimal": None, "solve_time": None}
+    try:
+        relaxed = model.relax()
+        relaxed.optimize()
+        if relaxed.status == gp.GRB.OPTIMAL:
+            result["lp_bound"] = relaxed.ObjVal
+        if time_limit:
+            model.setParam("TimeLimit", time_limit)
+        model.optimize()
+    except gp.GurobiError as error:
+        result["error"] = str(error)
+        return result
+    result["solve_time"] = model.Runtime
+    if model.SolCount:
+        result["makespan"] = model.ObjVal
+        result["bound"] = model.ObjBound
+    if model.status == gp.GRB.OPTIMAL:
+        result["time_to_optimal"] = model.Runtime
+    return result
+
+
+def _format(value, spec):
+    return "-" if value is None else format(value, spec)
+
+
+def main():
+    import gurobipy as gp
+
+    parser = argparse.ArgumentParser(description="Compare the per-option and compact flexible job-shop MIPs")
+    parser.add_argument("files", nargs="+", help=".fjs instance files")
+    parser.add_argument("--time-limit", type=float, default=60, help="solver time limit per model, in seconds")
+    args = parser.parse_args()
+
+    env = gp.Env(params={"OutputFlag": 0})
+    print(f"{'instance':14}{'model':>12}{'vars':>8}{'constrs':>9}{'binaries':>10}{'nonzeros':>10}{'build':>8}"
+          f"{'LP bound':>10}{'makespan':>10}{'bound':>8}{'solve':>8}")
+    errors = set()
+    for path in args.files:
+        instance = load_flexible_instance(path)
+        for name in MODELS:
+            model, build_time = build(instance, name, env)
+            result = run(model, args.time_limit)
+            if "error" in result:
+                errors.add(result["error"])
+            print(
+                f"{instance.name:14}{name:>12}{model.NumVars:>8}{model.NumConstrs:>9}{model.NumBinVars:>10}"
+                f"{model.NumNZs:>10}{build_time:>8.3f}{_format(result['lp_bound'], '.1f'):>10}"
+                f"{_format(result['makespan'], '.0f'):>10}{_format(result['bound'], '.0f'):>8}"
+                f"{_format(result['solve_time'], '.2f'):>8}"
+            )
+            model.dispose()
+    for error in sorted(errors):
+        print(f"\nnot solved: {error}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+import argparse
+import collections
+import io
+import time
+from jsspCache import load_family, query
+
+# Formulation benchmark for the Gurobi solver: for every selected instance,
+# build the disjunctive, time-indexed and rank-based models and record the
+# build time, the LP relaxation bound and the time to optimal, then
+# summarize every family.
+#
+#   python -m benchmarks.formulations ft la --time-limit 300
+
+FORMULATIONS = ("disjunctive", "time_indexed", "rank")
+
+
+# Function to build one formulation and return (build seconds, LP bound)
+def lp_bound(jobs_data, formulation):
+    import gurobipy as gp
+    from disjunctions import plan_disjunctions
+    from gurobiModels import BUILDERS, FORMULATIONS as BUILDERS_BY_NAME
+    from heuristics import compute_horizon
+
+    horizon, _ = compute_horizon(jobs_data)
+    plan = plan_disjunctions(jobs_data, horizon)
+    env = gp.Env(params={"OutputFlag": 0})
+    start = time.time()
+    model = gp.Model("job_shop_scheduling", env=env)
+    build = BUILDERS["matrix"] if formulation == "disjunctive" else BUILDERS_BY_NAME[formulation]
+    # The trivial lower bound keeps the LP bound a property of the formulation
+    build(model, jobs_data, plan, 0, horizon)
+    model.update()
+    build_time = time.time() - start
+
+    relaxed = model.relax()
+    relaxed.optimize()
+    bound = relaxed.ObjVal if relaxed.status == gp.GRB.OPTIMAL else None
+    return build_time, bound
+
+
+# Function to solve one instance with one formulation and return its stats
+def run(jobs_data, formulation, time_limit, known_optimum):
+    import autoGurobi
+    stats = {}
+    params = {"OutputFlag": 0}
+    if time_limit:
+        params["TimeLimit"] = time_limit
+    autoGurobi.solve_jobshop(
+        jobs_data, io.StringIO(), params=params, known_optimum=known_optimum, formulation=formulation, stats=stats,
+    )
+    return stats
+
+
+def _format(value, spec):
+    return "-" if value is None else format(value, spec)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the Gurobi job-shop formulations")
+    parser.add_argument("families", nargs="+")
+    parser.add_argument("--time-limit", type=float, default=300)
+    parser.add_argument("--max-ops", type=int, help="skip instances with more operations")
+    args = parser.parse_args()
+
+    print(f"{'instance':20}{'formulation':>14}{'binaries':>10}{'build':>9}{'LP bound':>10}{'makespan':>10}{'to opt':>9}")
+    summary = collections.defaultdict(lambda: collections.defaultdict(list))
+    for row in query(args.families, max_ops=args.max_ops):
+        jobs_data = load_family(row["family"])[row["name"]]
+        known_optimum = (row["optimum_lo"], row["optimum_hi"])
+        for formulation in FORMULATIONS:
+            build_time, bound = lp_bound(jobs_data, formulation)
+            stats = run(jobs_data, formulation, args.time_limit, known_optimum)
+            print(
+                f"{row['name']:20}{formulation:>14}{stats['num_binaries']:>10}{build_time:>9.3f}"
+                f"{_format(bound, '.1f'):>10}{_format(stats['makespan'], '.0f'):>10}"
+                f"{_format(stats['time_to_optimal'], '.2f'):>9}"
+            )
+            results = summary[row["family"], formulation]
+            results["build"].append(build_time)
+            if bound is not None and row["optimum_hi"]:
+                results["lp_ratio"].append(bound / row["optimum_hi"])
+            if stats["time_to_optimal"] is not None:
+                results["to_opt"].append(stats["time_to_optimal"])
+            results["count"].append(1)
+
+    print(f"\n{'family':12}{'formulation':>14}{'mean build':>12}{'LP / opt':>10}{'solved':>8}{'mean to opt':>13}")
+    for (family, formulation), results in summary.items():
+        def mean(values):
+            return sum(values) / len(values) if values else None
+        print(
+            f"{family:12}{formulation:>14}{mean(results['build']):>12.3f}{_format(mean(results['lp_ratio']), '.3f'):>10}"
+            f"{len(results['to_opt']):>4}/{len(results['count']):<3}{_format(mean(results['to_opt']), '.2f'):>13}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+import argparse
+import random
+import time
+from jsspCache import FAMILIES, load_family, query
+
+# Disjunctive-graph microbenchmark: from the best dispatching schedule of
+# every selected instance, walk a number of random N6 moves and time, per
+# move, the incremental update of DisjunctiveGraph.apply against a full
+# longest-path pass (evaluate) over the same graph, and the estimate of
+# every move of the neighborhood. "affected" is the mean share of heads and
+# tails the incremental update recomputed. With --check the incremental
+# heads and tails are compared with the full pass after every move.
+#
+#   python -m benchmarks.graph taillard --names ta01 ta21 ta41 ta61 ta71
+#   python -m benchmarks.graph taillard --min-ops 1000 --moves 2000 --check
+
+
+# Function to time one random walk; returns mean microseconds of one
+# incremental update, one full pass and one estimate, the mean affected
+# share and the number of mismatches found by check
+def run(jobs_data, moves, seed, check):
+    from heuristics import best_dispatch
+    from jsspInstance import from_jobs_data
+    from tabuSearch import TabuSearch
+
+    instance = from_jobs_data(jobs_data)
+    graph = TabuSearch(instance, best_dispatch(instance).starts, seed)
+    rng = random.Random(seed)
+    incremental = full = estimate = 0.0
+    estimated = affected = mismatches = 0
+    for _ in range(moves):
+        neighborhood = graph.moves("n6")
+        if not neighborhood:
+            break
+        start = time.perf_counter()
+        for move in neighborhood:
+            graph.estimate(move)
+        estimate += time.perf_counter() - start
+        estimated += len(neighborhood)
+
+        start = time.perf_counter()
+        graph.apply(rng.choice(neighborhood))
+        incremental += time.perf_counter() - start
+        affected += graph.affected
+
+        heads, tails = graph.heads, graph.tails
+        start = time.perf_counter()
+        graph.evaluate()
+        full += time.perf_counter() - start
+        if check and (heads != graph.heads or tails != graph.tails):
+            mismatches += 1
+    return (1e6 * incremental / moves, 1e6 * full / moves, 1e6 * estimate / max(estimated, 1),
+            affected / (2 * moves * instance.total_ops), mismatches)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time incremental against full longest-path updates")
+    parser.add_argument("families", nargs="+", choices=FAMILIES)
+    parser.add_argument("--names", nargs="+", help="only these instances")
+    parser.add_argument("--min-ops", type=int, help="skip instances with fewer operations")
+    parser.add_argument("--moves", type=int, default=1000, help="random moves per instance")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--check", action="store_true", help="compare every update with a full pass")
+    args = parser.parse_args()
+
+    print(f"{'instance':20}{'ops':>6}{'full us':>10}{'incr us':>10}{'speedup':>9}{'affected':>10}"
+          f"{'estimate us':>13}" + (f"{'mismatches':>12}" if args.check else ""))
+    for row in query(args.families, min_ops=args.min_ops):
+        name = row["name"]
+        if args.names and name not in args.names and name.rsplit(".", 1)[0] not in args.names:
+            continue
+        incremental, full, estimate, affected, mismatches = run(
+            load_family(row["family"])[name], args.moves, args.seed, args.check)
+        print(f"{row['family'] + '/' + name:20}{row['total_ops']:>6}{full:>10.1f}{incremental:>10.1f}"
+              f"{full / max(incremental, 1e-9):>8.1f}x{affected:>10.1%}{estimate:>13.2f}"
+              + (f"{mismatches:>12}" if args.check else ""))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+import argparse
+import multiprocessing
+import resource
+import time
+from jsspCache import load_family, query
+
+# Build benchmark for the Gurobi disjunctive model: build (without solving)
+# every selected instance with the loop builder and with the matrix builder,
+# and report build time and peak memory. Every build runs in a fresh process
+# so the peak resident size of one build does not hide the next one.
+#
+#   python -m benchmarks.gurobiBuild taillard --min-ops 1000
+
+
+# Function to build one model in the current process; returns
+# (build seconds, peak RSS growth in MB, variables, constraints)
+def build(family, name, builder, names):
+    import gurobipy as gp
+    from disjunctions import plan_disjunctions
+    from gurobiModels import BUILDERS
+    from heuristics import compute_horizon
+    from lowerBounds import lower_bounds
+
+    jobs_data = load_family(family)[name]
+    horizon, _ = compute_horizon(jobs_data)
+    plan = plan_disjunctions(jobs_data, horizon)
+    lower_bound = lower_bounds(jobs_data).best
+    env = gp.Env(params={"OutputFlag": 0})
+    baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    start = time.time()
+    model = gp.Model("job_shop_scheduling", env=env)
+    BUILDERS[builder](model, jobs_data, plan, lower_bound, horizon, names=names)
+    model.update()
+    elapsed = time.time() - start
+
+    # ru_maxrss is in kilobytes on Linux
+    peak = (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - baseline) / 1024
+    return elapsed, peak, model.NumVars, model.NumConstrs
+
+
+def _build_in_child(args):
+    return build(*args)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the loop and matrix Gurobi model builders")
+    parser.add_argument("families", nargs="+")
+    parser.add_argument("--min-ops", type=int)
+    parser.add_argument("--max-ops", type=int)
+    parser.add_argument("--names", action="store_true", help="also name the matrix model")
+    args = parser.parse_args()
+
+    print(f"{'instance':20}{'vars':>9}{'constrs':>9}{'loop s':>9}{'matrix s':>10}{'speedup':>9}{'loop MB':>9}{'matrix MB':>11}")
+    context = multiprocessing.get_context("spawn")
+    for row in query(args.families, min_ops=args.min_ops, max_ops=args.max_ops):
+        results = {}
+        for builder, names in (("loop", True), ("matrix", args.names)):
+            with context.Pool(1) as pool:
+                results[builder] = pool.apply(_build_in_child, ((row["family"], row["name"], builder, names),))
+        loop, matrix = results["loop"], results["matrix"]
+        print(
+            f"{row['name']:20}{matrix[2]:>9}{matrix[3]:>9}{loop[0]:>9.3f}{matrix[0]:>10.3f}"
+            f"{loop[0] / max(matrix[0], 1e-9):>8.1f}x{loop[1]:>9.1f}{matrix[1]:>11.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
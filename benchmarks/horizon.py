@@ -0,0 +1,58 @@
+import argparse
+import io
+from jsspCache import load_family, query
+
+# Horizon benchmark: solve every selected instance twice, once with the sum
+# of all durations as horizon and once with the dispatching-rule upper bound,
+# and report the horizon used plus the model build and solve time saved.
+#
+#   python -m benchmarks.horizon ft la --backend ortools --time-limit 30
+
+
+# Function to solve one instance with one horizon mode and return its stats
+def run(backend, jobs_data, horizon_mode, time_limit):
+    stats = {}
+    if backend == "ortools":
+        import autoORTOOL
+        autoORTOOL.solve_jobshop(jobs_data, time_limit=time_limit, horizon_mode=horizon_mode, stats=stats)
+    else:
+        import autoGurobi
+        params = {"OutputFlag": 0}
+        if time_limit:
+            params["TimeLimit"] = time_limit
+        autoGurobi.solve_jobshop(jobs_data, io.StringIO(), params=params, horizon_mode=horizon_mode, stats=stats)
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare sum-of-durations and heuristic horizons")
+    parser.add_argument("families", nargs="+")
+    parser.add_argument("--backend", choices=("ortools", "gurobi"), default="ortools")
+    parser.add_argument("--time-limit", type=float, default=60)
+    parser.add_argument("--max-ops", type=int, help="skip instances with more operations")
+    args = parser.parse_args()
+
+    print(
+        f"{'instance':20}{'sum':>9}{'heur':>7}{'build sum':>11}{'build heur':>11}"
+        f"{'solve sum':>11}{'solve heur':>11}{'saved':>9}{'Cmax sum':>10}{'Cmax heur':>10}"
+    )
+    total_saved = 0.0
+    for row in query(args.families, max_ops=args.max_ops):
+        jobs_data = load_family(row["family"])[row["name"]]
+        plain = run(args.backend, jobs_data, "sum", args.time_limit)
+        tight = run(args.backend, jobs_data, "heuristic", args.time_limit)
+        saved = (plain["build_time"] + plain["solve_time"]) - (
+            tight["heuristic_time"] + tight["build_time"] + tight["solve_time"]
+        )
+        total_saved += saved
+        print(
+            f"{row['name']:20}{plain['horizon']:>9}{tight['horizon']:>7}"
+            f"{plain['build_time']:>11.3f}{tight['build_time']:>11.3f}"
+            f"{plain['solve_time']:>11.3f}{tight['solve_time']:>11.3f}{saved:>9.3f}"
+            f"{str(plain['makespan']):>10}{str(tight['makespan']):>10}"
+        )
+    print(f"Total time saved: {total_saved:.3f}s")
+
+
+if __name__ == "__main__":
+    main()
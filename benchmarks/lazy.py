@@ -0,0 +1,54 @@
+import argparse
+import io
+from jsspCache import load_family, query
+from lowerBounds import format_gap
+
+# Lazy disjunction benchmark for the Gurobi model: solve every selected
+# instance with all machine disjunctions added up front and with the
+# precedence-only model plus disjunctions added from the MIPSOL callback,
+# and report model size, share of pairs cut, build and solve time and gap.
+#
+#   python -m benchmarks.lazy ft la --time-limit 300
+
+
+# Function to solve one instance eagerly or lazily and return its stats
+def run(jobs_data, lazy, time_limit, known_optimum):
+    import autoGurobi
+    stats = {}
+    params = {"OutputFlag": 0}
+    if time_limit:
+        params["TimeLimit"] = time_limit
+    autoGurobi.solve_jobshop(
+        jobs_data, io.StringIO(), params=params, known_optimum=known_optimum, lazy=lazy, stats=stats,
+    )
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare eager and lazy machine disjunctions")
+    parser.add_argument("families", nargs="+")
+    parser.add_argument("--time-limit", type=float, default=300)
+    parser.add_argument("--max-ops", type=int, help="skip instances with more operations")
+    args = parser.parse_args()
+
+    print(
+        f"{'instance':20}{'pairs':>8}{'cut':>8}{'cons eager':>11}{'cons lazy':>10}"
+        f"{'build eager':>12}{'build lazy':>11}{'solve eager':>12}{'solve lazy':>11}{'gap eager':>10}{'gap lazy':>9}"
+    )
+    for row in query(args.families, max_ops=args.max_ops):
+        jobs_data = load_family(row["family"])[row["name"]]
+        known_optimum = (row["optimum_lo"], row["optimum_hi"])
+        eager = run(jobs_data, False, args.time_limit, known_optimum)
+        lazy = run(jobs_data, True, args.time_limit, known_optimum)
+        cut = lazy["lazy_cuts"] / max(lazy["num_binaries"], 1)
+        print(
+            f"{row['name']:20}{lazy['num_binaries']:>8}{cut:>8.1%}"
+            f"{eager['num_constrs']:>11}{lazy['num_constrs']:>10}"
+            f"{eager['build_time']:>12.3f}{lazy['build_time']:>11.3f}"
+            f"{eager['solve_time']:>12.3f}{lazy['solve_time']:>11.3f}"
+            f"{format_gap(eager['gap']):>10}{format_gap(lazy['gap']):>9}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+import argparse
+import collections
+from jsspCache import FAMILIES, load_family, query
+from lowerBounds import gap
+from trajectory import area_under_curve
+
+# LNS benchmark: on every selected instance, run one monolithic CP-SAT solve
+# (autoORTOOL.solve_jobshop) and the LNS driver (lnsORTOOL.solve_lns) for
+# the same number of seconds and compare the gap to best known at the end
+# and the primal integral (area under the gap curve, trajectory.py). Both
+# get the same number of workers. The known optimum is not given to either.
+#
+#   python -m benchmarks.lns taillard --min-ops 1000 --time-limit 60
+#   python -m benchmarks.lns taillard --names ta61 ta71 --time-limit 120 --workers 8
+
+def _format(value, spec):
+    return "-" if value is None else format(value, spec)
+
+
+# Function to run both solvers on one instance; returns {mode: stats}
+def run(jobs_data, time_limit, round_time, workers, seed):
+    import autoORTOOL
+    import lnsORTOOL
+
+    monolithic = {}
+    autoORTOOL.solve_jobshop(jobs_data, num_workers=workers, time_limit=time_limit, params={}, stats=monolithic)
+    lns = {}
+    lnsORTOOL.solve_lns(jobs_data, time_limit, round_time, num_workers=workers, seed=seed, stats=lns)
+    return {"monolithic": monolithic, "lns": lns}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare CP-SAT LNS with one monolithic CP-SAT solve")
+    parser.add_argument("families", nargs="+", choices=FAMILIES)
+    parser.add_argument("--names", nargs="+", help="only these instances")
+    parser.add_argument("--min-ops", type=int, help="skip instances with fewer operations")
+    parser.add_argument("--time-limit", type=float, default=60, help="seconds per solve")
+    parser.add_argument("--round-time", type=float, help="seconds per LNS round (default: lnsORTOOL's)")
+    parser.add_argument("--workers", type=int, default=1, help="CP-SAT num_workers of both solvers")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    print(f"{'instance':20}{'best known':>11}{'mono':>8}{'gap bk':>8}{'integral':>10}{'lns':>8}{'gap bk':>8}"
+          f"{'integral':>10}{'rounds':>8}")
+    totals = collections.defaultdict(list)
+    for row in query(args.families, min_ops=args.min_ops):
+        name = row["name"]
+        if args.names and name not in args.names and name.rsplit(".", 1)[0] not in args.names:
+            continue
+        results = run(load_family(row["family"])[name], args.time_limit, args.round_time, args.workers, args.seed)
+        best_known = row["optimum_hi"]
+        line = f"{row['family'] + '/' + name:20}{_format(best_known, 'd'):>11}"
+        for mode in ("monolithic", "lns"):
+            stats = results[mode]
+            gap_bk = gap(stats["makespan"], best_known) if best_known else None
+            integral = area_under_curve(stats["trajectory"], best_known, args.time_limit) if best_known else None
+            line += f"{_format(stats['makespan'], '.0f'):>8}{_format(gap_bk, '.2%'):>8}{_format(integral, '.2f'):>10}"
+            if gap_bk is not None:
+                totals[mode].append(gap_bk)
+        print(line + f"{results['lns']['rounds']:>8}")
+
+    for mode, gaps in totals.items():
+        print(f"\nmean gap to best known, {mode}: {sum(gaps) / len(gaps):.2%} over {len(gaps)} instances", end="")
+    print()
+
+
+if __name__ == "__main__":
+    main()
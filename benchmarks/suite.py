@@ -0,0 +1,261 @@
+import argparse
+import collections
+import concurrent.futures
+import csv
+import io
+import json
+import multiprocessing
+import os
+import resource
+import sys
+from batchRunner import plan_cores
+from jsspCache import FAMILIES, load_family, query
+from lowerBounds import gap
+
+# Benchmark suite: solve any selection of the jssp/ families with either
+# solver backend, the tabu search of tabuSearch.py or the genetic algorithm of
+# geneticAlgorithm.py, and score every result against the best-known values of
+# optimum/optimum.csv (lo..hi ranges included). Prints one row per instance
+# (makespan, gap to best known, proven gap, build time, solve time, time to
+# optimal, peak RSS) and a summary per family, and optionally writes the
+# rows as CSV.
+#
+# Every solve runs in a fresh process, so the peak resident size of one
+# solve is not hidden by the previous one. The known optimum is not given
+# to the solver: the suite measures what the solver proves on its own.
+#
+# A baseline is a JSON file of per-instance results, committed under
+# benchmarks/baselines/. With --check the run is compared against it and the
+# suite exits with status 1 when an instance regresses: it lost its
+# schedule, its gap to best known grew by more than --gap-tolerance, it is
+# no longer proven optimal, or its time to optimal grew past
+# baseline * --time-ratio + --time-slack seconds.
+#
+#   python -m benchmarks.suite ft la --backend ortools --time-limit 10 --csv suite.csv
+#   python -m benchmarks.suite ft la --backend ortools --time-limit 10 --save-baseline
+#   python -m benchmarks.suite ft la --backend ortools --time-limit 10 --check
+
+BASELINE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines")
+
+COLUMNS = (
+    "family", "instance", "jobs", "machines", "total_ops", "best_known_lo", "best_known_hi", "makespan", "bound",
+    "solved", "gap_to_best_known", "gap", "build_time", "solve_time", "time_to_optimal", "peak_rss_mb",
+)
+
+
+# Pool initializer: send the solver logs of the worker to /dev/null
+def _quiet_worker():
+    devnull = os.open(os.devnull, os.O_WRONLY)
+    os.dup2(devnull, 1)
+    os.close(devnull)
+
+
+# Function to solve one instance in the current process and return its row
+def run_instance(backend, row, time_limit, threads):
+    family, name = row["family"], row["name"]
+    jobs_data = load_family(family)[name]
+    stats = {}
+    if backend == "ortools":
+        import autoORTOOL
+        autoORTOOL.solve_jobshop(jobs_data, num_workers=threads, time_limit=time_limit, family=family, stats=stats)
+    elif backend == "gurobi":
+        import autoGurobi
+        autoGurobi.solve_jobshop(jobs_data, io.StringIO(), threads=threads, time_limit=time_limit, family=family,
+                                 stats=stats)
+    elif backend == "tabu":
+        # The tabu search is single-threaded and always uses its whole time
+        import tabuSearch
+        tabuSearch.tabu_search(jobs_data, time_limit, stats=stats)
+    else:
+        import geneticAlgorithm
+        geneticAlgorithm.genetic_algorithm(jobs_data, time_limit, stats=stats)
+
+    best_known = row["optimum_hi"]
+    return {
+        "family": family,
+        "instance": name,
+        "jobs": row["jobs"],
+        "machines": row["machines"],
+        "total_ops": row["total_ops"],
+        "best_known_lo": row["optimum_lo"],
+        "best_known_hi": best_known,
+        "makespan": stats["makespan"],
+        "bound": stats["best_bound"],
+        "solved": stats["time_to_optimal"] is not None,
+        "gap_to_best_known": gap(stats["makespan"], best_known) if best_known is not None else None,
+        "gap": stats["gap"],
+        "build_time": stats["heuristic_time"] + stats["build_time"],
+        "solve_time": stats["solve_time"],
+        "time_to_optimal": stats["time_to_optimal"],
+        # ru_maxrss is in kilobytes on Linux
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    }
+
+
+# Function to run the suite; yields the rows in query order as they finish
+def run_suite(backend, rows, time_limit, core_budget=1, threads_per_solve=1, verbose=False):
+    processes, threads = plan_cores(core_budget, threads_per_solve)
+    context = multiprocessing.get_context("spawn")
+    with concurrent.futures.ProcessPoolExecutor(
+        processes, mp_context=context, initializer=None if verbose else _quiet_worker, max_tasks_per_child=1,
+    ) as pool:
+        futures = [pool.submit(run_instance, backend, row, time_limit, threads) for row in rows]
+        for future in futures:
+            yield future.result()
+
+
+def _format(value, spec):
+    return "-" if value is None else format(value, spec)
+
+
+def _best_known(result):
+    low, high = result["best_known_lo"], result["best_known_hi"]
+    if high is None:
+        return "-"
+    return str(high) if low == high else f"{low}..{high}"
+
+
+def print_header():
+    print(f"{'instance':20}{'makespan':>10}{'best known':>12}{'gap bk':>8}{'gap':>8}{'build':>8}{'solve':>9}"
+          f"{'to opt':>9}{'RSS MB':>8}")
+
+
+def print_row(result):
+    print(
+        f"{result['family'] + '/' + result['instance']:20}{_format(result['makespan'], '.0f'):>10}"
+        f"{_best_known(result):>12}{_format(result['gap_to_best_known'], '.2%'):>8}{_format(result['gap'], '.2%'):>8}"
+        f"{result['build_time']:>8.2f}{result['solve_time']:>9.2f}{_format(result['time_to_optimal'], '.2f'):>9}"
+        f"{result['peak_rss_mb']:>8.0f}"
+    )
+
+
+# Function to print one summary line per family
+def print_summary(results):
+    families = collections.defaultdict(list)
+    for result in results:
+        families[result["family"]].append(result)
+
+    def mean(values):
+        values = [value for value in values if value is not None]
+        return sum(values) / len(values) if values else None
+
+    print(f"\n{'family':12}{'solved':>10}{'at best known':>15}{'mean gap bk':>13}{'mean solve':>12}{'max RSS MB':>12}")
+    for family, group in families.items():
+        at_best = sum(1 for r in group if r["gap_to_best_known"] is not None and r["gap_to_best_known"] <= 0)
+        print(
+            f"{family:12}{sum(r['solved'] for r in group):>5}/{len(group):<4}{at_best:>11}/{len(group):<3}"
+            f"{_format(mean(r['gap_to_best_known'] for r in group), '.2%'):>13}"
+            f"{mean(r['solve_time'] for r in group):>12.2f}{max(r['peak_rss_mb'] for r in group):>12.0f}"
+        )
+
+
+# Function to write the rows as CSV
+def write_csv(results, path):
+    with open(path, "w", newline="") as file:
+        writer = csv.DictWriter(file, fieldnames=COLUMNS)
+        writer.writeheader()
+        writer.writerows(results)
+
+
+def baseline_path(backend):
+    return os.path.join(BASELINE_DIR, f"{backend}.json")
+
+
+# Function to save the results as the baseline of a backend, merged into the
+# instances it already holds
+def save_baseline(backend, results, time_limit):
+    path = baseline_path(backend)
+    baseline = load_baseline(backend) or {"backend": backend, "instances": {}}
+    baseline["time_limit"] = time_limit
+    for result in results:
+        baseline["instances"][f"{result['family']}/{result['instance']}"] = {
+            "makespan": result["makespan"],
+            "gap_to_best_known": result["gap_to_best_known"],
+            "time_to_optimal": result["time_to_optimal"],
+        }
+    baseline["instances"] = dict(sorted(baseline["instances"].items()))
+    os.makedirs(BASELINE_DIR, exist_ok=True)
+    with open(path, "w") as file:
+        json.dump(baseline, file, indent=1)
+        file.write("\n")
+    return path
+
+
+def load_baseline(backend):
+    path = baseline_path(backend)
+    if not os.path.exists(path):
+        return None
+    with open(path, "r") as file:
+        return json.load(file)
+
+
+# Function to compare the results with a baseline; returns one message per
+# regression. Instances missing from the baseline are not checked.
+def regressions(results, baseline, gap_tolerance=0.005, time_ratio=1.5, time_slack=1.0):
+    found = []
+    for result in results:
+        key = f"{result['family']}/{result['instance']}"
+        base = baseline["instances"].get(key)
+        if base is None:
+            continue
+        if base["makespan"] is not None and result["makespan"] is None:
+            found.append(f"{key}: no schedule found (baseline makespan {base['makespan']:.0f})")
+            continue
+        now_gap, base_gap = result["gap_to_best_known"], base["gap_to_best_known"]
+        if now_gap is not None and base_gap is not None and now_gap > base_gap + gap_tolerance:
+            found.append(f"{key}: gap to best known {now_gap:.2%}, baseline {base_gap:.2%}")
+        now_time, base_time = result["time_to_optimal"], base["time_to_optimal"]
+        if base_time is not None:
+            if now_time is None:
+                found.append(f"{key}: no longer proven optimal (baseline {base_time:.2f}s)")
+            elif now_time > base_time * time_ratio + time_slack:
+                found.append(f"{key}: time to optimal {now_time:.2f}s, baseline {base_time:.2f}s")
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark a solver on the jssp/ families against optimum.csv")
+    parser.add_argument("families", nargs="+", choices=FAMILIES)
+    parser.add_argument("--backend", choices=["ortools", "gurobi", "tabu", "ga"], default="ortools")
+    parser.add_argument("--time-limit", type=float, default=10, help="solver time limit per instance, in seconds")
+    parser.add_argument("--min-ops", type=int, help="skip instances with fewer operations")
+    parser.add_argument("--max-ops", type=int, help="skip instances with more operations")
+    parser.add_argument("--cores", type=int, default=1, help="total core budget")
+    parser.add_argument("--threads", type=int, default=1, help="solver threads per instance")
+    parser.add_argument("--csv", help="write the per-instance rows to this CSV file")
+    parser.add_argument("--save-baseline", action="store_true", help="store the results as the backend baseline")
+    parser.add_argument("--check", action="store_true", help="fail on regressions against the backend baseline")
+    parser.add_argument("--gap-tolerance", type=float, default=0.005, help="allowed growth of the gap to best known")
+    parser.add_argument("--time-ratio", type=float, default=1.5, help="allowed ratio on the time to optimal")
+    parser.add_argument("--time-slack", type=float, default=1.0, help="allowed extra seconds on the time to optimal")
+    parser.add_argument("--verbose", action="store_true", help="keep the solver logs")
+    args = parser.parse_args()
+
+    rows = query(args.families, min_ops=args.min_ops, max_ops=args.max_ops)
+    print_header()
+    results = []
+    for result in run_suite(args.backend, rows, args.time_limit, args.cores, args.threads, args.verbose):
+        print_row(result)
+        results.append(result)
+    print_summary(results)
+
+    if args.csv:
+        write_csv(results, args.csv)
+    if args.check:
+        baseline = load_baseline(args.backend)
+        if baseline is None:
+            sys.exit(f"no baseline at {baseline_path(args.backend)}")
+        if baseline.get("time_limit") != args.time_limit:
+            print(f"\nwarning: baseline was run with a {baseline.get('time_limit')}s time limit")
+        found = regressions(results, baseline, args.gap_tolerance, args.time_ratio, args.time_slack)
+        print(f"\n{len(found)} regressions against {baseline_path(args.backend)}")
+        for message in found:
+            print(f"  {message}")
+        if found:
+            sys.exit(1)
+    if args.save_baseline:
+        print(f"\nbaseline saved to {save_baseline(args.backend, results, args.time_limit)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+import argparse
+import io
+import statistics
+from jsspCache import load_family, query
+
+# Warm-start benchmark: solve every selected instance cold and warm-started
+# from the dispatching-rule schedule, and compare time to first incumbent and
+# time to optimal.
+#
+#   python -m benchmarks.warmstart ft la --backend gurobi --time-limit 60
+
+
+# Function to solve one instance and return its stats
+def run(backend, jobs_data, warm_start, time_limit):
+    stats = {}
+    if backend == "ortools":
+        import autoORTOOL
+        autoORTOOL.solve_jobshop(jobs_data, time_limit=time_limit, warm_start=warm_start, stats=stats)
+    else:
+        import autoGurobi
+        params = {"OutputFlag": 0}
+        if time_limit:
+            params["TimeLimit"] = time_limit
+        autoGurobi.solve_jobshop(jobs_data, io.StringIO(), params=params, warm_start=warm_start, stats=stats)
+    return stats
+
+
+def _fmt(value):
+    return "-" if value is None else f"{value:.3f}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare cold and warm-started solves")
+    parser.add_argument("families", nargs="+")
+    parser.add_argument("--backend", choices=("ortools", "gurobi"), default="ortools")
+    parser.add_argument("--time-limit", type=float, default=60)
+    parser.add_argument("--max-ops", type=int, help="skip instances with more operations")
+    args = parser.parse_args()
+
+    print(
+        f"{'instance':20}{'first cold':>11}{'first warm':>11}{'opt cold':>10}{'opt warm':>10}"
+        f"{'Cmax cold':>11}{'Cmax warm':>11}"
+    )
+    first_saved = []
+    optimal_saved = []
+    for row in query(args.families, max_ops=args.max_ops):
+        jobs_data = load_family(row["family"])[row["name"]]
+        cold = run(args.backend, jobs_data, False, args.time_limit)
+        warm = run(args.backend, jobs_data, True, args.time_limit)
+        # The warm start pays for its heuristic, so count it in
+        warm_first = warm["first_incumbent_time"]
+        if warm_first is not None:
+            warm_first += warm["heuristic_time"]
+        warm_optimal = warm["time_to_optimal"]
+        if warm_optimal is not None:
+            warm_optimal += warm["heuristic_time"]
+        print(
+            f"{row['name']:20}{_fmt(cold['first_incumbent_time']):>11}{_fmt(warm_first):>11}"
+            f"{_fmt(cold['time_to_optimal']):>10}{_fmt(warm_optimal):>10}"
+            f"{str(cold['makespan']):>11}{str(warm['makespan']):>11}"
+        )
+        if cold["first_incumbent_time"] is not None and warm_first is not None:
+            first_saved.append(cold["first_incumbent_time"] - warm_first)
+        if cold["time_to_optimal"] is not None and warm_optimal is not None:
+            optimal_saved.append(cold["time_to_optimal"] - warm_optimal)
+
+    if first_saved:
+        print(f"Median time to first incumbent saved: {statistics.median(first_saved):.3f}s over {len(first_saved)} instances")
+    if optimal_saved:
+        print(f"Median time to optimal saved: {statistics.median(optimal_saved):.3f}s over {len(optimal_saved)} instances")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+import argparse
+import os
+from jsspCache import FAMILIES, load_family
+from profiles import SEARCHES, SIZE_CLASSES, par2, print_profiles, sweep
+
+# CP-SAT parameter tuner.
+#
+# For one family and size class, runs the seeded sweep of profiles.py over
+# SEARCH_SPACE and saves the winner to profiles/cpsat.json, where
+# autoORTOOL.solve_jobshop picks it up.
+#
+#   python cpsatTuning.py tune taillard --size small --configs 16 --train 5 --time-limit 30
+#   python cpsatTuning.py show
+
+SEARCH_SPACE = {
+    "num_workers": sorted({1, 2, 4, 8} & set(range(1, (os.cpu_count() or 1) + 1))),
+    "linearization_level": [0, 1, 2],
+    "search_branching": ["AUTOMATIC_SEARCH", "FIXED_SEARCH", "PORTFOLIO_SEARCH", "LP_SEARCH", "PSEUDO_COST_SEARCH"],
+    "symmetry_level": [0, 1, 2, 3],
+    "optimize_with_core": [False, True],
+    "use_objective_lb_search": [False, True],
+    "use_dynamic_precedence_in_disjunctive": [False, True],
+}
+
+
+# Function to score one parameter set on the training instances: the PAR2
+# time of every instance
+def evaluate(config, family, names, time_limit):
+    import autoORTOOL
+
+    # The known optimum is left out: it only adds the gap to best known to
+    # the report, and the score comes from what every solve proves itself
+    instances = load_family(family)
+    scores = []
+    for name in names:
+        stats = {}
+        autoORTOOL.solve_jobshop(instances[name], time_limit=time_limit, params=config, stats=stats)
+        scores.append(par2(stats["time_to_optimal"], time_limit))
+    return scores
+
+
+# Function to tune one family and size class and save the winner
+def tune(family, size, strategy="halving", configs=16, train=5, time_limit=30, seed=0, log=print):
+    def family_evaluate(config, names, budget):
+        return evaluate(config, family, names, budget)
+
+    return sweep("cpsat", SEARCH_SPACE, family_evaluate, family, size, strategy, configs, train, time_limit,
+                 seed, log)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Tune CP-SAT parameters per instance family")
+    commands = parser.add_subparsers(dest="command", required=True)
+    tune_parser = commands.add_parser("tune", help="tune and save profiles")
+    tune_parser.add_argument("families", nargs="+", choices=FAMILIES)
+    tune_parser.add_argument("--size", choices=[name for name, _ in SIZE_CLASSES],
+                             help="size class to tune (default: every class of the family)")
+    tune_parser.add_argument("--strategy", choices=sorted(SEARCHES), default="halving")
+    tune_parser.add_argument("--configs", type=int, default=16, help="parameter sets to try")
+    tune_parser.add_argument("--train", type=int, default=5, help="training instances per size class")
+    tune_parser.add_argument("--time-limit", type=float, default=30, help="full time limit per solve")
+    tune_parser.add_argument("--seed", type=int, default=0)
+    commands.add_parser("show", help="print the saved profiles")
+    args = parser.parse_args()
+
+    if args.command == "show":
+        print_profiles("cpsat")
+    else:
+        sizes = [args.size] if args.size else [name for name, _ in SIZE_CLASSES]
+        for family in args.families:
+            for size in sizes:
+                tune(family, size, args.strategy, args.configs, args.train, args.time_limit, args.seed)
@@ -0,0 +1,104 @@
+import collections
+import numpy as np
+from jsspInstance import from_jobs_data
+from lowerBounds import heads_and_tails
+
+# Preprocessing of the machine disjunctions of the Manne (big-M) model.
+#
+# With an upper bound UB on the makespan, every operation k must start in
+# [head_k, UB - tail_k - p_k]. For a pair (i, j) on the same machine that gives:
+#   * a big-M per constraint instead of the global horizon: when j runs first,
+#     end_i - start_j is at most (UB - tail_i) - head_j, so that is enough for
+#     "end_i <= start_j + M (1 - b)", and symmetrically for the other side;
+#   * pairs whose windows cannot overlap (UB - tail_i <= head_j): the order is
+#     implied by the variable bounds and the pair is dropped;
+#   * pairs where one order does not fit in the windows (head_j + p_j > latest
+#     start of i): the other order is forced and becomes a plain precedence
+#     constraint without a binary.
+# Operations are numbered job * ops_per_job + task.
+
+DisjunctionPlan = collections.namedtuple(
+    "DisjunctionPlan",
+    "pairs big_m fixed dropped earliest_start latest_start",
+)
+
+
+# Function to plan the disjunctions of an instance for a makespan upper bound.
+#   pairs     -- [P, 2] operation pairs that still need a binary
+#   big_m     -- [P, 2] M of "first before second" and "second before first"
+#   fixed     -- [F, 2] pairs whose first operation must precede the second
+#   dropped   -- number of pairs implied by the time windows
+def plan_disjunctions(jobs_data, upper_bound):
+    instance = from_jobs_data(jobs_data)
+    heads, tails = heads_and_tails(instance)
+    durations = instance.durations.astype(np.int64).ravel()
+    heads = heads.ravel()
+    tails = tails.ravel()
+    earliest_start = heads
+    latest_start = upper_bound - tails - durations
+    latest_end = upper_bound - tails
+
+    flat_machines = instance.machines.ravel()
+    order = np.argsort(flat_machines, kind="stable")
+    splits = np.cumsum(np.bincount(flat_machines, minlength=instance.num_machines))[:-1]
+
+    pairs, big_m, fixed = [], [], []
+    dropped = 0
+    for ops in np.split(order, splits):
+        first_idx, second_idx = np.triu_indices(len(ops), k=1)
+        first = ops[first_idx]
+        second = ops[second_idx]
+
+        # Windows that cannot overlap: the order is already implied
+        apart_first = latest_end[first] <= earliest_start[second]
+        apart_second = latest_end[second] <= earliest_start[first]
+        apart = apart_first | apart_second
+        dropped += int(apart.sum())
+
+        # Orders that do not fit in the windows
+        first_can_go_first = earliest_start[first] + durations[first] <= latest_start[second]
+        second_can_go_first = earliest_start[second] + durations[second] <= latest_start[first]
+        only_first = ~apart & first_can_go_first & ~second_can_go_first
+        only_second = ~apart & second_can_go_first & ~first_can_go_first
+        fixed.append(np.stack([first[only_first], second[only_first]], axis=1))
+        fixed.append(np.stack([second[only_second], first[only_second]], axis=1))
+
+        free = ~apart & ~only_first & ~only_second
+        pairs.append(np.stack([first[free], second[free]], axis=1))
+        big_m.append(np.stack([
+            latest_end[first[free]] - earliest_start[second[free]],
+            latest_end[second[free]] - earliest_start[first[free]],
+        ], axis=1))
+
+    empty = np.zeros((0, 2), dtype=np.int64)
+    return DisjunctionPlan(
+        np.concatenate(pairs) if pairs else empty,
+        np.concatenate(big_m) if big_m else empty,
+        np.concatenate(fixed) if fixed else empty,
+        dropped,
+        earliest_start,
+        latest_start,
+    )
+
+
+# Function to plan the disjunctions without any preprocessing: every pair
+# keeps a binary and the global horizon as big-M (the original model)
+def all_disjunctions(jobs_data, horizon):
+    instance = from_jobs_data(jobs_data)
+    flat_machines = instance.machines.ravel()
+    order = np.argsort(flat_machines, kind="stable")
+    splits = np.cumsum(np.bincount(flat_machines, minlength=instance.num_machines))[:-1]
+    pairs = []
+    for ops in np.split(order, splits):
+        first_idx, second_idx = np.triu_indices(len(ops), k=1)
+        pairs.append(np.stack([ops[first_idx], ops[second_idx]], axis=1))
+    pairs = np.concatenate(pairs) if pairs else np.zeros((0, 2), dtype=np.int64)
+    total_ops = instance.total_ops
+    return DisjunctionPlan(
+        pairs,
+        np.full(pairs.shape, horizon, dtype=np.int64),
+        np.zeros((0, 2), dtype=np.int64),
+        0,
+        np.zeros(total_ops, dtype=np.int64),
+        np.full(total_ops, horizon, dtype=np.int64) - instance.durations.ravel(),
+    )
@@ -0,0 +1,327 @@
+import heapq
+import numpy as np
+from jsspInstance import from_jobs_data
+
+# Array-backed disjunctive graph of a job-shop schedule, for local search.
+#
+# Operations are numbered job * ops_per_job + task. The graph keeps, as flat
+# Python lists (they index faster than NumPy arrays one element at a time):
+#   job_pred / job_succ          -- the job arcs, -1 at the ends of a job
+#   sequences                    -- the order of the operations on every machine
+#   machine_pred / machine_succ  -- the same orders as arcs, with position
+#   heads                        -- longest path from the source to the start
+#   tails                        -- longest path from the end to the sink
+# so the semi-active schedule starts every operation at its head and the
+# makespan is the longest head + duration + tail.
+#
+# A move rearranges one segment of a machine order, given as (machine,
+# first, last, forward): forward puts the operation at position first right
+# after the one at position last, backward the one at last right before
+# first. A swap of two adjacent operations is a forward move with
+# last = first + 1, and the backward move over the same positions undoes a
+# forward one. estimate() scores a move without applying it, from the heads
+# and tails of the moved segment.
+#
+# apply() changes the orders and updates only what the move affects. The
+# graph keeps a topological rank of every operation; the new machine arcs
+# of a move reorder only the operations between their ends (Pearce and
+# Kelly), and finding a path back from the head of a new arc to its tail is
+# how a cycle shows up, in which case the move is undone. Heads are then
+# recomputed from the moved segment forward and tails from it backward, in
+# rank order from a heap, and propagation stops at every operation whose
+# head (tail) did not change.
+#
+#   graph = DisjunctiveGraph(jobs_data, schedule.starts)
+#   graph.estimate(move), graph.apply(move), graph.critical_blocks()
+
+
+class DisjunctiveGraph:
+    def __init__(self, jobs_data, starts):
+        instance = from_jobs_data(jobs_data)
+        self.instance = instance
+        self.num_ops = instance.num_ops
+        self.total = instance.total_ops
+        self.durations = instance.durations.ravel().tolist()
+        self.machine_of = instance.machines.ravel().tolist()
+        task = np.arange(self.total) % self.num_ops
+        self.job_pred = np.where(task > 0, np.arange(self.total) - 1, -1).tolist()
+        self.job_succ = np.where(task < self.num_ops - 1, np.arange(self.total) + 1, -1).tolist()
+        self.job_last = (np.arange(instance.num_jobs) * self.num_ops + self.num_ops - 1).tolist()
+
+        # Machine orders of the given schedule
+        flat_starts = np.asarray(starts, dtype=np.int64).ravel()
+        order = np.lexsort((flat_starts, instance.machines.ravel()))
+        counts = np.bincount(instance.machines.ravel(), minlength=instance.num_machines)
+        self.sequences = [part.tolist() for part in np.split(order, np.cumsum(counts)[:-1])]
+        self.machine_pred = [-1] * self.total
+        self.machine_succ = [-1] * self.total
+        self.position = [0] * self.total
+        for machine in range(len(self.sequences)):
+            self._link(machine, 0, len(self.sequences[machine]))
+
+        # Scratch lists of the incremental updates: a stamp marks the
+        # operations of the current affected subgraph
+        self._stamp = 0
+        self._mark = [0] * self.total
+        self._indegree = [0] * self.total
+        self.evaluate()
+
+    # Function to refresh the machine links of positions [first, last) of a
+    # machine order
+    def _link(self, machine, first, last):
+        sequence = self.sequences[machine]
+        for index in range(max(0, first - 1), min(len(sequence), last + 1)):
+            op = sequence[index]
+            self.position[op] = index
+            self.machine_pred[op] = sequence[index - 1] if index else -1
+            self.machine_succ[op] = sequence[index + 1] if index + 1 < len(sequence) else -1
+
+    # Function to compute all heads, tails and the makespan with one
+    # topological pass (None when the machine orders contain a cycle)
+    def evaluate(self):
+        durations, job_succ, machine_succ = self.durations, self.job_succ, self.machine_succ
+        indegree = [(pred >= 0) + (mpred >= 0) for pred, mpred in zip(self.job_pred, self.machine_pred)]
+        heads = [0] * self.total
+        stack = [op for op in range(self.total) if not indegree[op]]
+        order = []
+        while stack:
+            op = stack.pop()
+            order.append(op)
+            end = heads[op] + durations[op]
+            for succ in (job_succ[op], machine_succ[op]):
+                if succ >= 0:
+                    if heads[succ] < end:
+                        heads[succ] = end
+                    indegree[succ] -= 1
+                    if not indegree[succ]:
+                        stack.append(succ)
+        if len(order) < self.total:
+            return None
+        tails = [0] * self.total
+        for op in reversed(order):
+            tail = 0
+            for succ in (job_succ[op], machine_succ[op]):
+                if succ >= 0 and tails[succ] + durations[succ] > tail:
+                    tail = tails[succ] + durations[succ]
+            tails[op] = tail
+        self.heads, self.tails = heads, tails
+        self.rank = [0] * self.total
+        for index, op in enumerate(order):
+            self.rank[op] = index
+        self.makespan = max(heads[op] + durations[op] for op in self.job_last)
+        return self.makespan
+
+    # Function to restore the topological ranks after the arc before ->
+    # after is added with rank[before] > rank[after] (Pearce and Kelly): the
+    # operations reachable from after and the ones that reach before, within
+    # that rank window, are given the window's ranks with the second group
+    # first. Returns False when the arc closes a cycle.
+    def _reorder(self, before, after):
+        rank, mark = self.rank, self._mark
+        lower, upper = rank[after], rank[before]
+        self._stamp += 2
+        forward_stamp, backward_stamp = self._stamp - 1, self._stamp
+
+        forward = []
+        stack = [after]
+        mark[after] = forward_stamp
+        while stack:
+            op = stack.pop()
+            forward.append(op)
+            for succ in (self.job_succ[op], self.machine_succ[op]):
+                if succ == before:
+                    return False
+                if succ >= 0 and rank[succ] < upper and mark[succ] != forward_stamp:
+                    mark[succ] = forward_stamp
+                    stack.append(succ)
+
+        backward = []
+        stack = [before]
+        mark[before] = backward_stamp
+        while stack:
+            op = stack.pop()
+            backward.append(op)
+            for pred in (self.job_pred[op], self.machine_pred[op]):
+                if pred >= 0 and rank[pred] > lower and mark[pred] != backward_stamp:
+                    mark[pred] = backward_stamp
+                    stack.append(pred)
+
+        backward.sort(key=rank.__getitem__)
+        forward.sort(key=rank.__getitem__)
+        moved = backward + forward
+        for op, new_rank in zip(moved, sorted(rank[op] for op in moved)):
+            rank[op] = new_rank
+        return True
+
+    # Function to make the ranks topological again around positions
+    # [first, last] of a machine order after it changed; returns False on a
+    # cycle
+    def _rerank(self, machine, first, last):
+        sequence, rank = self.sequences[machine], self.rank
+        for index in range(max(0, first - 1), min(len(sequence) - 1, last + 1)):
+            before, after = sequence[index], sequence[index + 1]
+            if rank[before] > rank[after] and not self._reorder(before, after):
+                return False
+        return True
+
+    # Function to recompute the heads (forward=True) or tails of sources and
+    # of whatever they reach, in rank order, stopping wherever a value does
+    # not change; returns the number of operations recomputed
+    def _update(self, sources, forward=True):
+        self._stamp += 1
+        stamp, mark, rank, durations = self._stamp, self._mark, self.rank, self.durations
+        if forward:
+            first_next, second_next = self.job_succ, self.machine_succ
+            first_prev, second_prev = self.job_pred, self.machine_pred
+            values, sign = self.heads, 1
+        else:
+            first_next, second_next = self.job_pred, self.machine_pred
+            first_prev, second_prev = self.job_succ, self.machine_succ
+            values, sign = self.tails, -1
+
+        queue = []
+        for op in sources:
+            if op >= 0 and mark[op] != stamp:
+                mark[op] = stamp
+                queue.append((sign * rank[op], op))
+        heapq.heapify(queue)
+        done = 0
+        while queue:
+            _, op = heapq.heappop(queue)
+            done += 1
+            value = 0
+            pred = first_prev[op]
+            if pred >= 0:
+                value = values[pred] + durations[pred]
+            pred = second_prev[op]
+            if pred >= 0 and values[pred] + durations[pred] > value:
+                value = values[pred] + durations[pred]
+            if value == values[op]:
+                continue
+            values[op] = value
+            succ = first_next[op]
+            if succ >= 0 and mark[succ] != stamp:
+                mark[succ] = stamp
+                heapq.heappush(queue, (sign * rank[succ], succ))
+            succ = second_next[op]
+            if succ >= 0 and mark[succ] != stamp:
+                mark[succ] = stamp
+                heapq.heappush(queue, (sign * rank[succ], succ))
+        return done
+
+    # Function to return the new order of the segment a move rearranges
+    def segment(self, move):
+        machine, first, last, forward = move
+        segment = self.sequences[machine][first:last + 1]
+        if forward:
+            return segment[1:] + segment[:1]
+        return segment[-1:] + segment[:-1]
+
+    # Function to apply a move and update heads, tails and the makespan;
+    # returns the new makespan, or None (and the move undone) when it made a
+    # cycle
+    def apply(self, move):
+        machine, first, last, _ = move
+        sequence = self.sequences[machine]
+        old = sequence[first:last + 1]
+        new = self.segment(move)
+        sequence[first:last + 1] = new
+        self._link(machine, first, last + 1)
+        if not self._rerank(machine, first, last):
+            sequence[first:last + 1] = old
+            self._link(machine, first, last + 1)
+            self._rerank(machine, first, last)
+            return None
+        self.affected = (self._update(new + [self.machine_succ[new[-1]]], forward=True)
+                         + self._update(new + [self.machine_pred[new[0]]], forward=False))
+        durations, heads = self.durations, self.heads
+        self.makespan = max(heads[op] + durations[op] for op in self.job_last)
+        return self.makespan
+
+    # Function to estimate the makespan after a move: the longest path
+    # through the moved segment, with the heads of its job predecessors and
+    # the tails of its job successors as they are now
+    def estimate(self, move):
+        machine, first, last, _ = move
+        sequence = self.sequences[machine]
+        new_order = self.segment(move)
+        heads, tails, durations = self.heads, self.tails, self.durations
+        job_pred, job_succ = self.job_pred, self.job_succ
+
+        pred = self.machine_pred[sequence[first]]
+        time_ = heads[pred] + durations[pred] if pred >= 0 else 0
+        new_heads = []
+        for op in new_order:
+            pred = job_pred[op]
+            if pred >= 0 and heads[pred] + durations[pred] > time_:
+                time_ = heads[pred] + durations[pred]
+            new_heads.append(time_)
+            time_ += durations[op]
+
+        succ = self.machine_succ[sequence[last]]
+        tail = tails[succ] + durations[succ] if succ >= 0 else 0
+        longest = 0
+        for index in range(len(new_order) - 1, -1, -1):
+            op = new_order[index]
+            succ = job_succ[op]
+            if succ >= 0 and tails[succ] + durations[succ] > tail:
+                tail = tails[succ] + durations[succ]
+            length = new_heads[index] + durations[op] + tail
+            if length > longest:
+                longest = length
+            tail += durations[op]
+        return longest
+
+    # Function to list the precedences (before, after) a move creates
+    def created(self, move):
+        machine, first, last, forward = move
+        sequence = self.sequences[machine]
+        if forward:
+            moved = sequence[first]
+            return [(op, moved) for op in sequence[first + 1:last + 1]]
+        moved = sequence[last]
+        return [(moved, op) for op in sequence[first:last]]
+
+    # Function to return one critical path, from the last operation of a
+    # job that ends at the makespan back through predecessors that end
+    # exactly when the operation starts
+    def critical_path(self):
+        heads, durations = self.heads, self.durations
+        job_pred, machine_pred = self.job_pred, self.machine_pred
+        op = next(op for op in self.job_last if heads[op] + durations[op] == self.makespan)
+        path = [op]
+        while heads[op]:
+            start = heads[op]
+            pred = machine_pred[op]
+            if pred < 0 or heads[pred] + durations[pred] != start:
+                pred = job_pred[op]
+            path.append(pred)
+            op = pred
+        path.reverse()
+        return path
+
+    # Function to cut a critical path into blocks: runs of consecutive
+    # operations on the same machine
+    def critical_blocks(self):
+        path = self.critical_path()
+        machine_of = self.machine_of
+        blocks = [[path[0]]]
+        for previous, op in zip(path, path[1:]):
+            if machine_of[op] == machine_of[previous] and self.machine_pred[op] == previous:
+                blocks[-1].append(op)
+            else:
+                blocks.append([op])
+        return blocks
+
+    # Start times of the semi-active schedule as a [jobs, ops] array
+    def starts(self):
+        return np.array(self.heads, dtype=np.int64).reshape(self.instance.machines.shape)
+
+    def snapshot(self):
+        return [list(sequence) for sequence in self.sequences]
+
+    def restore(self, sequences):
+        self.sequences = [list(sequence) for sequence in sequences]
+        for machine in range(len(self.sequences)):
+            self._link(machine, 0, len(self.sequences[machine]))
+        self.evaluate()
@@ -0,0 +1,127 @@
+import argparse
+import math
+import time
+import numpy as np
+import gurobipy as gp
+from gurobipy import GRB
+from gurobiModels import build_flexible_model, flexible_options, set_flexible_start
+from heuristics import best_flexible_dispatch
+from jsspInstance import load_flexible_instance
+from lowerBounds import flexible_lower_bounds, format_gap, gap
+from schedule import FlexibleSchedule
+
+# Gurobi MIP for the flexible job-shop problem (.fjs files).
+#
+# The model of gurobiModels.build_flexible_model has one start time per
+# operation and one assignment binary per machine option; the processing
+# time of an operation is the assignment-weighted sum of its option times,
+# so there are no per-option start and end variables. Order binaries exist
+# only for operation pairs of different jobs that share a machine, and their
+# big-M rows only bind when both operations are on that machine. The best
+# flexible dispatching rule gives the horizon (and the warm start), and the
+# head/tail windows give every start its bounds and every pair its own M.
+#
+#   python flexGurobi.py FlexibleJssp/mk01.fjs --time-limit 60
+#   python flexGurobi.py jssp/car/car1.fjs --warm-start --threads 4
+
+# Flexible job-shop solver function
+#   time_limit  -- Gurobi TimeLimit in seconds (None = no limit)
+#   warm_start  -- start from the best dispatching-rule schedule
+#   hint        -- (starts, options) of a schedule to start from instead
+#   params      -- Gurobi parameters as {name: value}
+#   stats       -- optional dict that receives timings and the result, with
+#                  the model size and the FlexibleSchedule
+def solve_fjsp(instance, threads=None, time_limit=None, warm_start=False, hint=None, params=None, stats=None,
+               names=False):
+    inicio = time.time()
+    heuristic = best_flexible_dispatch(instance)
+    horizon = heuristic.makespan
+    bounds = flexible_lower_bounds(instance)
+    lower_bound = min(bounds.best, horizon)
+    heuristic_time = time.time() - inicio
+
+    model = gp.Model("flexible_job_shop_scheduling")
+    flexible_model = build_flexible_model(model, instance, lower_bound, horizon, names=names)
+    for name, value in (params or {}).items():
+        model.setParam(name, value)
+    if threads:
+        model.setParam("Threads", threads)
+    if time_limit:
+        model.setParam("TimeLimit", time_limit)
+    if hint is not None:
+        set_flexible_start(flexible_model, instance, *hint)
+    elif warm_start:
+        set_flexible_start(flexible_model, instance, heuristic.starts, heuristic.options)
+    build_time = time.time() - inicio - heuristic_time
+
+    model.optimize()
+
+    output = ""
+    schedule = None
+    makespan = None
+    final_bound = lower_bound
+    if model.SolCount:
+        schedule = FlexibleSchedule(instance, np.rint(flexible_model.start.X).astype(np.int64),
+                                    flexible_options(flexible_model, instance))
+        makespan = flexible_model.makespan.X[0]
+        final_bound = max(lower_bound, math.ceil(model.ObjBound - 1e-6))
+        output += "Solution:\n"
+        output += schedule.text()
+        if model.status == GRB.OPTIMAL:
+            output += f"Optimal Schedule Length: {makespan}\n"
+        else:
+            output += f"Best Schedule Length: {makespan} (bound {model.ObjBound})\n"
+    else:
+        output += "No solution found.\n"
+
+    num_binaries = flexible_model.assign.shape[0] + flexible_model.order.shape[0]
+    output += "\nStatistics\n"
+    output += f"  - operations: {instance.total_ops}, machine options: {instance.num_options}\n"
+    output += f"  - variables: {model.NumVars}, constraints: {model.NumConstrs}\n"
+    output += (f"  - binaries: {num_binaries} ({flexible_model.assign.shape[0]} assignment, "
+               f"{flexible_model.order.shape[0]} order)\n")
+    output += f"  - nodes: {int(model.NodeCount)}\n"
+    output += f"  - solver time: {model.Runtime}s\n"
+    output += f"  - horizon: {horizon} ({heuristic.rule} dispatching rule)\n"
+    output += f"  - model build time: {build_time}s\n"
+    output += f"  - lower bound: {final_bound} (job {bounds.job}, machine {bounds.machine})\n"
+    output += f"  - gap: {format_gap(gap(makespan, final_bound))}\n"
+    if hint is not None:
+        output += "  - warm start: given schedule\n"
+    elif warm_start:
+        output += f"  - warm start: {heuristic.rule} dispatching rule, makespan {heuristic.makespan}\n"
+    output += f"  - time taken to solve the problem: {time.time() - inicio}s\n"
+
+    if stats is not None:
+        stats.update(
+            horizon=horizon,
+            heuristic_time=heuristic_time,
+            build_time=build_time,
+            solve_time=model.Runtime,
+            status=model.status,
+            makespan=makespan,
+            best_bound=final_bound,
+            lower_bound=lower_bound,
+            gap=gap(makespan, final_bound),
+            time_to_optimal=model.Runtime if model.status == GRB.OPTIMAL else None,
+            num_vars=model.NumVars,
+            num_constrs=model.NumConstrs,
+            num_binaries=num_binaries,
+            conflicts=None,
+            branches=int(model.NodeCount),
+            schedule=schedule,
+        )
+    return output
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Solve flexible job-shop (.fjs) instances with Gurobi")
+    parser.add_argument("files", nargs="+", help=".fjs instance files")
+    parser.add_argument("--time-limit", type=float, help="solver time budget per instance, in seconds")
+    parser.add_argument("--threads", type=int, help="Gurobi Threads")
+    parser.add_argument("--warm-start", action="store_true", help="start from the best dispatching-rule schedule")
+    args = parser.parse_args()
+
+    for file_path in args.files:
+        print(f"Results for {file_path}:")
+        print(solve_fjsp(load_flexible_instance(file_path), args.threads, args.time_limit, args.warm_start))
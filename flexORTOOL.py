@@ -0,0 +1,192 @@
+import argparse
+import collections
+import time
+import numpy as np
+from ortools.sat.python import cp_model
+from autoORTOOL import set_parameters
+from heuristics import best_flexible_dispatch
+from jsspInstance import load_flexible_instance
+from lowerBounds import flexible_heads_and_tails, flexible_lower_bounds, format_gap, gap
+from schedule import FlexibleSchedule
+
+# CP-SAT solver for the flexible job-shop problem (.fjs files).
+#
+# Every operation has one start and one end variable. Each of its machine
+# options is an optional interval over that start and end with the option's
+# processing time, present exactly when the option's literal is true, and
+# exactly one literal per operation is true. Each machine gets one
+# add_no_overlap over the optional intervals of the options that use it, so
+# there are no big-M disjunctions. Single-option operations get a plain
+# interval. The best flexible dispatching rule gives the horizon and,
+# optionally, the hint; variable domains are cut by the job heads and tails.
+#
+#   python flexORTOOL.py FlexibleJssp/mk01.fjs --time-limit 30
+#   python flexORTOOL.py jssp/car/car1.fjs --warm-start --workers 8
+
+FlexibleModel = collections.namedtuple("FlexibleModel", "model start end presence makespan")
+
+
+# Function to build the CP-SAT model of a flexible instance. presence[k] is
+# the literal of option k, or None for the only option of an operation.
+def build_flexible_model(instance, horizon, lower_bound):
+    model = cp_model.CpModel()
+    min_durations = instance.min_durations
+    # Shortest work before (head) and after (tail) every operation in its job
+    heads, tails = (values.tolist() for values in flexible_heads_and_tails(instance))
+
+    durations = instance.option_durations.tolist()
+    machines = instance.option_machines.tolist()
+    offsets = instance.option_offsets.tolist()
+    start, end, presence = [], [], [None] * instance.num_options
+    machine_intervals = collections.defaultdict(list)
+    for op in range(instance.total_ops):
+        suffix = f"_{instance.op_job[op]}_{instance.op_task[op]}"
+        start_var = model.new_int_var(heads[op], horizon - tails[op] - int(min_durations[op]), "start" + suffix)
+        end_var = model.new_int_var(heads[op] + int(min_durations[op]), horizon - tails[op], "end" + suffix)
+        start.append(start_var)
+        end.append(end_var)
+        first, last = offsets[op], offsets[op + 1]
+        if last - first == 1:
+            machine_intervals[machines[first]].append(
+                model.new_interval_var(start_var, durations[first], end_var, "interval" + suffix)
+            )
+            continue
+        literals = []
+        for k in range(first, last):
+            literal = model.new_bool_var(f"on_m{machines[k]}{suffix}")
+            machine_intervals[machines[k]].append(
+                model.new_optional_interval_var(start_var, durations[k], end_var, literal,
+                                                f"interval_m{machines[k]}{suffix}")
+            )
+            presence[k] = literal
+            literals.append(literal)
+        model.add_exactly_one(literals)
+
+    for intervals in machine_intervals.values():
+        model.add_no_overlap(intervals)
+
+    # Precedences inside a job
+    for op in range(instance.total_ops - 1):
+        if instance.op_job[op] == instance.op_job[op + 1]:
+            model.add(start[op + 1] >= end[op])
+
+    makespan = model.new_int_var(lower_bound, horizon, "makespan")
+    model.add_max_equality(makespan, [end[op - 1] for op in instance.job_offsets[1:].tolist()])
+    model.minimize(makespan)
+    return FlexibleModel(model, start, end, presence, makespan)
+
+
+# Function to hint a complete schedule: start times and chosen options
+def add_flexible_hint(flexible_model, instance, starts, options):
+    model = flexible_model.model
+    chosen = set(np.asarray(options).tolist())
+    ends = np.asarray(starts) + instance.option_durations[np.asarray(options)]
+    for op in range(instance.total_ops):
+        model.add_hint(flexible_model.start[op], int(starts[op]))
+        model.add_hint(flexible_model.end[op], int(ends[op]))
+    for k, literal in enumerate(flexible_model.presence):
+        if literal is not None:
+            model.add_hint(literal, k in chosen)
+    model.add_hint(flexible_model.makespan, int(ends.max()))
+
+
+# Flexible job-shop solver function
+#   time_limit  -- max solver seconds (None = no limit)
+#   warm_start  -- hint the solver with the best dispatching-rule schedule
+#   hint        -- (starts, options) of a schedule to hint instead, starts and
+#                  chosen option indices per operation
+#   params      -- CP-SAT parameters as {name: value}
+#   stats       -- optional dict that receives timings and the result, with
+#                  the FlexibleSchedule
+def solve_fjsp(instance, num_workers=None, time_limit=None, warm_start=False, hint=None, params=None,
+               stats=None):
+    inicio = time.time()
+    heuristic = best_flexible_dispatch(instance)
+    horizon = heuristic.makespan
+    bounds = flexible_lower_bounds(instance)
+    lower_bound = min(bounds.best, horizon)
+    heuristic_time = time.time() - inicio
+
+    flexible_model = build_flexible_model(instance, horizon, lower_bound)
+    if hint is not None:
+        add_flexible_hint(flexible_model, instance, *hint)
+    elif warm_start:
+        add_flexible_hint(flexible_model, instance, heuristic.starts, heuristic.options)
+    build_time = time.time() - inicio - heuristic_time
+
+    solver = cp_model.CpSolver()
+    set_parameters(solver, params or {})
+    if num_workers:
+        solver.parameters.num_workers = num_workers
+    if time_limit:
+        solver.parameters.max_time_in_seconds = time_limit
+    status = solver.solve(flexible_model.model)
+
+    output = ""
+    schedule = None
+    found = status in (cp_model.OPTIMAL, cp_model.FEASIBLE)
+    if found:
+        starts = [solver.value(var) for var in flexible_model.start]
+        options = np.array([
+            next(k for k in range(instance.option_offsets[op], instance.option_offsets[op + 1])
+                 if flexible_model.presence[k] is None or solver.boolean_value(flexible_model.presence[k]))
+            for op in range(instance.total_ops)
+        ])
+        schedule = FlexibleSchedule(instance, starts, options)
+        output += "Solution:\n"
+        output += schedule.text()
+        if status == cp_model.OPTIMAL:
+            output += f"Optimal Schedule Length: {solver.objective_value}\n"
+        else:
+            output += f"Best Schedule Length: {solver.objective_value} (bound {solver.best_objective_bound})\n"
+    else:
+        output += "No solution found.\n"
+
+    makespan = solver.objective_value if found else None
+    final_bound = max(lower_bound, int(solver.best_objective_bound)) if found else lower_bound
+
+    output += "\nStatistics\n"
+    output += f"  - operations: {instance.total_ops}, machine options: {instance.num_options}\n"
+    output += f"  - conflicts: {solver.num_conflicts}\n"
+    output += f"  - branches : {solver.num_branches}\n"
+    output += f"  - wall time: {solver.wall_time}s\n"
+    output += f"  - horizon: {horizon} ({heuristic.rule} dispatching rule)\n"
+    output += f"  - model build time: {build_time}s\n"
+    output += f"  - lower bound: {final_bound} (job {bounds.job}, machine {bounds.machine})\n"
+    output += f"  - gap: {format_gap(gap(makespan, final_bound))}\n"
+    if hint is not None:
+        output += "  - warm start: given schedule\n"
+    elif warm_start:
+        output += f"  - warm start: {heuristic.rule} dispatching rule, makespan {heuristic.makespan}\n"
+    output += f"  - time taken to solve the problem: {time.time() - inicio}s\n"
+
+    if stats is not None:
+        stats.update(
+            horizon=horizon,
+            heuristic_time=heuristic_time,
+            build_time=build_time,
+            solve_time=solver.wall_time,
+            status=solver.status_name(status),
+            makespan=makespan,
+            best_bound=final_bound,
+            lower_bound=lower_bound,
+            gap=gap(makespan, final_bound),
+            time_to_optimal=solver.wall_time if status == cp_model.OPTIMAL else None,
+            conflicts=solver.num_conflicts,
+            branches=solver.num_branches,
+            schedule=schedule,
+        )
+    return output
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Solve flexible job-shop (.fjs) instances with CP-SAT")
+    parser.add_argument("files", nargs="+", help=".fjs instance files")
+    parser.add_argument("--time-limit", type=float, help="solver time budget per instance, in seconds")
+    parser.add_argument("--workers", type=int, help="CP-SAT num_workers")
+    parser.add_argument("--warm-start", action="store_true", help="hint the best dispatching-rule schedule")
+    args = parser.parse_args()
+
+    for file_path in args.files:
+        print(f"Results for {file_path}:")
+        print(solve_fjsp(load_flexible_instance(file_path), args.workers, args.time_limit, args.warm_start))
@@ -0,0 +1,319 @@
+import collections
+import concurrent.futures
+import time
+import numpy as np
+from heuristics import best_dispatch
+from jsspInstance import from_jobs_data
+from lowerBounds import lower_bounds
+from searchReport import run_family, search_parser, search_report
+from trajectory import Incumbent
+
+# Genetic algorithm for the job-shop problem, without any solver.
+#
+# A chromosome is an operation-based permutation with repetition: every job
+# id appears once per operation of the job, and the k-th occurrence of job j
+# stands for its k-th operation. A population is one [population, ops]
+# array of job ids and is decoded as a whole: the decoder walks the
+# chromosome positions once, and every step is a few NumPy operations over
+# all individuals at the same time.
+#   semi-active -- every operation, in chromosome order, starts as soon as
+#                  its job and its machine are free
+#   active      -- Giffler and Thompson: every step takes the machine of
+#                  the operation that can finish first and schedules, among
+#                  the operations on it that could start before that, the
+#                  one that comes first in the chromosome. The order it
+#                  schedules in is written back into the chromosome.
+#
+# Every generation keeps the best individuals, picks parents by tournament,
+# recombines them with the precedence operation crossover (POX: the genes
+# of a random half of the jobs stay where they are in the first parent, the
+# others come in the order of the second parent) and swaps two genes of
+# some children. With workers > 1 the children are decoded in chunks on a
+# process pool that holds the instance.
+#
+#   python geneticAlgorithm.py ft --names ft10 --time-limit 30
+#   python geneticAlgorithm.py taillard --names ta71 --time-limit 120 --workers 4 --decoder semi-active
+
+DECODERS = ("semi-active", "active")
+
+Decoded = collections.namedtuple("Decoded", "makespans starts chromosomes")
+
+
+# Function to write the job ids of a schedule's operations in order of start
+# time: the chromosome that decodes (semi-active) to that schedule
+def chromosome_from_starts(instance, starts):
+    flat_starts = np.asarray(starts, dtype=np.int64).ravel()
+    order = np.lexsort((np.arange(flat_starts.size), flat_starts))
+    return (order // instance.num_ops).astype(np.int32)
+
+
+def _decode_semi_active(machines, durations, chromosomes):
+    population, total = chromosomes.shape
+    num_jobs, num_ops = machines.shape
+    num_machines = int(machines.max()) + 1
+    rows = np.arange(population)
+    job_base = rows * num_jobs
+    machine_base = rows * num_machines
+    op_base = rows * total
+    machines_flat = machines.ravel()
+    durations_flat = durations.ravel().astype(np.int64)
+
+    next_op = np.zeros(population * num_jobs, dtype=np.int64)
+    job_ready = np.zeros(population * num_jobs, dtype=np.int64)
+    machine_ready = np.zeros(population * num_machines, dtype=np.int64)
+    starts = np.zeros(population * total, dtype=np.int64)
+    for step in range(total):
+        job = chromosomes[:, step]
+        job_index = job_base + job
+        op = job * num_ops + next_op[job_index]
+        machine_index = machine_base + machines_flat[op]
+        start = np.maximum(job_ready[job_index], machine_ready[machine_index])
+        end = start + durations_flat[op]
+        starts[op_base + op] = start
+        job_ready[job_index] = end
+        machine_ready[machine_index] = end
+        next_op[job_index] += 1
+    makespans = machine_ready.reshape(population, num_machines).max(axis=1)
+    return Decoded(makespans, starts.reshape(population, num_jobs, num_ops), chromosomes)
+
+
+def _decode_active(machines, durations, chromosomes):
+    population, total = chromosomes.shape
+    num_jobs, num_ops = machines.shape
+    num_machines = int(machines.max()) + 1
+    rows = np.arange(population)
+    machine_base = (rows * num_machines)[:, None]
+    durations = durations.astype(np.int64)
+    # Chromosome position of the k-th occurrence of every job, [population,
+    # jobs, ops]; the priority of a job is that of its next operation
+    occurrence = np.argsort(chromosomes, axis=1, kind="stable").reshape(population, num_jobs, num_ops)
+    priority = occurrence[:, :, 0].copy()
+    # A finished job is ready at a time no operation can start before
+    finished = np.iinfo(np.int64).max // 4
+
+    # State of the next operation of every job, updated for one job per
+    # individual and step; machine_index points into the flat machine_ready
+    next_op = np.zeros((population, num_jobs), dtype=np.int64)
+    machine_index = machine_base + machines[:, 0]
+    head_durations = np.tile(durations[:, 0], (population, 1))
+    job_ready = np.zeros((population, num_jobs), dtype=np.int64)
+    machine_ready = np.zeros(population * num_machines, dtype=np.int64)
+    starts = np.zeros((population, num_jobs, num_ops), dtype=np.int64)
+    order = np.empty_like(chromosomes)
+    for step in range(total):
+        est = np.maximum(job_ready, machine_ready[machine_index])
+        ect = est + head_durations
+
+        # Conflict set on the machine of the earliest finishing operation,
+        # resolved by the chromosome; that operation is always in it, even
+        # with a zero duration
+        first = ect.argmin(axis=1)
+        machine = machine_index[rows, first]
+        conflict = (machine_index == machine[:, None]) & (est < ect[rows, first][:, None])
+        conflict[rows, first] = True
+        job = np.where(conflict, priority, total).argmin(axis=1)
+
+        job_op = next_op[rows, job]
+        start = est[rows, job]
+        end = start + head_durations[rows, job]
+        starts[rows, job, job_op] = start
+        machine_ready[machine] = end
+        order[:, step] = job
+
+        following = job_op + 1
+        more = following < num_ops
+        following = np.minimum(following, num_ops - 1)
+        next_op[rows, job] = following
+        job_ready[rows, job] = np.where(more, end, finished)
+        machine_index[rows, job] = machine_base[:, 0] + machines[job, following]
+        head_durations[rows, job] = durations[job, following]
+        priority[rows, job] = occurrence[rows, job, following]
+    makespans = machine_ready.reshape(population, num_machines).max(axis=1)
+    return Decoded(makespans, starts, order)
+
+
+# Function to decode a [population, ops] array of chromosomes; returns the
+# makespans, the start times ([population, jobs, ops]) and the chromosomes
+# in the order the decoder scheduled them
+def decode(jobs_data, chromosomes, decoder="active"):
+    if decoder not in DECODERS:
+        raise ValueError(f"unknown decoder {decoder!r}, expected one of {DECODERS}")
+    instance = from_jobs_data(jobs_data)
+    chromosomes = np.ascontiguousarray(chromosomes, dtype=np.int32)
+    if decoder == "active":
+        return _decode_active(instance.machines, instance.durations, chromosomes)
+    return _decode_semi_active(instance.machines, instance.durations, chromosomes)
+
+
+# Pool initializer and task: every worker keeps the instance, so a task only
+# carries its chunk of chromosomes
+_worker_instance = None
+
+
+def _init_worker(machines, durations):
+    global _worker_instance
+    _worker_instance = (machines, durations)
+
+
+def _decode_chunk(chromosomes, decoder):
+    machines, durations = _worker_instance
+    if decoder == "active":
+        return _decode_active(machines, durations, chromosomes)
+    return _decode_semi_active(machines, durations, chromosomes)
+
+
+# Decoder of whole populations, in this process or split across a pool of
+# worker processes
+class PopulationDecoder:
+    def __init__(self, jobs_data, decoder="active", workers=1):
+        if decoder not in DECODERS:
+            raise ValueError(f"unknown decoder {decoder!r}, expected one of {DECODERS}")
+        self.instance = from_jobs_data(jobs_data)
+        self.decoder = decoder
+        self.workers = workers
+        self.pool = None
+        if workers > 1:
+            self.pool = concurrent.futures.ProcessPoolExecutor(
+                workers, initializer=_init_worker, initargs=(self.instance.machines, self.instance.durations))
+
+    def __call__(self, chromosomes):
+        chromosomes = np.ascontiguousarray(chromosomes, dtype=np.int32)
+        if self.pool is None:
+            return decode(self.instance, chromosomes, self.decoder)
+        chunks = np.array_split(chromosomes, self.workers)
+        parts = list(self.pool.map(_decode_chunk, chunks, [self.decoder] * len(chunks)))
+        return Decoded(*(np.concatenate(arrays) for arrays in zip(*parts)))
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.shutdown()
+            self.pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# Function to recombine pairs of parents with POX; the genes of the jobs in
+# keep stay where they are in the first parent, the others follow the order
+# of the second one (both parents hold the same number of them in a row)
+def pox(first, second, keep):
+    rows = np.arange(first.shape[0])[:, None]
+    child = first.copy()
+    child[~keep[rows, first]] = second[~keep[rows, second]]
+    return child
+
+
+# Function to swap two random genes of every chromosome in rows, in place
+def swap_mutation(chromosomes, rows, rng):
+    left = rng.integers(chromosomes.shape[1], size=rows.size)
+    right = rng.integers(chromosomes.shape[1], size=rows.size)
+    genes = chromosomes[rows, left]
+    chromosomes[rows, left] = chromosomes[rows, right]
+    chromosomes[rows, right] = genes
+
+
+# Genetic algorithm job-shop solver function
+#   time_limit      -- seconds of search
+#   generations     -- stop after this many generations (None = no limit)
+#   population      -- individuals per generation
+#   decoder         -- "active" or "semi-active"
+#   crossover_rate  -- share of children made by POX, the others copy a parent
+#   mutation_rate   -- share of children with two genes swapped
+#   elite           -- best individuals copied into the next generation
+#                      (None = 2% of the population, at least one)
+#   tournament      -- individuals drawn per parent selection
+#   workers         -- processes that decode the population
+#   hint            -- start times ([jobs, ops]) of a schedule seeded into the
+#                      first population instead of the best dispatching rule
+#   stats           -- optional dict that receives timings, the result, the
+#                      search counters and the Schedule
+def genetic_algorithm(jobs_data, time_limit=60, generations=None, population=100, decoder="active",
+                      crossover_rate=0.9, mutation_rate=0.5, elite=None, tournament=2, workers=1, hint=None, seed=0,
+                      known_optimum=None, stats=None):
+    inicio = time.time()
+    instance = from_jobs_data(jobs_data)
+    rng = np.random.default_rng(seed)
+    heuristic = best_dispatch(instance) if hint is None else None
+    start_schedule = heuristic.starts if hint is None else hint
+    heuristic_time = time.time() - inicio
+    if elite is None:
+        elite = max(1, population // 50)
+
+    bounds = lower_bounds(instance)
+    lower_bound = bounds.best
+
+    base = np.repeat(np.arange(instance.num_jobs, dtype=np.int32), instance.num_ops)
+    chromosomes = rng.permuted(np.tile(base, (population, 1)), axis=1)
+    chromosomes[0] = chromosome_from_starts(instance, start_schedule)
+
+    with PopulationDecoder(instance, decoder, workers) as population_decoder:
+        build_time = time.time() - inicio - heuristic_time
+        decode_time = time.time()
+        decoded = population_decoder(chromosomes)
+        decode_time = time.time() - decode_time
+        chromosomes, makespans = decoded.chromosomes, decoded.makespans
+        decoded_count = population
+        best_index = int(makespans.argmin())
+        best = int(makespans[best_index])
+        best_starts = decoded.starts[best_index]
+        trajectory = [Incumbent(time.time() - inicio, best, lower_bound)]
+
+        generation = 0
+        optimal = best <= lower_bound
+        children_count = population - elite
+        while not optimal:
+            if time.time() - inicio >= time_limit or (generations is not None and generation >= generations):
+                break
+            generation += 1
+
+            # Tournament selection: the lowest makespan of the drawn individuals
+            drawn = rng.integers(population, size=(2 * children_count, tournament))
+            winners = drawn[np.arange(drawn.shape[0]), makespans[drawn].argmin(axis=1)]
+            first, second = chromosomes[winners[:children_count]], chromosomes[winners[children_count:]]
+
+            children = first.copy()
+            crossed = rng.random(children_count) < crossover_rate
+            keep = rng.random((int(crossed.sum()), instance.num_jobs)) < 0.5
+            children[crossed] = pox(first[crossed], second[crossed], keep)
+            swap_mutation(children, np.flatnonzero(rng.random(children_count) < mutation_rate), rng)
+
+            step_time = time.time()
+            decoded = population_decoder(children)
+            decode_time += time.time() - step_time
+            decoded_count += children_count
+
+            elites = np.argsort(makespans, kind="stable")[:elite]
+            chromosomes = np.concatenate((chromosomes[elites], decoded.chromosomes))
+            makespans = np.concatenate((makespans[elites], decoded.makespans))
+            child_index = int(decoded.makespans.argmin())
+            if decoded.makespans[child_index] < best:
+                best = int(decoded.makespans[child_index])
+                best_starts = decoded.starts[child_index]
+                trajectory.append(Incumbent(time.time() - inicio, best, lower_bound))
+                optimal = best <= lower_bound
+
+    decode_rate = decoded_count / max(decode_time, 1e-9)
+    lines = [
+        f"decoder: {decoder}, population {population}, elite {elite}, workers {workers}",
+        f"generations: {generation}",
+        f"schedules decoded: {decoded_count} ({decode_rate:.0f} per second of decoding)",
+    ]
+    counters = dict(generations=generation, schedules_decoded=decoded_count, decode_rate=decode_rate)
+    return search_report(instance, best_starts, trajectory, optimal, bounds, heuristic, inicio, heuristic_time,
+                         build_time, lines, counters, known_optimum, stats)
+
+
+if __name__ == "__main__":
+    parser = search_parser("Solve job-shop instances with a genetic algorithm")
+    parser.add_argument("--population", type=int, default=100)
+    parser.add_argument("--decoder", choices=DECODERS, default="active")
+    parser.add_argument("--workers", type=int, default=1, help="processes that decode the population")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    run_family(args, lambda jobs_data, known_optimum: genetic_algorithm(
+        jobs_data, args.time_limit, population=args.population, decoder=args.decoder, workers=args.workers,
+        seed=args.seed, known_optimum=known_optimum))
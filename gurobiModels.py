@@ -0,0 +1,694 @@
+import collections
+import functools
+import gurobipy as gp
+from gurobipy import GRB
+import numpy as np
+import scipy.sparse as sp
+from jsspInstance import from_jobs_data
+from lowerBounds import flexible_heads_and_tails
+
+# Builders for the Gurobi job-shop models.
+#
+# Every builder fills an empty gp.Model and returns a JobShopModel whose
+# start, end, binaries and makespan are MVars. Reading a solution
+# (start.X) and setting a warm start (start.Start = ...) therefore look the
+# same whichever builder made the model. Operations are numbered
+# job * ops_per_job + task, as in disjunctions.py. The machine pairs, their
+# big-M values and the operation time windows come from a DisjunctionPlan.
+#
+#   loop   -- the original builder: one addVar / addConstr call per variable
+#             and constraint, with names
+#   matrix -- the same formulation built from the instance arrays as one
+#             sparse constraint matrix and a single addMConstr call; names
+#             are optional
+#
+# With lazy=True a builder creates the binaries of the machine pairs but not
+# their big-M rows: the model starts as the precedence-only relaxation and
+# LazyDisjunctions adds the rows of the pairs that overlap in an incumbent
+# from a MIPSOL callback.
+#
+# Next to the disjunctive (Manne) model there are two other formulations,
+# built the same way as the matrix builder:
+#   time_indexed -- one binary per operation and start time in its window;
+#                   a machine runs at most one operation at every time unit
+#   rank         -- one binary per operation and position on its machine,
+#                   with a start time per machine position
+# binary_start turns a schedule into the values of the binaries of the
+# formulation, so warm starts work with every model (it is None for a model
+# loaded from the model cache, whose binaries Gurobi completes itself).
+#
+# build_flexible_model is the flexible job-shop model (flexGurobi.py), over a
+# jsspInstance.FlexibleInstance; it returns a FlexibleJobShopModel.
+
+JobShopModel = collections.namedtuple("JobShopModel", "model start end binaries makespan binary_start")
+
+
+# Function to build the disjunctive model with Python loops
+def build_loop_model(model, jobs_data, plan, lower_bound, horizon, names=True, lazy=False):
+    num_ops = len(jobs_data[0])
+
+    # Named tuple to store information about created variables
+    task_type = collections.namedtuple("task_type", "start end")
+    all_tasks = {}
+    binaries = []
+
+    # Create variables and add them to the model
+    for job_id, job in enumerate(jobs_data):
+        for task_id, (machine, duration) in enumerate(job):
+            suffix = f"_{job_id}_{task_id}"
+            # The time window of the operation bounds its start and end,
+            # which keeps the big-M values of the disjunctions valid
+            earliest = int(plan.earliest_start[job_id * num_ops + task_id])
+            latest = int(plan.latest_start[job_id * num_ops + task_id])
+            start_var = model.addVar(lb=earliest, ub=latest, vtype=GRB.INTEGER, name=f"start{suffix}")
+            end_var = model.addVar(lb=earliest + duration, ub=latest + duration, vtype=GRB.INTEGER, name=f"end{suffix}")
+            all_tasks[job_id, task_id] = task_type(start=start_var, end=end_var)
+
+            # Add constraint to ensure end = start + duration
+            model.addConstr(end_var == start_var + duration, f"duration{suffix}")
+
+    # Add disjunctive constraints to avoid overlap on the same machine
+    for (first, second), (big_m_1, big_m_2) in zip(plan.pairs.tolist(), plan.big_m.tolist()):
+        job_i, task_i = divmod(first, num_ops)
+        job_j, task_j = divmod(second, num_ops)
+
+        # Binary variable for disjunction, 1 when the first task runs first
+        bin_var = model.addVar(vtype=GRB.BINARY)
+        binaries.append(bin_var)
+        if lazy:
+            continue
+
+        model.addConstr(
+            all_tasks[job_i, task_i].end <= all_tasks[job_j, task_j].start + (1 - bin_var) * big_m_1,
+            f"disjunctive_{job_i}_{task_i}_{job_j}_{task_j}_1"
+        )
+        model.addConstr(
+            all_tasks[job_j, task_j].end <= all_tasks[job_i, task_i].start + bin_var * big_m_2,
+            f"disjunctive_{job_j}_{task_j}_{job_i}_{task_i}_2"
+        )
+
+    # Machine pairs whose order is forced by the time windows
+    for first, second in plan.fixed.tolist():
+        job_i, task_i = divmod(first, num_ops)
+        job_j, task_j = divmod(second, num_ops)
+        model.addConstr(
+            all_tasks[job_i, task_i].end <= all_tasks[job_j, task_j].start,
+            f"fixed_{job_i}_{task_i}_{job_j}_{task_j}"
+        )
+
+    # Add precedence constraints within the same job
+    for job_id, job in enumerate(jobs_data):
+        for task_id in range(len(job) - 1):
+            model.addConstr(
+                all_tasks[job_id, task_id + 1].start >= all_tasks[job_id, task_id].end,
+                f"precedence_{job_id}_{task_id}",
+            )
+
+    # Objective: minimize makespan (maximum end time across all jobs)
+    makespan = model.addVar(lb=lower_bound, ub=horizon, vtype=GRB.INTEGER, name="makespan")
+    for job_id, job in enumerate(jobs_data):
+        model.addConstr(
+            makespan >= all_tasks[job_id, len(job) - 1].end,
+            f"makespan_constraint_{job_id}",
+        )
+    model.setObjective(makespan, GRB.MINIMIZE)
+
+    ordered = [all_tasks[key] for key in sorted(all_tasks)]
+    return JobShopModel(
+        model,
+        gp.MVar.fromlist([task.start for task in ordered]),
+        gp.MVar.fromlist([task.end for task in ordered]),
+        gp.MVar.fromlist(binaries),
+        gp.MVar.fromlist([makespan]),
+        functools.partial(_pair_order, plan.pairs),
+    )
+
+
+# Function to build the same disjunctive model from the instance arrays.
+# Columns: start[N], end[N], binaries[P], makespan. Every constraint row is
+# assembled as (row, column, coefficient) triplets and added at once.
+def build_matrix_model(model, jobs_data, plan, lower_bound, horizon, names=False, lazy=False):
+    instance = from_jobs_data(jobs_data)
+    num_jobs, num_ops = instance.machines.shape
+    total = instance.total_ops
+    durations = instance.durations.astype(np.float64).ravel()
+    first, second = plan.pairs[:, 0], plan.pairs[:, 1]
+    # Lazy mode keeps the binaries but leaves out the disjunction rows
+    row_first, row_second = (first[:0], second[:0]) if lazy else (first, second)
+    fixed_first, fixed_second = plan.fixed[:, 0], plan.fixed[:, 1]
+    num_pairs = len(plan.pairs)
+
+    start_col = np.arange(total)
+    end_col = total + start_col
+    bin_col = 2 * total + np.arange(num_pairs)
+    makespan_col = 2 * total + num_pairs
+
+    # Variables
+    lb = np.concatenate([
+        plan.earliest_start, plan.earliest_start + durations, np.zeros(num_pairs), [lower_bound],
+    ])
+    ub = np.concatenate([
+        plan.latest_start, plan.latest_start + durations, np.ones(num_pairs), [horizon],
+    ])
+    vtype = np.array([GRB.INTEGER] * (2 * total) + [GRB.BINARY] * num_pairs + [GRB.INTEGER])
+    obj = np.zeros(makespan_col + 1)
+    obj[makespan_col] = 1.0
+    var_names = None
+    if names:
+        jobs, tasks = np.divmod(start_col, num_ops)
+        var_names = (
+            [f"start_{j}_{t}" for j, t in zip(jobs, tasks)]
+            + [f"end_{j}_{t}" for j, t in zip(jobs, tasks)]
+            + [f"C{k}" for k in range(num_pairs)]
+            + ["makespan"]
+        )
+    x = model.addMVar(makespan_col + 1, lb=lb, ub=ub, obj=obj, vtype=vtype, name=var_names)
+    model.ModelSense = GRB.MINIMIZE
+
+    # Job precedences and makespan rows
+    job_ops = start_col.reshape(num_jobs, num_ops)
+    current = job_ops[:, :-1].ravel()
+    following = job_ops[:, 1:].ravel()
+    last = job_ops[:, -1]
+
+    blocks = [
+        # duration: end - start = p
+        (end_col, start_col, None, None, durations, GRB.EQUAL),
+        # disjunction 1: end[first] - start[second] + M1 * b <= M1
+        (end_col[row_first], start_col[row_second], bin_col[:len(row_first)], plan.big_m[:len(row_first), 0],
+         plan.big_m[:len(row_first), 0], GRB.LESS_EQUAL),
+        # disjunction 2: end[second] - start[first] - M2 * b <= 0
+        (end_col[row_second], start_col[row_first], bin_col[:len(row_first)], -plan.big_m[:len(row_first), 1],
+         np.zeros(len(row_first)), GRB.LESS_EQUAL),
+        # fixed order: end[first] - start[second] <= 0
+        (end_col[fixed_first], start_col[fixed_second], None, None, np.zeros(len(fixed_first)), GRB.LESS_EQUAL),
+        # precedence: end[task] - start[task + 1] <= 0
+        (end_col[current], start_col[following], None, None, np.zeros(len(current)), GRB.LESS_EQUAL),
+        # makespan: end[last task] - makespan <= 0
+        (end_col[last], np.full(num_jobs, makespan_col), None, None, np.zeros(num_jobs), GRB.LESS_EQUAL),
+    ]
+    rows, cols, coefs, rhs, senses = [], [], [], [], []
+    row_offset = 0
+    for plus_col, minus_col, extra_col, extra_coef, block_rhs, sense in blocks:
+        count = len(plus_col)
+        row_ids = row_offset + np.arange(count)
+        rows += [row_ids, row_ids]
+        cols += [plus_col, minus_col]
+        coefs += [np.ones(count), -np.ones(count)]
+        if extra_col is not None:
+            rows.append(row_ids)
+            cols.append(extra_col)
+            coefs.append(np.broadcast_to(np.asarray(extra_coef, dtype=np.float64), count))
+        rhs.append(np.asarray(block_rhs, dtype=np.float64))
+        senses.append(np.full(count, sense))
+        row_offset += count
+
+    matrix = sp.csr_matrix(
+        (np.concatenate(coefs), (np.concatenate(rows), np.concatenate(cols))),
+        shape=(row_offset, makespan_col + 1),
+    )
+    constr_names = None
+    if names:
+        def op(k):
+            return f"{k // num_ops}_{k % num_ops}"
+
+        constr_names = (
+            [f"duration_{op(k)}" for k in start_col]
+            + [f"disjunctive_{op(i)}_{op(j)}_1" for i, j in zip(row_first, row_second)]
+            + [f"disjunctive_{op(j)}_{op(i)}_2" for i, j in zip(row_first, row_second)]
+            + [f"fixed_{op(i)}_{op(j)}" for i, j in zip(fixed_first, fixed_second)]
+            + [f"precedence_{op(k)}" for k in current]
+            + [f"makespan_constraint_{j}" for j in range(num_jobs)]
+        )
+    model.addMConstr(matrix, x, np.concatenate(senses), np.concatenate(rhs), name=constr_names)
+
+    return JobShopModel(
+        model,
+        x[:total],
+        x[total:2 * total],
+        x[2 * total:makespan_col],
+        x[makespan_col:],
+        functools.partial(_pair_order, plan.pairs),
+    )
+
+
+BUILDERS = {
+    "loop": build_loop_model,
+    "matrix": build_matrix_model,
+}
+
+
+# Binaries of the disjunctive model: 1 when the first operation of the pair
+# runs first
+def _pair_order(pairs, starts):
+    return (starts[pairs[:, 0]] < starts[pairs[:, 1]]).astype(np.float64)
+
+
+# Constraint rows collected as (row, column, coefficient) triplets and added
+# to the model with one addMConstr call
+class _Rows:
+    def __init__(self):
+        self.rows, self.cols, self.coefs, self.rhs, self.senses = [], [], [], [], []
+        self.count = 0
+
+    # Function to add a block of rows; row holds the block-local row of
+    # every entry and rhs one value per row
+    def add(self, row, col, coef, rhs, sense):
+        rhs = np.asarray(rhs, dtype=np.float64)
+        self.rows.append(self.count + np.asarray(row))
+        self.cols.append(np.asarray(col))
+        self.coefs.append(np.broadcast_to(np.asarray(coef, dtype=np.float64), len(self.rows[-1])))
+        self.rhs.append(rhs)
+        self.senses.append(np.full(len(rhs), sense))
+        self.count += len(rhs)
+
+    # Function to add the rows "plus - minus <= rhs" (or the given sense)
+    def add_difference(self, plus_col, minus_col, rhs, sense=GRB.LESS_EQUAL):
+        row = np.arange(len(plus_col))
+        self.add(np.concatenate([row, row]), np.concatenate([plus_col, minus_col]),
+                 np.concatenate([np.ones(len(row)), -np.ones(len(row))]), rhs, sense)
+
+    def add_to(self, model, x):
+        matrix = sp.csr_matrix(
+            (np.concatenate(self.coefs), (np.concatenate(self.rows), np.concatenate(self.cols))),
+            shape=(self.count, x.shape[0]),
+        )
+        model.addMConstr(matrix, x, np.concatenate(self.senses), np.concatenate(self.rhs))
+
+
+# Function to add the rows every formulation shares: end = start + duration,
+# job precedences and the makespan over the last operation of every job
+def _add_job_rows(rows, instance, start_col, end_col, makespan_col):
+    num_jobs, num_ops = instance.machines.shape
+    durations = instance.durations.astype(np.float64).ravel()
+    job_ops = start_col.reshape(num_jobs, num_ops)
+    rows.add_difference(end_col, start_col, durations, GRB.EQUAL)
+    current, following = job_ops[:, :-1].ravel(), job_ops[:, 1:].ravel()
+    rows.add_difference(end_col[current], start_col[following], np.zeros(len(current)))
+    last = job_ops[:, -1]
+    rows.add_difference(end_col[last], np.full(num_jobs, makespan_col), np.zeros(num_jobs))
+
+
+# Names of the start, end and makespan columns, with the formulation's own
+# columns in between
+def _column_names(instance, middle):
+    jobs, tasks = np.divmod(np.arange(instance.total_ops), instance.num_ops)
+    return (
+        [f"start_{j}_{t}" for j, t in zip(jobs, tasks)]
+        + [f"end_{j}_{t}" for j, t in zip(jobs, tasks)]
+        + middle
+        + ["makespan"]
+    )
+
+
+# Function to build the time-indexed model. Every operation k gets one
+# binary per start time t in its window [earliest_start, latest_start]:
+#   sum_t x[k, t] = 1,  start_k = sum_t t * x[k, t]
+#   for every machine and time unit u: sum of x[k, t] with k on the machine
+#   and t <= u < t + p_k is at most 1
+# The model grows with the horizon, so it only fits short-horizon instances.
+# Columns: start[N], end[N], x[sum of window lengths], makespan.
+def build_time_indexed_model(model, jobs_data, plan, lower_bound, horizon, names=False):
+    instance = from_jobs_data(jobs_data)
+    total = instance.total_ops
+    durations = instance.durations.astype(np.int64).ravel()
+    machines = instance.machines.ravel()
+    earliest = np.asarray(plan.earliest_start, dtype=np.int64)
+    latest = np.asarray(plan.latest_start, dtype=np.int64)
+    widths = latest - earliest + 1
+
+    # Start time and operation of every binary
+    x_op = np.repeat(np.arange(total), widths)
+    offsets = np.concatenate([[0], np.cumsum(widths)])
+    x_time = earliest[x_op] + np.arange(len(x_op)) - offsets[x_op]
+    num_x = len(x_op)
+
+    start_col = np.arange(total)
+    end_col = total + start_col
+    x_col = 2 * total + np.arange(num_x)
+    makespan_col = 2 * total + num_x
+
+    lb = np.concatenate([earliest, earliest + durations, np.zeros(num_x), [lower_bound]])
+    ub = np.concatenate([latest, latest + durations, np.ones(num_x), [horizon]])
+    vtype = np.array([GRB.INTEGER] * (2 * total) + [GRB.BINARY] * num_x + [GRB.INTEGER])
+    obj = np.zeros(makespan_col + 1)
+    obj[makespan_col] = 1.0
+    var_names = None
+    if names:
+        var_names = _column_names(instance, [f"x_{k // instance.num_ops}_{k % instance.num_ops}_{t}"
+                                             for k, t in zip(x_op, x_time)])
+    x = model.addMVar(makespan_col + 1, lb=lb, ub=ub, obj=obj, vtype=vtype, name=var_names)
+    model.ModelSense = GRB.MINIMIZE
+
+    rows = _Rows()
+    _add_job_rows(rows, instance, start_col, end_col, makespan_col)
+    # One start time per operation
+    rows.add(x_op, x_col, 1.0, np.ones(total), GRB.EQUAL)
+    # start_k - sum_t t * x[k, t] = 0; the binaries of t = 0 have no term
+    timed = x_time > 0
+    rows.add(np.concatenate([start_col, x_op[timed]]), np.concatenate([start_col, x_col[timed]]),
+             np.concatenate([np.ones(total), -x_time[timed]]), np.zeros(total), GRB.EQUAL)
+
+    # Machine capacity: the binary (k, t) keeps machine m busy during
+    # t .. t + p_k - 1. Time units that at most one binary can cover are
+    # left out.
+    busy = durations[x_op]
+    cover_x = np.repeat(np.arange(num_x), busy)
+    cover_offsets = np.concatenate([[0], np.cumsum(busy)])
+    cover_time = x_time[cover_x] + np.arange(len(cover_x)) - cover_offsets[cover_x]
+    slot = machines[x_op[cover_x]].astype(np.int64) * (horizon + 1) + cover_time
+    slots, slot_row, slot_count = np.unique(slot, return_inverse=True, return_counts=True)
+    keep = slot_count > 1
+    new_row = np.cumsum(keep) - 1
+    entry = keep[slot_row]
+    rows.add(new_row[slot_row[entry]], x_col[cover_x[entry]], 1.0, np.ones(int(keep.sum())), GRB.LESS_EQUAL)
+    rows.add_to(model, x)
+
+    def binary_start(starts):
+        values = np.zeros(num_x)
+        picked = offsets[:-1] + np.rint(starts).astype(np.int64) - earliest
+        inside = (picked >= offsets[:-1]) & (picked < offsets[1:])
+        values[picked[inside]] = 1.0
+        return values
+
+    return JobShopModel(model, x[:total], x[total:2 * total], x[2 * total:makespan_col], x[makespan_col:],
+                        binary_start)
+
+
+# Function to build the rank-based (positional) model. Every machine has one
+# slot per operation it runs; z[k, r] = 1 puts operation k in slot r of its
+# machine and h[m, r] is the start of that slot:
+#   every operation takes one slot, every slot holds one operation
+#   h[m, r + 1] >= h[m, r] + sum_k p_k * z[k, r]
+#   z[k, r] = 1 ties start_k to h[m, r] (big-M = horizon, both ways)
+# Columns: start[N], end[N], z[sum of squared machine loads], h[N], makespan.
+def build_rank_model(model, jobs_data, plan, lower_bound, horizon, names=False):
+    instance = from_jobs_data(jobs_data)
+    total = instance.total_ops
+    durations = instance.durations.astype(np.float64).ravel()
+    machines = instance.machines.ravel().astype(np.int64)
+    earliest = np.asarray(plan.earliest_start, dtype=np.float64)
+    latest = np.asarray(plan.latest_start, dtype=np.float64)
+
+    # Operations of every machine and their slots; slot s of machine m has the
+    # global slot id slot_offsets[m] + s
+    order = np.argsort(machines, kind="stable")
+    loads = np.bincount(machines, minlength=instance.num_machines)
+    slot_offsets = np.concatenate([[0], np.cumsum(loads)])
+    # Every (operation, slot of its machine) combination
+    z_op = np.repeat(order, loads[machines[order]])
+    z_slot_start = slot_offsets[machines[z_op]]
+    z_first = np.concatenate([[0], np.cumsum(loads[machines[order]])])[:-1]
+    z_slot = z_slot_start + np.arange(len(z_op)) - np.repeat(z_first, loads[machines[order]])
+    num_z = len(z_op)
+
+    start_col = np.arange(total)
+    end_col = total + start_col
+    z_col = 2 * total + np.arange(num_z)
+    h_col = 2 * total + num_z + np.arange(total)
+    makespan_col = 2 * total + num_z + total
+
+    lb = np.concatenate([earliest, earliest + durations, np.zeros(num_z), np.zeros(total), [lower_bound]])
+    ub = np.concatenate([latest, latest + durations, np.ones(num_z), np.full(total, horizon), [horizon]])
+    vtype = np.array([GRB.INTEGER] * (2 * total) + [GRB.BINARY] * num_z + [GRB.CONTINUOUS] * total
+                     + [GRB.INTEGER])
+    obj = np.zeros(makespan_col + 1)
+    obj[makespan_col] = 1.0
+    var_names = None
+    if names:
+        slot_machine = np.repeat(np.arange(instance.num_machines), loads)
+        slot_rank = np.arange(total) - slot_offsets[slot_machine]
+        var_names = _column_names(
+            instance,
+            [f"z_{k // instance.num_ops}_{k % instance.num_ops}_{s - slot_offsets[machines[k]]}"
+             for k, s in zip(z_op, z_slot)]
+            + [f"h_{m}_{r}" for m, r in zip(slot_machine, slot_rank)],
+        )
+    x = model.addMVar(makespan_col + 1, lb=lb, ub=ub, obj=obj, vtype=vtype, name=var_names)
+    model.ModelSense = GRB.MINIMIZE
+
+    rows = _Rows()
+    _add_job_rows(rows, instance, start_col, end_col, makespan_col)
+    # One slot per operation and one operation per slot
+    rows.add(z_op, z_col, 1.0, np.ones(total), GRB.EQUAL)
+    rows.add(z_slot, z_col, 1.0, np.ones(total), GRB.EQUAL)
+
+    # Slot sequence: h[s + 1] - h[s] - sum_k p_k z[k, s] >= 0 for every slot
+    # that is not the last of its machine (zero durations have no term)
+    has_next = np.ones(total, dtype=bool)
+    has_next[slot_offsets[1:][loads > 0] - 1] = False
+    sequence_row = np.cumsum(has_next) - 1
+    slots = np.flatnonzero(has_next)
+    z_in = has_next[z_slot] & (durations[z_op] > 0)
+    rows.add(
+        np.concatenate([np.arange(len(slots)), np.arange(len(slots)), sequence_row[z_slot[z_in]]]),
+        np.concatenate([h_col[slots + 1], h_col[slots], z_col[z_in]]),
+        np.concatenate([np.ones(len(slots)), -np.ones(len(slots)), -durations[z_op[z_in]]]),
+        np.zeros(len(slots)), GRB.GREATER_EQUAL,
+    )
+
+    # start_k - h[s] - M z[k, s] >= -M  and  start_k - h[s] + M z[k, s] <= M
+    link = np.arange(num_z)
+    for sign, sense in ((-1.0, GRB.GREATER_EQUAL), (1.0, GRB.LESS_EQUAL)):
+        rows.add(
+            np.concatenate([link, link, link]),
+            np.concatenate([start_col[z_op], h_col[z_slot], z_col]),
+            np.concatenate([np.ones(num_z), -np.ones(num_z), np.full(num_z, sign * horizon)]),
+            np.full(num_z, sign * horizon), sense,
+        )
+    rows.add_to(model, x)
+
+    def binary_start(starts):
+        # Slot of every operation: its rank by start time on its machine
+        by_start = np.lexsort((starts, machines))
+        slot_of = np.empty(total, dtype=np.int64)
+        slot_of[by_start] = np.arange(total)
+        return (slot_of[z_op] == z_slot).astype(np.float64)
+
+    return JobShopModel(model, x[:total], x[total:2 * total], x[2 * total:2 * total + num_z],
+                        x[makespan_col:], binary_start)
+
+
+FORMULATIONS = {
+    "time_indexed": build_time_indexed_model,
+    "rank": build_rank_model,
+}
+
+# Function to give every variable of a built model the values of a schedule
+# (start times as a [jobs, ops] array), for warm starts
+def set_start(job_shop_model, jobs_data, starts, makespan):
+    instance = from_jobs_data(jobs_data)
+    starts = np.asarray(starts, dtype=np.float64).ravel()
+    job_shop_model.start.Start = starts
+    job_shop_model.end.Start = starts + instance.durations.ravel()
+    if job_shop_model.binaries.shape[0] and job_shop_model.binary_start is not None:
+        job_shop_model.binaries.Start = job_shop_model.binary_start(starts)
+    job_shop_model.makespan.Start = np.array([float(makespan)])
+
+
+# Disjunction rows of a lazy model, added from a MIPSOL callback. An
+# incumbent is checked machine by machine: operations sorted by start time
+# overlap somewhere on a machine exactly when two neighbours overlap, so
+# cutting the overlapping neighbours rejects the incumbent. Rows are sent
+# again when a pair overlaps again: Gurobi's start heuristics can propose
+# solutions before the earlier rows are in the model, and an incumbent
+# without a cbLazy call is accepted.
+class LazyDisjunctions:
+    def __init__(self, job_shop_model, jobs_data, plan):
+        instance = from_jobs_data(jobs_data)
+        self.machines = instance.machines.ravel()
+        self.durations = instance.durations.astype(np.int64).ravel()
+        self.start = job_shop_model.start
+        self.start_vars = job_shop_model.start.tolist()
+        self.end_vars = job_shop_model.end.tolist()
+        self.binary_vars = job_shop_model.binaries.tolist()
+        self.big_m = plan.big_m.tolist()
+        self.pair_index = {pair: k for k, pair in enumerate(map(tuple, plan.pairs.tolist()))}
+        self.added = set()
+
+    # Number of pairs whose rows have been added
+    @property
+    def cuts(self):
+        return len(self.added)
+
+    # Function to add the rows of every overlapping neighbour pair of the
+    # incumbent being checked; returns how many pairs were cut
+    def separate(self, model):
+        starts = np.rint(model.cbGetSolution(self.start)).astype(np.int64)
+        order = np.lexsort((starts, self.machines))
+        current, following = order[:-1], order[1:]
+        overlap = (self.machines[current] == self.machines[following]) & (
+            starts[following] < starts[current] + self.durations[current]
+        )
+        count = 0
+        for i, j in zip(current[overlap].tolist(), following[overlap].tolist()):
+            pair = (i, j) if i < j else (j, i)
+            k = self.pair_index.get(pair)
+            if k is None:
+                continue
+            first, second = pair
+            big_m_1, big_m_2 = self.big_m[k]
+            binary = self.binary_vars[k]
+            model.cbLazy(self.end_vars[first] <= self.start_vars[second] + (1 - binary) * big_m_1)
+            model.cbLazy(self.end_vars[second] <= self.start_vars[first] + binary * big_m_2)
+            self.added.add(k)
+            count += 1
+        return count
+
+
+# Flexible job-shop model (jsspInstance.FlexibleInstance). Columns:
+#   start[N]   -- one start time per operation, within its head/tail window
+#   assign[A]  -- one binary per machine option of the operations that have
+#                 more than one; a single option is a constant
+#   order[P]   -- one binary per pair of operations of different jobs that
+#                 share at least one machine, 1 when the first runs first
+#   makespan
+# The processing time of an operation is sum(assign * duration) over its
+# options. For every pair and every machine the two operations share, the
+# two big-M rows only bind when both are assigned to that machine:
+#   s_a + d_a <= s_b + M1 (1 - order) + M1 (2 - x_a - x_b)
+#   s_b + d_b <= s_a + M2 order       + M2 (2 - x_a - x_b)
+# with M1, M2 the largest overlap the time windows allow.
+FlexibleJobShopModel = collections.namedtuple(
+    "FlexibleJobShopModel", "model start assign order makespan assign_col pairs"
+)
+
+
+# Function to build the flexible job-shop model from the instance arrays in
+# one sparse constraint matrix
+def build_flexible_model(model, instance, lower_bound, horizon, names=False):
+    total = instance.total_ops
+    durations = instance.option_durations.astype(np.float64)
+    heads, tails = flexible_heads_and_tails(instance)
+    earliest = heads.astype(np.float64)
+    latest = (horizon - tails - instance.min_durations).astype(np.float64)
+
+    # Assignment columns for the options of multi-option operations only
+    flexible_op = np.diff(instance.option_offsets) > 1
+    flexible_option = flexible_op[instance.option_op]
+    num_assign = int(flexible_option.sum())
+    assign_col = np.full(instance.num_options, -1)
+    assign_col[flexible_option] = total + np.arange(num_assign)
+
+    # Option pairs on the same machine from different jobs, and the
+    # operation pair (one order binary) each belongs to
+    by_machine = np.lexsort((instance.option_op, instance.option_machines))
+    splits = np.flatnonzero(np.diff(instance.option_machines[by_machine])) + 1
+    first_options, second_options = [], []
+    for options in np.split(by_machine, splits):
+        i, j = np.triu_indices(len(options), 1)
+        first_options.append(options[i])
+        second_options.append(options[j])
+    ka = np.concatenate(first_options) if first_options else np.zeros(0, dtype=np.int64)
+    kb = np.concatenate(second_options) if second_options else np.zeros(0, dtype=np.int64)
+    a, b = instance.option_op[ka], instance.option_op[kb]
+    keep = instance.op_job[a] != instance.op_job[b]
+    ka, kb, a, b = ka[keep], kb[keep], a[keep], b[keep]
+    pairs, pair_of = np.unique(np.stack([a, b], axis=1).reshape(-1, 2), axis=0, return_inverse=True)
+    pair_of = pair_of.ravel()
+    num_pairs = len(pairs)
+    order_col = total + num_assign + np.arange(num_pairs)
+    makespan_col = total + num_assign + num_pairs
+
+    lb = np.concatenate([earliest, np.zeros(num_assign + num_pairs), [lower_bound]])
+    ub = np.concatenate([latest, np.ones(num_assign + num_pairs), [horizon]])
+    vtype = np.array([GRB.INTEGER] * total + [GRB.BINARY] * (num_assign + num_pairs) + [GRB.INTEGER])
+    obj = np.zeros(makespan_col + 1)
+    obj[makespan_col] = 1.0
+    var_names = None
+    if names:
+        op_name = [f"{j}_{t}" for j, t in zip(instance.op_job.tolist(), instance.op_task.tolist())]
+        var_names = (
+            [f"start_{name}" for name in op_name]
+            + [f"assign_{op_name[o]}_m{m}" for o, m in zip(instance.option_op[flexible_option].tolist(),
+                                                          instance.option_machines[flexible_option].tolist())]
+            + [f"order_{op_name[i]}_{op_name[j]}" for i, j in pairs.tolist()]
+            + ["makespan"]
+        )
+    x = model.addMVar(makespan_col + 1, lb=lb, ub=ub, obj=obj, vtype=vtype, name=var_names)
+    model.ModelSense = GRB.MINIMIZE
+
+    rows = _Rows()
+    # Exactly one option per multi-option operation
+    op_row = np.cumsum(flexible_op) - 1
+    flexible_options = np.flatnonzero(flexible_option)
+    rows.add(op_row[instance.option_op[flexible_options]], assign_col[flexible_options], 1.0,
+             np.ones(int(flexible_op.sum())), GRB.EQUAL)
+
+    # Rows "start[plus] - start-or-makespan[minus] + duration(plus) <= 0"
+    def add_duration_rows(plus_ops, minus_cols):
+        count = len(plus_ops)
+        row_of_op = np.full(total, -1)
+        row_of_op[plus_ops] = np.arange(count)
+        option_rows = row_of_op[instance.option_op]
+        used = option_rows >= 0
+        rhs = np.zeros(count)
+        single = used & ~flexible_option
+        np.subtract.at(rhs, option_rows[single], durations[single])
+        terms = used & flexible_option
+        local = np.arange(count)
+        rows.add(np.concatenate([local, local, option_rows[terms]]),
+                 np.concatenate([plus_ops, minus_cols, assign_col[terms]]),
+                 np.concatenate([np.ones(count), -np.ones(count), durations[terms]]), rhs, GRB.LESS_EQUAL)
+
+    # Job precedences and the makespan over the last operation of every job
+    same_job = np.flatnonzero(instance.op_job[1:] == instance.op_job[:-1])
+    add_duration_rows(same_job, same_job + 1)
+    last = instance.job_offsets[1:] - 1
+    add_duration_rows(last, np.full(len(last), makespan_col))
+
+    # Disjunctions, one pair of rows per option pair. A zero M means the
+    # windows already put that operation first, and its row always holds.
+    big_m1 = np.maximum(latest[a] + durations[ka] - earliest[b], 0.0)
+    big_m2 = np.maximum(latest[b] + durations[kb] - earliest[a], 0.0)
+    for plus, minus, sign, big_m, rhs in (
+        (a, b, 1.0, big_m1, 3 * big_m1 - durations[ka]),
+        (b, a, -1.0, big_m2, 2 * big_m2 - durations[kb]),
+    ):
+        binding = big_m > 0
+        plus, minus, big_m, rhs = plus[binding], minus[binding], big_m[binding], rhs[binding]
+        count = len(plus)
+        local = np.arange(count)
+        row, col, coef = [local, local, local], [plus, minus, order_col[pair_of[binding]]], [
+            np.ones(count), -np.ones(count), sign * big_m]
+        for options in (ka[binding], kb[binding]):
+            flexible = assign_col[options] >= 0
+            rhs[~flexible] -= big_m[~flexible]
+            row.append(local[flexible])
+            col.append(assign_col[options][flexible])
+            coef.append(big_m[flexible])
+        rows.add(np.concatenate(row), np.concatenate(col), np.concatenate(coef), rhs, GRB.LESS_EQUAL)
+
+    rows.add_to(model, x)
+    return FlexibleJobShopModel(
+        model, x[:total], x[total:total + num_assign], x[total + num_assign:makespan_col], x[makespan_col:],
+        assign_col, pairs,
+    )
+
+
+# Function to give every variable of a flexible model the values of a
+# schedule: start times and chosen option of every operation
+def set_flexible_start(flexible_model, instance, starts, options):
+    starts = np.asarray(starts, dtype=np.float64)
+    options = np.asarray(options)
+    flexible_model.start.Start = starts
+    if flexible_model.assign.shape[0]:
+        assign = np.zeros(flexible_model.assign.shape[0])
+        chosen = flexible_model.assign_col[options]
+        assign[chosen[chosen >= 0] - flexible_model.start.shape[0]] = 1.0
+        flexible_model.assign.Start = assign
+    if flexible_model.order.shape[0]:
+        flexible_model.order.Start = _pair_order(flexible_model.pairs, starts)
+    ends = starts + instance.option_durations[options]
+    flexible_model.makespan.Start = np.array([ends.max()])
+
+
+# Function to read the chosen option of every operation from a solved
+# flexible model
+def flexible_options(flexible_model, instance):
+    options = instance.option_offsets[:-1].copy()
+    if flexible_model.assign.shape[0]:
+        chosen = np.flatnonzero(flexible_model.assign_col >= 0)
+        picked = chosen[flexible_model.assign.X[flexible_model.assign_col[chosen] - flexible_model.start.shape[0]] > 0.5]
+        options[instance.option_op[picked]] = picked
+    return options
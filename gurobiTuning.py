@@ -0,0 +1,155 @@
+import argparse
+import io
+import os
+import statistics
+import tempfile
+from jsspCache import FAMILIES, load_family
+from profiles import SEARCHES, SIZE_CLASSES, par2, print_profiles, save_profile, sweep, training_set
+
+# Gurobi parameter tuner.
+#
+# For one family and size class, either runs the seeded sweep of profiles.py
+# over SEARCH_SPACE or Gurobi's own tuning tool (model.tune) on the largest
+# training instance, and saves the winner to profiles/gurobi.json, where
+# every Gurobi entry point (autoGurobi.py, the batch runner,
+# MatrixPickerGurobi.py, teste.py) picks it up. "branch_priority" is not a
+# Gurobi parameter: autoGurobi.solve_jobshop gives the binaries of the
+# model that BranchPriority. The winner is always scored against the
+# default parameters on the same instances.
+#
+#   python gurobiTuning.py tune ft la --size small --configs 16 --train 5 --time-limit 30
+#   python gurobiTuning.py tune la --method grbtune --time-limit 30
+#   python gurobiTuning.py show
+
+SEARCH_SPACE = {
+    "MIPFocus": [0, 1, 2, 3],
+    "Cuts": [-1, 0, 1, 2],
+    "Heuristics": [0.0, 0.05, 0.2, 0.5],
+    "Presolve": [-1, 0, 1, 2],
+    "Threads": sorted({1, 2, 4, 8} & set(range(1, (os.cpu_count() or 1) + 1))),
+    "branch_priority": [0, 1],
+}
+
+
+# Function to score one parameter set on the training instances: the PAR2
+# time of every instance. The known optimum is left out, as in
+# cpsatTuning.py.
+def evaluate(config, family, names, time_limit):
+    import autoGurobi
+
+    instances = load_family(family)
+    scores = []
+    for name in names:
+        stats = {}
+        params = {"OutputFlag": 0, "TimeLimit": time_limit, **config}
+        autoGurobi.solve_jobshop(instances[name], io.StringIO(), params=params, stats=stats)
+        scores.append(par2(stats["time_to_optimal"], time_limit))
+    return scores
+
+
+# Function to read the parameters a Gurobi model has changed from their
+# defaults, through a .prm file
+def _changed_params(model):
+    with tempfile.TemporaryDirectory() as folder:
+        path = os.path.join(folder, "tuned.prm")
+        model.write(path)
+        params = {}
+        with open(path, "r") as file:
+            for line in file:
+                parts = line.split()
+                if len(parts) != 2 or line.startswith("#"):
+                    continue
+                name, value = parts
+                if name in ("OutputFlag", "LogToConsole", "TimeLimit", "Seed", "TuneTimeLimit", "TuneResults"):
+                    continue
+                number = float(value)
+                params[name] = int(number) if number.is_integer() else number
+    return params
+
+
+# Function to run Gurobi's tuning tool on the largest training instance and
+# save the parameters of its best result
+def grbtune(family, size, train=5, time_limit=30, tune_time=600, seed=0, log=print):
+    import gurobipy as gp
+    from disjunctions import plan_disjunctions
+    from gurobiModels import build_matrix_model
+    from heuristics import compute_horizon
+    from lowerBounds import lower_bounds
+
+    names = training_set(family, size, train, seed)
+    if not names:
+        log(f"{family}/{size}: no instances")
+        return None
+    instances = load_family(family)
+    name = max(names, key=lambda n: instances[n].total_ops)
+    log(f"{family}/{size}: Gurobi tuning tool on {name} for {tune_time}s")
+
+    jobs_data = instances[name]
+    horizon, _ = compute_horizon(jobs_data)
+    model = gp.Model("job_shop_scheduling")
+    build_matrix_model(model, jobs_data, plan_disjunctions(jobs_data, horizon), lower_bounds(jobs_data).best,
+                       horizon)
+    model.setParam("OutputFlag", 0)
+    model.setParam("TimeLimit", time_limit)
+    model.setParam("TuneTimeLimit", tune_time)
+    model.setParam("TuneResults", 1)
+    model.setParam("Seed", seed)
+    model.tune()
+    best = {}
+    if model.TuneResultCount:
+        model.getTuneResult(0)
+        best = _changed_params(model)
+
+    best_score = statistics.median(evaluate(best, family, names, time_limit))
+    default_score = statistics.median(evaluate({}, family, names, time_limit)) if best else best_score
+    log(f"{family}/{size}: best {best_score:.3f}s {best or 'defaults'}, defaults {default_score:.3f}s")
+    save_profile("gurobi", family, size, best, {
+        "strategy": "grbtune",
+        "seed": seed,
+        "time_limit": time_limit,
+        "tune_time": tune_time,
+        "tuned_on": name,
+        "instances": names,
+        "median_par2": best_score,
+        "default_median_par2": default_score,
+    })
+    return best
+
+
+# Function to tune one family and size class with the sweep and save the
+# winner
+def tune(family, size, strategy="halving", configs=16, train=5, time_limit=30, seed=0, log=print):
+    def family_evaluate(config, names, budget):
+        return evaluate(config, family, names, budget)
+
+    return sweep("gurobi", SEARCH_SPACE, family_evaluate, family, size, strategy, configs, train, time_limit,
+                 seed, log)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Tune Gurobi parameters per instance family")
+    commands = parser.add_subparsers(dest="command", required=True)
+    tune_parser = commands.add_parser("tune", help="tune and save profiles")
+    tune_parser.add_argument("families", nargs="+", choices=FAMILIES)
+    tune_parser.add_argument("--size", choices=[name for name, _ in SIZE_CLASSES],
+                             help="size class to tune (default: every class of the family)")
+    tune_parser.add_argument("--method", choices=["sweep", "grbtune"], default="sweep")
+    tune_parser.add_argument("--strategy", choices=sorted(SEARCHES), default="halving", help="sweep strategy")
+    tune_parser.add_argument("--configs", type=int, default=16, help="parameter sets to try in the sweep")
+    tune_parser.add_argument("--train", type=int, default=5, help="training instances per size class")
+    tune_parser.add_argument("--time-limit", type=float, default=30, help="full time limit per solve")
+    tune_parser.add_argument("--tune-time", type=float, default=600, help="total time of the Gurobi tuning tool")
+    tune_parser.add_argument("--seed", type=int, default=0)
+    commands.add_parser("show", help="print the saved profiles")
+    args = parser.parse_args()
+
+    if args.command == "show":
+        print_profiles("gurobi")
+    else:
+        sizes = [args.size] if args.size else [name for name, _ in SIZE_CLASSES]
+        for family in args.families:
+            for size in sizes:
+                if args.method == "grbtune":
+                    grbtune(family, size, args.train, args.time_limit, args.tune_time, args.seed)
+                else:
+                    tune(family, size, args.strategy, args.configs, args.train, args.time_limit, args.seed)
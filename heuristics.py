@@ -0,0 +1,224 @@
+import collections
+import numpy as np
+from jsspInstance import from_jobs_data
+
+# Fast constructive schedules for a job-shop instance.
+#
+# dispatch_schedule builds an active schedule with the Giffler-Thompson
+# algorithm: at every step it takes the operation that can finish first, and
+# then chooses by a priority rule among the operations on the same machine
+# that could start before that time. Each step is a handful of NumPy
+# operations over the current head operation of every job, so a 100x20
+# Taillard instance takes a few milliseconds per rule.
+#
+# The makespan of the best rule is a valid upper bound. It replaces the
+# "sum of all durations" horizon in both solver backends, and the start
+# times can be used as a warm start.
+
+HeuristicSchedule = collections.namedtuple("HeuristicSchedule", "makespan starts rule")
+
+# Priority rules: the operation with the smallest key wins
+RULES = ("mwkr", "spt", "mopnr", "lpt", "fifo")
+
+
+def _priority(rule, durations, work_left, ops_left, est):
+    if rule == "mwkr":  # most work remaining in the job
+        return -work_left
+    if rule == "spt":  # shortest processing time
+        return durations
+    if rule == "mopnr":  # most operations remaining in the job
+        return -ops_left
+    if rule == "lpt":  # longest processing time
+        return -durations
+    if rule == "fifo":  # earliest possible start
+        return est
+    raise ValueError(f"unknown priority rule {rule!r}, expected one of {RULES}")
+
+
+# Function to build an active schedule with one priority rule. Returns the
+# makespan and the start time of every operation as a [jobs, ops] array.
+def dispatch_schedule(jobs_data, rule="mwkr"):
+    instance = from_jobs_data(jobs_data)
+    machines = instance.machines
+    durations = instance.durations.astype(np.int64)
+    num_jobs, num_ops = machines.shape
+
+    starts = np.zeros((num_jobs, num_ops), dtype=np.int64)
+    next_op = np.zeros(num_jobs, dtype=np.int64)
+    job_ready = np.zeros(num_jobs, dtype=np.int64)
+    machine_ready = np.zeros(instance.num_machines, dtype=np.int64)
+    work_left = durations.sum(axis=1)
+    jobs = np.arange(num_jobs)
+
+    for _ in range(instance.total_ops):
+        # Head operation of every unfinished job
+        open_jobs = jobs[next_op < num_ops]
+        ops = next_op[open_jobs]
+        head_machines = machines[open_jobs, ops]
+        head_durations = durations[open_jobs, ops]
+        est = np.maximum(job_ready[open_jobs], machine_ready[head_machines])
+        ect = est + head_durations
+
+        # Conflict set on the machine of the earliest finishing operation;
+        # that operation is always in it, even with a zero duration
+        first = np.argmin(ect)
+        machine = head_machines[first]
+        in_conflict = (head_machines == machine) & (est < ect[first])
+        in_conflict[first] = True
+        conflict = np.flatnonzero(in_conflict)
+        key = _priority(
+            rule,
+            head_durations[conflict],
+            work_left[open_jobs[conflict]],
+            num_ops - ops[conflict],
+            est[conflict],
+        )
+        chosen = conflict[np.argmin(key)]
+
+        job = open_jobs[chosen]
+        op = ops[chosen]
+        start = est[chosen]
+        end = start + head_durations[chosen]
+        starts[job, op] = start
+        job_ready[job] = end
+        machine_ready[machine] = end
+        work_left[job] -= head_durations[chosen]
+        next_op[job] += 1
+
+    makespan = int(job_ready.max()) if num_jobs else 0
+    return HeuristicSchedule(makespan, starts, rule)
+
+
+# Function to run every priority rule and keep the shortest schedule
+def best_dispatch(jobs_data, rules=RULES):
+    instance = from_jobs_data(jobs_data)
+    best = None
+    for rule in rules:
+        schedule = dispatch_schedule(instance, rule)
+        if best is None or schedule.makespan < best.makespan:
+            best = schedule
+    return best
+
+
+# Function to compute the horizon given to the solvers: the best heuristic
+# makespan, or the sum of all durations when mode is "sum"
+def compute_horizon(jobs_data, mode="heuristic"):
+    instance = from_jobs_data(jobs_data)
+    if mode == "sum":
+        return int(instance.durations.sum()), None
+    if mode != "heuristic":
+        raise ValueError(f"unknown horizon mode {mode!r}, expected 'heuristic' or 'sum'")
+    schedule = best_dispatch(instance)
+    return schedule.makespan, schedule
+
+
+# Function to check that start times form a feasible schedule (job order and
+# no overlap on any machine); used to validate heuristic and solver output.
+# Operations are sorted by start and then end on every machine, so a
+# zero-duration operation at the start of another one is not an overlap.
+def is_feasible(jobs_data, starts):
+    instance = from_jobs_data(jobs_data)
+    starts = np.asarray(starts, dtype=np.int64)
+    ends = starts + instance.durations
+    if (starts < 0).any() or (starts[:, 1:] < ends[:, :-1]).any():
+        return False
+    flat_machines = instance.machines.ravel()
+    order = np.lexsort((ends.ravel(), starts.ravel(), flat_machines))
+    sorted_machines = flat_machines[order]
+    same_machine = sorted_machines[1:] == sorted_machines[:-1]
+    return not (same_machine & (starts.ravel()[order][1:] < ends.ravel()[order][:-1])).any()
+
+
+# Flexible job-shop schedule: makespan, start time and chosen option (index
+# into the option arrays of the FlexibleInstance) of every operation
+FlexibleHeuristicSchedule = collections.namedtuple("FlexibleHeuristicSchedule", "makespan starts options rule")
+
+FLEXIBLE_RULES = ("ect", "mwkr", "spt", "mopnr")
+
+
+# Function to build a flexible job-shop schedule with one priority rule.
+# Every job's next operation is given the machine option that finishes it
+# first; among the operations that could start before the earliest of those
+# finish times, the rule picks the one to schedule ("ect" takes the earliest
+# finish itself).
+def flexible_dispatch(instance, rule="ect"):
+    if rule not in FLEXIBLE_RULES:
+        raise ValueError(f"unknown priority rule {rule!r}, expected one of {FLEXIBLE_RULES}")
+    job_offsets = instance.job_offsets.tolist()
+    option_offsets = instance.option_offsets.tolist()
+    machines = instance.option_machines.tolist()
+    durations = instance.option_durations.tolist()
+    min_durations = instance.min_durations.tolist()
+
+    starts = np.zeros(instance.total_ops, dtype=np.int64)
+    options = np.zeros(instance.total_ops, dtype=np.int64)
+    next_op = job_offsets[:-1]
+    job_ready = [0] * instance.num_jobs
+    machine_ready = [0] * instance.num_machines
+    work_left = [sum(min_durations[job_offsets[j]:job_offsets[j + 1]]) for j in range(instance.num_jobs)]
+
+    for _ in range(instance.total_ops):
+        # Best option of the next operation of every unfinished job: (finish, start, option)
+        heads = {}
+        for job in range(instance.num_jobs):
+            op = next_op[job]
+            if op == job_offsets[job + 1]:
+                continue
+            heads[job] = min(
+                (max(job_ready[job], machine_ready[machines[k]]) + durations[k],
+                 max(job_ready[job], machine_ready[machines[k]]), k)
+                for k in range(option_offsets[op], option_offsets[op + 1])
+            )
+        first_job = min(heads, key=heads.get)
+        first_finish = heads[first_job][0]
+        conflict = [job for job, (_, start, _) in heads.items() if start < first_finish or job == first_job]
+
+        def key(job):
+            finish, start, option = heads[job]
+            if rule == "mwkr":
+                return -work_left[job], finish
+            if rule == "spt":
+                return durations[option], finish
+            if rule == "mopnr":
+                return next_op[job] - job_offsets[job + 1], finish
+            return finish, start
+
+        job = min(conflict, key=key)
+        finish, start, option = heads[job]
+        op = next_op[job]
+        starts[op] = start
+        options[op] = option
+        job_ready[job] = finish
+        machine_ready[machines[option]] = finish
+        work_left[job] -= min_durations[op]
+        next_op[job] += 1
+
+    makespan = max(job_ready) if instance.num_jobs else 0
+    return FlexibleHeuristicSchedule(makespan, starts, options, rule)
+
+
+# Function to run every flexible priority rule and keep the shortest schedule
+def best_flexible_dispatch(instance, rules=FLEXIBLE_RULES):
+    best = None
+    for rule in rules:
+        schedule = flexible_dispatch(instance, rule)
+        if best is None or schedule.makespan < best.makespan:
+            best = schedule
+    return best
+
+
+# Function to check a flexible schedule: every chosen option belongs to its
+# operation, job order holds and no machine runs two operations at once
+def is_feasible_flexible(instance, starts, options):
+    starts = np.asarray(starts, dtype=np.int64)
+    options = np.asarray(options, dtype=np.int64)
+    if (instance.option_op[options] != np.arange(instance.total_ops)).any() or (starts < 0).any():
+        return False
+    ends = starts + instance.option_durations[options]
+    same_job = instance.op_job[1:] == instance.op_job[:-1]
+    if (same_job & (starts[1:] < ends[:-1])).any():
+        return False
+    machines = instance.option_machines[options]
+    order = np.lexsort((ends, starts, machines))
+    same_machine = machines[order][1:] == machines[order][:-1]
+    return not (same_machine & (starts[order][1:] < ends[order][:-1])).any()
@@ -0,0 +1,282 @@
+import argparse
+import hashlib
+import json
+import os
+import numpy as np
+from jsspInstance import JobShopInstance, list_instances, load_instance, read_optimum_csv
+
+# Binary cache of the jssp/ corpus.
+#
+# Every family folder is compiled into one <family>.npy file holding, per
+# instance, the flattened machines matrix followed by the durations matrix
+# (int32). The file is opened with np.load(mmap_mode="r"), so an instance is
+# just a reshaped slice of the mapping and nothing is parsed or copied.
+# Next to it, <family>.json stores the offsets, the fingerprint (mtime, size,
+# sha1) of every source file and the per-instance statistics that make up the
+# manifest. A family is recompiled when a file is added, removed or changed.
+
+JSSP_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "jssp")
+CACHE_DIR = os.path.join(JSSP_DIR, ".cache")
+FAMILIES = ("abz", "car", "demirkol", "ft", "la", "orb", "swv", "taillard", "yn")
+CACHE_VERSION = 1
+
+# Memory-mapped arrays of the families already opened by this process
+_mapped = {}
+
+
+# Function to hash a file in chunks
+def _sha1(file_path):
+    digest = hashlib.sha1()
+    with open(file_path, "rb") as file:
+        for chunk in iter(lambda: file.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+# Function to fingerprint the source files of a family (instances and optimum.csv)
+def _source_files(family_path):
+    files = list_instances(family_path)
+    csv_path = os.path.join(family_path, "optimum", "optimum.csv")
+    if os.path.exists(csv_path):
+        files.append(os.path.join("optimum", "optimum.csv"))
+    return files
+
+
+def _fingerprint(file_path, with_hash=True):
+    stat = os.stat(file_path)
+    entry = {"mtime_ns": stat.st_mtime_ns, "size": stat.st_size}
+    if with_hash:
+        entry["sha1"] = _sha1(file_path)
+    return entry
+
+
+# Function to compute the manifest statistics of one instance
+def instance_stats(instance):
+    machine_load = np.bincount(
+        instance.machines.ravel(),
+        weights=instance.durations.ravel(),
+        minlength=instance.num_machines,
+    )
+    job_length = instance.durations.sum(axis=1)
+    return {
+        "jobs": instance.num_jobs,
+        "machines": instance.num_machines,
+        "total_ops": instance.total_ops,
+        "total_work": int(instance.durations.sum()),
+        "max_machine_load": int(machine_load.max()) if machine_load.size else 0,
+        "max_job_length": int(job_length.max()) if job_length.size else 0,
+    }
+
+
+def _paths(family):
+    return (
+        os.path.join(CACHE_DIR, f"{family}.npy"),
+        os.path.join(CACHE_DIR, f"{family}.json"),
+    )
+
+
+# Function to compile a family folder into its binary file and index
+def compile_family(family):
+    family_path = os.path.join(JSSP_DIR, family)
+    data_path, index_path = _paths(family)
+    optimum = read_optimum_csv(os.path.join(family_path, "optimum", "optimum.csv"))
+
+    chunks = []
+    instances = []
+    offset = 0
+    for file_name in list_instances(family_path):
+        try:
+            instance = load_instance(os.path.join(family_path, file_name))
+        except ValueError as e:
+            print(f"Skipping {family}/{file_name}: {e}")
+            continue
+        entry = {"name": file_name, "offset": offset, "ops": instance.num_ops}
+        entry.update(instance_stats(instance))
+        low, high = optimum.get(file_name, (None, None))
+        entry["optimum_lo"] = low
+        entry["optimum_hi"] = high
+        instances.append(entry)
+        chunks.append(instance.machines.ravel())
+        chunks.append(instance.durations.ravel())
+        offset += 2 * instance.total_ops
+
+    data = np.concatenate(chunks) if chunks else np.zeros(0, dtype=np.int32)
+    index = {
+        "version": CACHE_VERSION,
+        "family": family,
+        "sources": {f: _fingerprint(os.path.join(family_path, f)) for f in _source_files(family_path)},
+        "instances": instances,
+    }
+
+    # Write both files through a temporary name so a crash never leaves a
+    # half-written cache behind
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    _mapped.pop(family, None)
+    with open(data_path + ".tmp", "wb") as file:
+        np.save(file, data.astype(np.int32, copy=False))
+    os.replace(data_path + ".tmp", data_path)
+    with open(index_path + ".tmp", "w") as file:
+        json.dump(index, file, indent=1)
+    os.replace(index_path + ".tmp", index_path)
+    return index
+
+
+# Function to check that a cached index still matches the files on disk. A
+# file whose mtime or size changed is re-hashed, and the cache stays valid if
+# its content did not change.
+def _is_fresh(family, index):
+    family_path = os.path.join(JSSP_DIR, family)
+    if index.get("version") != CACHE_VERSION:
+        return False
+    sources = index["sources"]
+    if set(sources) != set(_source_files(family_path)):
+        return False
+    touched = False
+    for file_name, cached in sources.items():
+        file_path = os.path.join(family_path, file_name)
+        current = _fingerprint(file_path, with_hash=False)
+        if current["mtime_ns"] == cached["mtime_ns"] and current["size"] == cached["size"]:
+            continue
+        if current["size"] != cached["size"] or _sha1(file_path) != cached["sha1"]:
+            return False
+        cached.update(current)
+        touched = True
+    if touched:
+        _, index_path = _paths(family)
+        with open(index_path + ".tmp", "w") as file:
+            json.dump(index, file, indent=1)
+        os.replace(index_path + ".tmp", index_path)
+    return True
+
+
+# Function to return the index of a family, recompiling it if it is stale
+def family_index(family):
+    if not os.path.isdir(os.path.join(JSSP_DIR, family)):
+        raise ValueError(f"unknown family: {family}")
+    data_path, index_path = _paths(family)
+    if os.path.exists(index_path) and os.path.exists(data_path):
+        try:
+            with open(index_path, "r") as file:
+                index = json.load(file)
+            if _is_fresh(family, index):
+                return index
+        except (OSError, ValueError, KeyError):
+            pass
+    return compile_family(family)
+
+
+# Function to load every instance of a family from the cache, keyed by file
+# name. The arrays are read-only views into the memory-mapped file.
+def load_family(family):
+    index = family_index(family)
+    data = _mapped.get(family)
+    if data is None:
+        data_path, _ = _paths(family)
+        data = np.load(data_path, mmap_mode="r")
+        _mapped[family] = data
+    instances = {}
+    for entry in index["instances"]:
+        size = entry["jobs"] * entry["ops"]
+        start = entry["offset"]
+        machines = data[start:start + size].reshape(entry["jobs"], entry["ops"])
+        durations = data[start + size:start + 2 * size].reshape(entry["jobs"], entry["ops"])
+        instances[entry["name"]] = JobShopInstance(machines, durations, name=entry["name"])
+    return instances
+
+
+# Function to look up the known optimum or (lower, upper) bounds of an
+# instance in the manifest; (None, None) when nothing is known
+def optimum_of(family, file_name):
+    for entry in family_index(family)["instances"]:
+        if entry["name"] == file_name:
+            return entry["optimum_lo"], entry["optimum_hi"]
+    return None, None
+
+
+# Function to return the jssp/ family an instance file belongs to, or None
+# for a file outside the corpus
+def family_of(file_path):
+    family_path = os.path.dirname(os.path.abspath(file_path))
+    family = os.path.basename(family_path)
+    if os.path.dirname(family_path) == JSSP_DIR and family in FAMILIES:
+        return family
+    return None
+
+
+# Function to load a single instance file, going through the cache when the
+# file belongs to one of the jssp/ families
+def load_path(file_path):
+    file_path = os.path.abspath(file_path)
+    file_name = os.path.basename(file_path)
+    family = family_of(file_path)
+    if family is not None:
+        instances = load_family(family)
+        if file_name in instances:
+            return instances[file_name]
+    return load_instance(file_path)
+
+
+# Function to return the manifest rows (one dict per instance, with its family)
+def manifest(families=FAMILIES):
+    rows = []
+    for family in families:
+        for entry in family_index(family)["instances"]:
+            row = dict(entry, family=family)
+            del row["offset"]
+            rows.append(row)
+    return rows
+
+
+# Function to select instances from the manifest, e.g. query(min_ops=300).
+# 'where' is an optional extra filter that receives the manifest row.
+def query(families=FAMILIES, min_ops=None, max_ops=None, min_jobs=None, max_jobs=None,
+          machines=None, open_only=False, where=None):
+    selected = []
+    for row in manifest(families):
+        if min_ops is not None and row["total_ops"] < min_ops:
+            continue
+        if max_ops is not None and row["total_ops"] > max_ops:
+            continue
+        if min_jobs is not None and row["jobs"] < min_jobs:
+            continue
+        if max_jobs is not None and row["jobs"] > max_jobs:
+            continue
+        if machines is not None and row["machines"] != machines:
+            continue
+        if open_only and row["optimum_lo"] is not None and row["optimum_lo"] == row["optimum_hi"]:
+            continue
+        if where is not None and not where(row):
+            continue
+        selected.append(row)
+    return selected
+
+
+# Function to print manifest rows as a table
+def print_manifest(rows):
+    print(f"{'family':10}{'instance':24}{'jobs':>6}{'mach':>6}{'ops':>7}{'work':>9}{'maxload':>9}{'optimum':>14}")
+    for row in rows:
+        if row["optimum_lo"] is None:
+            optimum = "-"
+        elif row["optimum_lo"] == row["optimum_hi"]:
+            optimum = str(row["optimum_lo"])
+        else:
+            optimum = f"{row['optimum_lo']}..{row['optimum_hi']}"
+        print(
+            f"{row['family']:10}{row['name']:24}{row['jobs']:>6}{row['machines']:>6}"
+            f"{row['total_ops']:>7}{row['total_work']:>9}{row['max_machine_load']:>9}{optimum:>14}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the jssp/ cache and query its manifest")
+    parser.add_argument("families", nargs="*", default=list(FAMILIES))
+    parser.add_argument("--rebuild", action="store_true", help="recompile even if the cache is fresh")
+    parser.add_argument("--min-ops", type=int)
+    parser.add_argument("--max-ops", type=int)
+    parser.add_argument("--open-only", action="store_true", help="only instances without a proven optimum")
+    args = parser.parse_args()
+
+    if args.rebuild:
+        for family in args.families:
+            compile_family(family)
+    print_manifest(query(args.families, min_ops=args.min_ops, max_ops=args.max_ops, open_only=args.open_only))
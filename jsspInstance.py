@@ -0,0 +1,346 @@
+import os
+import re
+import numpy as np
+
+# Shared loader for the .jss benchmark files under jssp/.
+#
+# A JobShopInstance keeps the whole matrix in two contiguous integer arrays,
+# machines[jobs, ops] and durations[jobs, ops]. The solver scripts were written
+# against a list of jobs where every job is a list of (machine, duration)
+# tuples, so the instance also behaves like that list: indexing, len() and
+# iteration return lightweight views that build the tuples on demand.
+
+# Operations of a job, seen as a read-only sequence of (machine, duration) tuples
+class JobView:
+    __slots__ = ("_machines", "_durations")
+
+    def __init__(self, machines, durations):
+        self._machines = machines
+        self._durations = durations
+
+    def __len__(self):
+        return len(self._machines)
+
+    def __getitem__(self, task_id):
+        if isinstance(task_id, slice):
+            return [self[i] for i in range(*task_id.indices(len(self)))]
+        return (int(self._machines[task_id]), int(self._durations[task_id]))
+
+    def __iter__(self):
+        return iter(zip(self._machines.tolist(), self._durations.tolist()))
+
+    def __repr__(self):
+        return repr(list(self))
+
+
+class JobShopInstance:
+    def __init__(self, machines, durations, name=None):
+        machines = np.ascontiguousarray(machines, dtype=np.int32)
+        durations = np.ascontiguousarray(durations, dtype=np.int32)
+        if machines.ndim != 2 or machines.shape != durations.shape:
+            raise ValueError(
+                f"machines and durations must be 2-D arrays of the same shape, "
+                f"got {machines.shape} and {durations.shape}"
+            )
+        self.machines = machines
+        self.durations = durations
+        self.name = name
+
+    @property
+    def num_jobs(self):
+        return self.machines.shape[0]
+
+    @property
+    def num_ops(self):
+        # Operations per job (every job of a .jss file visits each machine once)
+        return self.machines.shape[1]
+
+    @property
+    def num_machines(self):
+        return int(self.machines.max()) + 1 if self.machines.size else 0
+
+    @property
+    def total_ops(self):
+        return self.machines.size
+
+    # Plain list-of-lists-of-tuples copy, for code that really needs lists
+    @property
+    def jobs_data(self):
+        return [list(job) for job in self]
+
+    def __len__(self):
+        return self.machines.shape[0]
+
+    def __getitem__(self, job_id):
+        if isinstance(job_id, slice):
+            return [self[j] for j in range(*job_id.indices(len(self)))]
+        return JobView(self.machines[job_id], self.durations[job_id])
+
+    def __iter__(self):
+        for job_id in range(len(self)):
+            yield JobView(self.machines[job_id], self.durations[job_id])
+
+    def __bool__(self):
+        return self.machines.size > 0
+
+    def __repr__(self):
+        return (
+            f"JobShopInstance(name={self.name!r}, jobs={self.num_jobs}, "
+            f"machines={self.num_machines})"
+        )
+
+
+# Function to turn a list of jobs of (machine, duration) tuples into an instance
+def from_jobs_data(jobs_data, name=None):
+    if isinstance(jobs_data, JobShopInstance):
+        return jobs_data
+    table = np.asarray(jobs_data, dtype=np.int32)
+    if table.ndim != 3 or table.shape[2] != 2:
+        raise ValueError("every job must have the same number of (machine, duration) tasks")
+    return JobShopInstance(table[:, :, 0], table[:, :, 1], name=name)
+
+
+# Function to split the text of a file into its integer tokens, dropping the
+# "#" header blocks used by the ft, la, yn, ... files
+def _tokens(file_content):
+    lines = [
+        line for line in file_content.splitlines()
+        if line.strip() and not line.lstrip().startswith("#")
+    ]
+    try:
+        return np.array(" ".join(lines).split(), dtype=np.int64)
+    except ValueError:
+        raise ValueError("file contains non-integer data") from None
+
+
+# Function to parse the content of a .jss file:
+#   jobs machines
+#   m d m d ...   (one line per job)
+def parse_jss(file_content, name=None):
+    values = _tokens(file_content)
+    if values.size < 2:
+        raise ValueError("missing 'jobs machines' header line")
+    num_jobs, num_machines = int(values[0]), int(values[1])
+    expected = num_jobs * num_machines * 2
+    body = values[2:]
+    if body.size != expected:
+        raise ValueError(
+            f"expected {num_jobs}x{num_machines} (machine, duration) pairs, "
+            f"found {body.size} values"
+        )
+    table = body.reshape(num_jobs, num_machines, 2)
+    if table.size and (table[:, :, 0].min() < 0 or table[:, :, 0].max() >= num_machines):
+        raise ValueError(f"machine index out of range 0..{num_machines - 1}")
+    if table.size and table[:, :, 1].min() < 0:
+        raise ValueError("negative processing time")
+    return JobShopInstance(table[:, :, 0], table[:, :, 1], name=name)
+
+
+# Function to parse the content of a .fjs file in which every operation has a
+# single machine option (the car family): 'jobs machines avg_options' header,
+# then per job 'n_ops' followed by '1 machine duration' per operation, with
+# 1-based machines
+def parse_single_option_fjs(file_content, name=None):
+    values = _tokens(file_content)
+    if values.size < 2:
+        raise ValueError("missing 'jobs machines' header line")
+    num_jobs, num_machines = int(values[0]), int(values[1])
+    body = values[3:]
+    if body.size == 0 or body.size % num_jobs:
+        raise ValueError("jobs have different lengths")
+    rows = body.reshape(num_jobs, -1)
+    num_ops = rows[:, 0]
+    if (num_ops != num_ops[0]).any() or rows.shape[1] != 1 + 3 * num_ops[0]:
+        raise ValueError("jobs have different lengths")
+    table = rows[:, 1:].reshape(num_jobs, int(num_ops[0]), 3)
+    if (table[:, :, 0] != 1).any():
+        raise ValueError("operations with several machine options need a flexible job-shop solver")
+    machines = table[:, :, 1] - 1
+    if machines.min() < 0 or machines.max() >= num_machines:
+        raise ValueError(f"machine index out of range 1..{num_machines}")
+    return JobShopInstance(machines, table[:, :, 2], name=name)
+
+
+# Flexible job-shop instance: every operation can run on one of several
+# machines, each with its own processing time. Operations are numbered job
+# by job; the operations of job j are job_offsets[j]..job_offsets[j+1]-1 and
+# the machine options of operation o are option_offsets[o]..option_offsets[o+1]-1
+# in option_machines/option_durations (CSR layout, jobs may have different
+# numbers of operations).
+class FlexibleInstance:
+    def __init__(self, job_offsets, option_offsets, option_machines, option_durations, num_machines=None,
+                 name=None):
+        self.job_offsets = np.ascontiguousarray(job_offsets, dtype=np.int64)
+        self.option_offsets = np.ascontiguousarray(option_offsets, dtype=np.int64)
+        self.option_machines = np.ascontiguousarray(option_machines, dtype=np.int32)
+        self.option_durations = np.ascontiguousarray(option_durations, dtype=np.int32)
+        if self.option_machines.shape != self.option_durations.shape or \
+                self.option_offsets[-1] != self.option_machines.size:
+            raise ValueError("option machines, durations and offsets do not match")
+        if (np.diff(self.option_offsets) < 1).any():
+            raise ValueError("every operation needs at least one machine option")
+        if num_machines is None:
+            num_machines = int(self.option_machines.max()) + 1 if self.option_machines.size else 0
+        self.num_machines = num_machines
+        self.name = name
+        # Job and position in the job of every operation, and operation of
+        # every option
+        self.op_job = np.repeat(np.arange(self.num_jobs), np.diff(self.job_offsets))
+        self.op_task = np.arange(self.total_ops) - self.job_offsets[self.op_job]
+        self.option_op = np.repeat(np.arange(self.total_ops), np.diff(self.option_offsets))
+
+    @property
+    def num_jobs(self):
+        return self.job_offsets.size - 1
+
+    @property
+    def total_ops(self):
+        return self.option_offsets.size - 1
+
+    @property
+    def num_options(self):
+        return self.option_machines.size
+
+    # Shortest processing time of every operation over its machine options
+    @property
+    def min_durations(self):
+        return np.minimum.reduceat(self.option_durations.astype(np.int64), self.option_offsets[:-1])
+
+    # Nested list copy: jobs of operations of (machine, duration) options
+    @property
+    def jobs_data(self):
+        machines = self.option_machines.tolist()
+        durations = self.option_durations.tolist()
+        offsets = self.option_offsets.tolist()
+        return [
+            [list(zip(machines[offsets[o]:offsets[o + 1]], durations[offsets[o]:offsets[o + 1]]))
+             for o in range(self.job_offsets[j], self.job_offsets[j + 1])]
+            for j in range(self.num_jobs)
+        ]
+
+    def __repr__(self):
+        return (
+            f"FlexibleInstance(name={self.name!r}, jobs={self.num_jobs}, machines={self.num_machines}, "
+            f"ops={self.total_ops}, options={self.num_options})"
+        )
+
+
+# Function to parse the content of a flexible .fjs file (Brandimarte format):
+#   jobs machines avg_options
+#   n_ops  k m d m d ...  k m d ...   (one line per job, 1-based machines)
+def parse_fjs(file_content, name=None):
+    lines = [line for line in file_content.splitlines() if line.strip() and not line.lstrip().startswith("#")]
+    if not lines:
+        raise ValueError("missing 'jobs machines' header line")
+    # The average number of options in the header may be a decimal
+    header = lines[0].split()
+    if len(header) < 2:
+        raise ValueError("missing 'jobs machines' header line")
+    num_jobs, num_machines = int(header[0]), int(header[1])
+    values = _tokens("\n".join(lines[1:])).tolist()
+
+    job_offsets = [0]
+    option_offsets = [0]
+    option_machines = []
+    option_durations = []
+    position = 0
+    try:
+        for _ in range(num_jobs):
+            num_ops = values[position]
+            position += 1
+            for _ in range(num_ops):
+                num_options = values[position]
+                pairs = values[position + 1:position + 1 + 2 * num_options]
+                if len(pairs) != 2 * num_options:
+                    raise IndexError
+                option_machines.extend(pairs[0::2])
+                option_durations.extend(pairs[1::2])
+                position += 1 + 2 * num_options
+                option_offsets.append(len(option_machines))
+            job_offsets.append(len(option_offsets) - 1)
+    except IndexError:
+        raise ValueError(f"file ends before the operations of {num_jobs} jobs") from None
+    if position != len(values):
+        raise ValueError(f"{len(values) - position} values after the last job")
+
+    machines = np.array(option_machines, dtype=np.int64) - 1
+    if machines.size and (machines.min() < 0 or machines.max() >= num_machines):
+        raise ValueError(f"machine index out of range 1..{num_machines}")
+    if option_durations and min(option_durations) < 0:
+        raise ValueError("negative processing time")
+    return FlexibleInstance(job_offsets, option_offsets, machines, option_durations, num_machines, name=name)
+
+
+# Function to load a .fjs file as a FlexibleInstance (also the single-option
+# car files)
+def load_flexible_instance(file_path):
+    name = os.path.basename(file_path)
+    with open(file_path, "r") as file:
+        file_content = file.read()
+    try:
+        return parse_fjs(file_content, name=name)
+    except ValueError as e:
+        raise ValueError(f"{name}: {e}") from None
+
+
+# Function to load an instance file, picking the parser from the extension
+def load_instance(file_path):
+    name = os.path.basename(file_path)
+    with open(file_path, "r") as file:
+        file_content = file.read()
+    try:
+        if file_path.endswith(".fjs"):
+            return parse_single_option_fjs(file_content, name=name)
+        return parse_jss(file_content, name=name)
+    except ValueError as e:
+        raise ValueError(f"{name}: {e}") from None
+
+
+# Function to list the instance files of a folder in natural order (ta2 < ta10)
+def list_instances(folder_path):
+    def natural_key(file_name):
+        return [int(part) if part.isdigit() else part for part in re.split(r"(\d+)", file_name)]
+
+    files = [
+        f for f in os.listdir(folder_path)
+        if f.endswith(".jss") or f.endswith(".fjs")
+    ]
+    return sorted(files, key=natural_key)
+
+
+# Function to load every instance of a folder, keyed by file name
+def load_folder(folder_path):
+    return {
+        file_name: load_instance(os.path.join(folder_path, file_name))
+        for file_name in list_instances(folder_path)
+    }
+
+
+# Function to read the optimum/optimum.csv file of a family. Returns
+# {file name: (lower, upper)} where a known optimum has lower == upper and a
+# range like "1377..1396" keeps both bounds. Demirkol rows are named
+# "Dmu01_rcmax_20_15_4" and are mapped back to "rcmax_20_15_4.jss".
+def read_optimum_csv(csv_path):
+    optimum = {}
+    if not os.path.exists(csv_path):
+        return optimum
+    with open(csv_path, "r") as file:
+        for line in file:
+            parts = [p.strip() for p in line.split(",")]
+            if len(parts) < 2 or not parts[1]:
+                continue
+            problem, value = parts[0], parts[1]
+            try:
+                if ".." in value:
+                    low, high = (int(v) for v in value.split(".."))
+                else:
+                    low = high = int(value)
+            except ValueError:
+                # Header line
+                continue
+            if not problem.endswith((".jss", ".fjs")):
+                if problem.startswith("Dmu") and "_" in problem:
+                    problem = problem.split("_", 1)[1]
+                problem += ".jss"
+            optimum[problem] = (low, high)
+    return optimum
@@ -0,0 +1,272 @@
+import time
+import numpy as np
+from ortools.sat.python import cp_model
+from autoORTOOL import build_model, set_parameters
+from heuristics import best_dispatch
+from jsspInstance import from_jobs_data
+from lowerBounds import lower_bounds
+from searchReport import run_family, search_parser, search_report
+from trajectory import Incumbent
+
+# Large-neighborhood search over the CP-SAT job-shop model of autoORTOOL.py,
+# for instances (ta51-ta80, 1000-2000 operations) where one monolithic
+# solve stalls far from the best-known makespan.
+#
+# The model is built once. A short monolithic solve (INITIAL_SHARE of the
+# time) gives the first incumbent, or the best dispatching rule when it is
+# better. Every round then clones the model, frees a neighborhood of
+# operations, keeps the incumbent machine order of all other operations as
+# precedences, hints the incumbent, caps the makespan at the incumbent and
+# solves under a short time limit, without presolve (ROUND_PARAMS).
+# Neighborhoods:
+#   machines -- every operation of a random subset of machines
+#   window   -- every operation that runs in a random time window
+#   critical -- every operation of a subset of jobs, jobs with operations on
+#               a critical path of the incumbent first
+# A solution with the same makespan is accepted too, so the search can walk
+# along plateaus. The size of each neighborhood (a fraction of machines,
+# horizon or jobs) adapts to its outcome: it grows when the round proved
+# there is nothing better in it, and shrinks when the round ran out of time
+# without improving. The next neighborhood is drawn by its recent success
+# rate.
+#
+#   python lnsORTOOL.py taillard --min-ops 1000 --time-limit 300
+#   python lnsORTOOL.py taillard --names ta71 --time-limit 60 --round-time 2
+
+NEIGHBORHOODS = ("machines", "window", "critical")
+
+MIN_SIZE = 0.02
+MAX_SIZE = 0.8
+
+# Default parameters of every round. Presolve and the LP relaxation of the
+# whole precedence graph take longer than a round on 100x20 instances, and
+# with the makespan cap and the fixed orders there is little for either to
+# gain: the search starts at once instead of after half a second.
+ROUND_PARAMS = {"linearization_level": 0, "cp_model_presolve": False}
+
+# Default time of a round: a search over a few hundred free operations
+# needs about a second per 1000 operations of the whole model
+ROUND_SECONDS_PER_OP = 0.001
+
+# Share of the time limit given to the monolithic solve that starts the
+# search
+INITIAL_SHARE = 0.1
+
+
+# Function to mark the operations of one critical path of a schedule: from
+# an operation that ends at the makespan, walk back through job or machine
+# predecessors that end exactly when the operation starts
+def critical_path(instance, starts):
+    durations = instance.durations.ravel().astype(np.int64)
+    machines = instance.machines.ravel()
+    starts = np.asarray(starts, dtype=np.int64).ravel()
+    ends = starts + durations
+    num_ops = instance.num_ops
+
+    order = np.lexsort((starts, machines))
+    machine_prev = np.full(len(starts), -1)
+    same = machines[order[1:]] == machines[order[:-1]]
+    machine_prev[order[1:][same]] = order[:-1][same]
+
+    critical = np.zeros(len(starts), dtype=bool)
+    op = int(np.argmax(ends))
+    while True:
+        critical[op] = True
+        start = starts[op]
+        if start == 0:
+            break
+        if op % num_ops and ends[op - 1] == start:
+            op -= 1
+        elif machine_prev[op] >= 0 and ends[machine_prev[op]] == start:
+            op = int(machine_prev[op])
+        else:
+            break
+    return critical
+
+
+# Function to choose the operations (a flat [jobs * ops] mask) to free in
+# one round
+def neighborhood(kind, size, instance, starts, rng):
+    starts = np.asarray(starts, dtype=np.int64).ravel()
+    if kind == "machines":
+        count = max(2, round(size * instance.num_machines))
+        chosen = rng.choice(instance.num_machines, min(count, instance.num_machines), replace=False)
+        return np.isin(instance.machines.ravel(), chosen)
+    if kind == "window":
+        ends = starts + instance.durations.ravel()
+        makespan = int(ends.max())
+        width = max(1, round(size * makespan))
+        begin = int(rng.integers(0, max(1, makespan - width) + 1))
+        return (starts < begin + width) & (ends > begin)
+    if kind == "critical":
+        count = max(2, round(size * instance.num_jobs))
+        critical_jobs = np.unique(np.flatnonzero(critical_path(instance, starts)) // instance.num_ops)
+        other_jobs = np.setdiff1d(np.arange(instance.num_jobs), critical_jobs)
+        jobs = np.concatenate([rng.permutation(critical_jobs), rng.permutation(other_jobs)])[:count]
+        return np.isin(np.repeat(np.arange(instance.num_jobs), instance.num_ops), jobs)
+    raise ValueError(f"unknown neighborhood {kind!r}, expected one of {NEIGHBORHOODS}")
+
+
+# Function to build the model of one round: the base model, the incumbent
+# order of the fixed operations on every machine, the makespan cap and the
+# incumbent as hint
+def round_model(base, layout, instance, starts, free, makespan):
+    model = base.clone()
+    model.clear_hints()
+    start_vars = [model.get_int_var_from_proto_index(index) for index in layout["start"].tolist()]
+    end_vars = [model.get_int_var_from_proto_index(index) for index in layout["end"].tolist()]
+    obj_var = model.get_int_var_from_proto_index(layout["makespan"])
+
+    flat_starts = np.asarray(starts, dtype=np.int64).ravel()
+    fixed = np.flatnonzero(~free)
+    machines = instance.machines.ravel()[fixed]
+    order = fixed[np.lexsort((flat_starts[fixed], machines))]
+    sorted_machines = np.sort(machines)
+    same = sorted_machines[1:] == sorted_machines[:-1]
+    for first, second in zip(order[:-1][same].tolist(), order[1:][same].tolist()):
+        model.add(start_vars[second] >= end_vars[first])
+    model.add(obj_var <= makespan)
+
+    ends = flat_starts + instance.durations.ravel()
+    for var, value in zip(start_vars, flat_starts.tolist()):
+        model.add_hint(var, value)
+    for var, value in zip(end_vars, ends.tolist()):
+        model.add_hint(var, value)
+    model.add_hint(obj_var, makespan)
+    return model, start_vars
+
+
+# OR-Tools LNS job-shop solver function
+#   time_limit   -- total seconds for the search
+#   round_time   -- seconds per neighborhood solve (None = one per 1000
+#                   operations, at least one)
+#   initial_time -- seconds of a monolithic solve before the first round
+#                   (None = INITIAL_SHARE of time_limit, 0 = no such solve)
+#   hint         -- start times ([jobs, ops]) to start from instead of the
+#                   best dispatching-rule schedule
+#   neighborhoods -- the neighborhood kinds to draw from
+#   size         -- initial size of every neighborhood
+#   params       -- CP-SAT parameters of every solve as {name: value}, on
+#                   top of ROUND_PARAMS in the rounds
+#   seed         -- seed of the neighborhood choices
+#   stats        -- optional dict that receives timings, the result, the
+#                   incumbent trajectory, the rounds and the Schedule
+def solve_lns(jobs_data, time_limit=60, round_time=None, initial_time=None, hint=None,
+              neighborhoods=NEIGHBORHOODS, size=0.15, num_workers=None, params=None, seed=0,
+              known_optimum=None, stats=None):
+    inicio = time.time()
+    instance = from_jobs_data(jobs_data)
+    rng = np.random.default_rng(seed)
+
+    heuristic = best_dispatch(instance) if hint is None else None
+    starts = heuristic.starts if hint is None else np.asarray(hint, dtype=np.int64)
+    best = int((starts + instance.durations).max())
+    heuristic_time = time.time() - inicio
+    bounds = lower_bounds(instance)
+    lower_bound = bounds.best
+
+    # The base model: variable domains up to the starting makespan
+    base, all_tasks, obj_var = build_model(instance, best, min(lower_bound, best))
+    layout = {
+        "start": np.array([[all_tasks[job_id, task_id].start.index for task_id in range(instance.num_ops)]
+                           for job_id in range(instance.num_jobs)]).ravel(),
+        "end": np.array([[all_tasks[job_id, task_id].end.index for task_id in range(instance.num_ops)]
+                         for job_id in range(instance.num_jobs)]).ravel(),
+        "makespan": obj_var.index,
+    }
+    build_time = time.time() - inicio - heuristic_time
+
+    def new_solver(seconds, round_id):
+        solver = cp_model.CpSolver()
+        set_parameters(solver, {**ROUND_PARAMS, **(params or {})} if round_id else params or {})
+        if num_workers:
+            solver.parameters.num_workers = num_workers
+        solver.parameters.max_time_in_seconds = seconds
+        solver.parameters.random_seed = round_id
+        return solver
+
+    trajectory = [Incumbent(time.time() - inicio, best, lower_bound)]
+    proven = False
+
+    # Monolithic start: CP-SAT's own first solutions of the full model, not
+    # hinted, often beat the dispatching rules by a wide margin on 50x20 and
+    # 100x20 instances; the better of the two starts the rounds
+    if initial_time is None:
+        initial_time = INITIAL_SHARE * time_limit
+    if initial_time:
+        model = base.clone()
+        model.clear_hints()
+        start_vars = [model.get_int_var_from_proto_index(index) for index in layout["start"].tolist()]
+        solver = new_solver(min(initial_time, max(0.0, time_limit - (time.time() - inicio))), 0)
+        status = solver.solve(model)
+        if status in (cp_model.OPTIMAL, cp_model.FEASIBLE) and int(solver.objective_value) <= best:
+            starts = np.array([solver.value(var) for var in start_vars]).reshape(instance.machines.shape)
+            if int(solver.objective_value) < best:
+                best = int(solver.objective_value)
+                trajectory.append(Incumbent(time.time() - inicio, best, lower_bound))
+            proven = status == cp_model.OPTIMAL
+
+    if round_time is None:
+        round_time = max(1.0, ROUND_SECONDS_PER_OP * instance.total_ops)
+    sizes = dict.fromkeys(neighborhoods, size)
+    success = dict.fromkeys(neighborhoods, 1.0)
+    counts = {kind: [0, 0] for kind in neighborhoods}
+    rounds = 0
+    while not proven and best > lower_bound:
+        remaining = time_limit - (time.time() - inicio)
+        if remaining <= 0.01:
+            break
+        rounds += 1
+        weights = np.array([success[kind] + 0.05 for kind in neighborhoods])
+        kind = neighborhoods[rng.choice(len(neighborhoods), p=weights / weights.sum())]
+        free = neighborhood(kind, sizes[kind], instance, starts, rng)
+
+        model, start_vars = round_model(base, layout, instance, starts, free, best)
+        solver = new_solver(min(round_time, remaining), rounds)
+        status = solver.solve(model)
+
+        improved = False
+        if status in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+            starts = np.array([solver.value(var) for var in start_vars]).reshape(instance.machines.shape)
+            makespan = int(solver.objective_value)
+            improved = makespan < best
+            if improved:
+                best = makespan
+                trajectory.append(Incumbent(time.time() - inicio, best, lower_bound))
+            # Everything free and nothing better: the incumbent is optimal
+            proven = status == cp_model.OPTIMAL and free.all()
+        counts[kind][0] += 1
+        counts[kind][1] += improved
+        success[kind] = 0.9 * success[kind] + 0.1 * improved
+        if not improved:
+            if status in (cp_model.OPTIMAL, cp_model.INFEASIBLE):
+                sizes[kind] = min(MAX_SIZE, sizes[kind] * 1.25)
+            else:
+                sizes[kind] = max(MIN_SIZE, sizes[kind] * 0.8)
+
+    optimal = proven or best <= lower_bound
+    lines = [f"rounds: {rounds} ({round_time}s each)"] + [
+        f"{kind}: {counts[kind][0]} rounds, {counts[kind][1]} improving, size {sizes[kind]:.3f}"
+        for kind in neighborhoods
+    ]
+    counters = dict(
+        rounds=rounds,
+        neighborhoods={kind: {"rounds": counts[kind][0], "improving": counts[kind][1], "size": sizes[kind]}
+                       for kind in neighborhoods},
+    )
+    return search_report(instance, starts, trajectory, optimal, bounds, heuristic, inicio, heuristic_time,
+                         build_time, lines, counters, known_optimum, stats)
+
+
+if __name__ == "__main__":
+    parser = search_parser("Solve job-shop instances with CP-SAT large-neighborhood search")
+    parser.add_argument("--round-time", type=float,
+                        help="time per neighborhood solve, in seconds (default: 1 per 1000 operations)")
+    parser.add_argument("--initial-time", type=float, help="seconds of monolithic solve before the first round (default: 10%% of the time limit)")
+    parser.add_argument("--workers", type=int, help="CP-SAT num_workers of every sub-solve")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    run_family(args, lambda jobs_data, known_optimum: solve_lns(
+        jobs_data, args.time_limit, args.round_time, args.initial_time, num_workers=args.workers, seed=args.seed,
+        known_optimum=known_optimum))
@@ -0,0 +1,121 @@
+import collections
+import numpy as np
+from jsspInstance import from_jobs_data
+
+# Makespan lower bounds computed from a parsed instance.
+#
+# Every operation gets a head (work that must precede it in its job) and a
+# tail (work that must follow it). Three bounds are derived from them:
+#   job      -- the longest job
+#   machine  -- for every machine, smallest head + machine load + smallest tail
+#   jackson  -- the one-machine preemptive (Jackson) bound with heads and tails
+# The preemptive one-machine optimum equals the largest value of
+# min head + total duration + min tail over the operation sets
+# {k : head_k >= a, tail_k >= b} (Carlier), so it is evaluated for all (a, b)
+# pairs at once with one matrix product per machine instead of simulating
+# the Jackson schedule.
+
+LowerBounds = collections.namedtuple("LowerBounds", "job machine jackson best")
+
+
+# Function to compute the heads and tails of every operation, [jobs, ops] arrays
+def heads_and_tails(jobs_data):
+    instance = from_jobs_data(jobs_data)
+    durations = instance.durations.astype(np.int64)
+    ends = np.cumsum(durations, axis=1)
+    heads = ends - durations
+    tails = ends[:, -1:] - ends
+    return heads, tails
+
+
+# Function to compute the Jackson preemptive bound of one machine from the
+# heads, durations and tails of its operations (1-D arrays)
+def one_machine_bound(heads, durations, tails):
+    if heads.size == 0:
+        return 0
+    # above_head[a, k]: operation k has head >= head of a (same for tails)
+    above_head = (heads[None, :] >= heads[:, None]).astype(np.int64)
+    above_tail = (tails[None, :] >= tails[:, None]).astype(np.int64)
+    work = (above_head * durations[None, :]) @ above_tail.T
+    count = above_head @ above_tail.T
+    values = heads[:, None] + work + tails[None, :]
+    return int(values[count > 0].max())
+
+
+# Function to compute all lower bounds of an instance
+def lower_bounds(jobs_data):
+    instance = from_jobs_data(jobs_data)
+    durations = instance.durations.astype(np.int64)
+    heads, tails = heads_and_tails(instance)
+
+    job_bound = int(durations.sum(axis=1).max()) if durations.size else 0
+
+    flat_machines = instance.machines.ravel()
+    flat_heads = heads.ravel()
+    flat_durations = durations.ravel()
+    flat_tails = tails.ravel()
+    num_machines = instance.num_machines
+
+    load = np.bincount(flat_machines, weights=flat_durations, minlength=num_machines).astype(np.int64)
+    min_head = np.full(num_machines, np.iinfo(np.int64).max)
+    min_tail = np.full(num_machines, np.iinfo(np.int64).max)
+    np.minimum.at(min_head, flat_machines, flat_heads)
+    np.minimum.at(min_tail, flat_machines, flat_tails)
+    used = load > 0
+    machine_bound = int((min_head + load + min_tail)[used].max()) if used.any() else 0
+
+    order = np.argsort(flat_machines, kind="stable")
+    splits = np.cumsum(np.bincount(flat_machines, minlength=num_machines))[:-1]
+    jackson_bound = 0
+    for ops in np.split(order, splits):
+        jackson_bound = max(
+            jackson_bound,
+            one_machine_bound(flat_heads[ops], flat_durations[ops], flat_tails[ops]),
+        )
+
+    best = max(job_bound, machine_bound, jackson_bound)
+    return LowerBounds(job_bound, machine_bound, jackson_bound, best)
+
+
+# Function to compute the heads and tails of every operation of a flexible
+# instance ([total ops] arrays) from the shortest option of every operation
+def flexible_heads_and_tails(instance):
+    min_durations = instance.min_durations
+    ends = np.cumsum(min_durations)
+    job_first = instance.job_offsets[:-1][instance.op_job]
+    job_last = instance.job_offsets[1:][instance.op_job] - 1
+    heads = ends - min_durations - (ends[job_first] - min_durations[job_first])
+    tails = ends[job_last] - ends
+    return heads, tails
+
+
+# Function to compute lower bounds of a flexible job-shop instance from the
+# shortest option of every operation:
+#   job      -- the longest job
+#   machine  -- the total work spread evenly over all machines, or the work a
+#               machine must do alone (operations with a single option)
+def flexible_lower_bounds(instance):
+    min_durations = instance.min_durations
+    job_bound = int(np.bincount(instance.op_job, weights=min_durations, minlength=instance.num_jobs).max()) \
+        if instance.total_ops else 0
+    machine_bound = -(-int(min_durations.sum()) // max(1, instance.num_machines))
+    single = np.diff(instance.option_offsets) == 1
+    if single.any():
+        options = instance.option_offsets[:-1][single]
+        load = np.bincount(instance.option_machines[options], weights=instance.option_durations[options],
+                           minlength=instance.num_machines)
+        machine_bound = max(machine_bound, int(load.max()))
+    best = max(job_bound, machine_bound)
+    return LowerBounds(job_bound, machine_bound, 0, best)
+
+
+# Function to compute the relative gap between a makespan and a lower bound
+def gap(makespan, bound):
+    if makespan is None or bound is None or makespan <= 0:
+        return None
+    return max(0.0, (makespan - bound) / makespan)
+
+
+# Function to format a gap for the reports
+def format_gap(value):
+    return "-" if value is None else f"{100 * value:.2f}%"
@@ -0,0 +1,168 @@
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import numpy as np
+from jsspCache import CACHE_DIR
+from jsspInstance import from_jobs_data
+
+# On-disk cache of built solver models.
+#
+# A model is keyed by the hash of the instance arrays and by every option
+# that changes the model (formulation, disjunction mode, horizon, lower
+# bound, ...). Solver parameters, time limits and warm starts are applied
+# after loading and are not part of the key. Every entry is two files under
+# jssp/.cache/models/:
+#   <key>.mps   -- the Gurobi model, read back with gp.read
+#   <key>.pbtxt -- the CP-SAT CpModelProto in text format (the Python proto
+#                  of OR-Tools 9.15 can parse text but not binary protos).
+#                  Parsing takes about as long as building the CpModel, so
+#                  this side is for reproducibility, not speed.
+#   <key>.npz   -- the layout: the variable indices of the operation starts,
+#                  ends, binaries and the makespan
+# Bump MODEL_CACHE_VERSION whenever a builder changes the model it makes.
+
+MODEL_CACHE_DIR = os.path.join(CACHE_DIR, "models")
+MODEL_CACHE_VERSION = 1
+
+
+# Function to hash the machines and durations of an instance
+def instance_hash(jobs_data):
+    instance = from_jobs_data(jobs_data)
+    digest = hashlib.sha1()
+    digest.update(np.asarray(instance.machines.shape, dtype=np.int64).tobytes())
+    digest.update(np.ascontiguousarray(instance.machines, dtype=np.int32).tobytes())
+    digest.update(np.ascontiguousarray(instance.durations, dtype=np.int32).tobytes())
+    return digest.hexdigest()
+
+
+# Function to build the cache key of a model from the instance and the
+# options it was built with; option values must be JSON-serializable
+def model_key(backend, jobs_data, **options):
+    description = json.dumps(
+        {"version": MODEL_CACHE_VERSION, "backend": backend, "instance": instance_hash(jobs_data),
+         "options": options},
+        sort_keys=True, default=int,
+    )
+    return f"{backend}-{hashlib.sha1(description.encode()).hexdigest()}"
+
+
+def _paths(key, extension):
+    return (
+        os.path.join(MODEL_CACHE_DIR, key + extension),
+        os.path.join(MODEL_CACHE_DIR, key + ".npz"),
+    )
+
+
+# Function to write the layout next to a model, through a temporary name so a
+# crash never leaves a half-written entry behind
+def _save_layout(layout_path, layout):
+    with open(layout_path + ".tmp", "wb") as file:
+        np.savez(file, **{name: np.asarray(values, dtype=np.int64) for name, values in layout.items()})
+    os.replace(layout_path + ".tmp", layout_path)
+
+
+def _load_layout(layout_path):
+    with np.load(layout_path) as layout:
+        return {name: layout[name] for name in layout.files}
+
+
+# Function to save a built Gurobi JobShopModel
+def save_gurobi_model(key, job_shop_model):
+    model_path, layout_path = _paths(key, ".mps")
+    os.makedirs(MODEL_CACHE_DIR, exist_ok=True)
+    model = job_shop_model.model
+    model.update()
+    # Gurobi picks the file format from the extension, so it has to stay last
+    tmp_path = model_path[:-len(".mps")] + f".tmp{os.getpid()}.mps"
+    model.write(tmp_path)
+    os.replace(tmp_path, model_path)
+    _save_layout(layout_path, {
+        name: [var.index for var in getattr(job_shop_model, name).tolist()]
+        for name in ("start", "end", "binaries", "makespan")
+    })
+
+
+# Logging parameters of the quiet environment a cached model is read in
+_LOG_PARAMS = ("LogFile", "LogToConsole", "OutputFlag")
+
+
+# Function to load a cached Gurobi model as a JobShopModel, or None on a
+# miss. binary_start is None: a warm start on a cached model sets the
+# starts, ends and makespan and Gurobi completes the binaries. params are
+# the caller's solver parameters.
+def load_gurobi_model(key, params=None):
+    import gurobipy as gp
+    from gurobiModels import JobShopModel
+
+    model_path, layout_path = _paths(key, ".mps")
+    if not (os.path.exists(model_path) and os.path.exists(layout_path)):
+        return None
+    # Read quietly, then log the solve like a freshly built model would: with
+    # the caller's logging parameters, or those of the default environment
+    env = gp.Env(params={"OutputFlag": 0})
+    model = gp.read(model_path, env=env)
+    for name in _LOG_PARAMS:
+        value = (params or {}).get(name, gp.getParamInfo(name)[2])
+        if value != model.getParamInfo(name)[2]:
+            model.setParam(name, value)
+    layout = _load_layout(layout_path)
+    columns = model.getVars()
+
+    def mvar(name):
+        return gp.MVar.fromlist([columns[i] for i in layout[name].tolist()])
+
+    return JobShopModel(model, mvar("start"), mvar("end"), mvar("binaries"), mvar("makespan"), None)
+
+
+# Function to save a built CpModel with the proto indices of its start and
+# end variables ([jobs, ops] arrays) and of the makespan
+def save_cp_model(key, model, starts, ends, makespan):
+    model_path, layout_path = _paths(key, ".pbtxt")
+    os.makedirs(MODEL_CACHE_DIR, exist_ok=True)
+    tmp_path = model_path + f".tmp{os.getpid()}.pbtxt"
+    if not model.export_to_file(tmp_path):
+        raise OSError(f"could not write {tmp_path}")
+    os.replace(tmp_path, model_path)
+    _save_layout(layout_path, {"start": starts, "end": ends, "makespan": [makespan]})
+
+
+# Function to load a cached CpModel, or None on a miss. Returns the model and
+# its layout: start and end proto indices as [jobs, ops] arrays and the
+# makespan index.
+def load_cp_model(key):
+    from ortools.sat.python import cp_model
+
+    model_path, layout_path = _paths(key, ".pbtxt")
+    if not (os.path.exists(model_path) and os.path.exists(layout_path)):
+        return None
+    model = cp_model.CpModel()
+    with open(model_path, "r") as file:
+        model.proto.parse_text_format(file.read())
+    return model, _load_layout(layout_path)
+
+
+# Function to report the number and size of the cached models
+def cache_summary():
+    if not os.path.isdir(MODEL_CACHE_DIR):
+        return 0, 0
+    entries = [f for f in os.listdir(MODEL_CACHE_DIR) if f.endswith((".mps", ".pbtxt"))]
+    size = sum(os.path.getsize(os.path.join(MODEL_CACHE_DIR, f)) for f in os.listdir(MODEL_CACHE_DIR))
+    return len(entries), size
+
+
+# Function to delete every cached model
+def clear_models():
+    shutil.rmtree(MODEL_CACHE_DIR, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Inspect or clear the cache of built solver models")
+    parser.add_argument("--clear", action="store_true", help="delete every cached model")
+    args = parser.parse_args()
+
+    if args.clear:
+        clear_models()
+    count, size = cache_summary()
+    print(f"{count} cached models, {size / 2 ** 20:.1f} MB in {MODEL_CACHE_DIR}")
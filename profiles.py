@@ -0,0 +1,193 @@
+import json
+import math
+import os
+import random
+import statistics
+from jsspCache import load_family, query
+from jsspInstance import from_jobs_data
+
+# Solver parameter profiles, chosen by instance family and size class.
+#
+# A profile file (profiles/<solver>.json) maps "<family>/<size class>" to
+# the parameters that won a tuning run, together with the tuning report:
+#   {"taillard/large": {"params": {...}, "report": {...}}, ...}
+# Either part of the key may be "*". A lookup tries the exact family and
+# size class first, then the family for any size, then the size class for
+# any family. An instance without a matching profile runs with the solver
+# defaults.
+#
+# The tuners (cpsatTuning.py, gurobiTuning.py) share the sweep below: a
+# seeded sample of parameter sets from a search space, the defaults always
+# first, run on a seeded training subset of one family and size class. A
+# run scores its time to optimal, or twice the time limit when it does not
+# prove optimality (PAR2), and a parameter set the median over the
+# instances.
+#   random  -- every parameter set runs on every instance with the full
+#              time limit
+#   halving -- successive halving: all sets start with a short time limit,
+#              the better half moves on with twice the limit, until the
+#              last round runs with the full limit
+
+PROFILE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "profiles")
+
+# Size classes by total number of operations (15x15 is medium, 30x20 large)
+SIZE_CLASSES = (("small", 200), ("medium", 500), ("large", None))
+
+
+# Function to return the size class of an instance
+def size_class(jobs_data):
+    total_ops = from_jobs_data(jobs_data).total_ops
+    for name, max_ops in SIZE_CLASSES:
+        if max_ops is None or total_ops <= max_ops:
+            return name
+
+
+def profile_path(solver):
+    return os.path.join(PROFILE_DIR, f"{solver}.json")
+
+
+# Function to read the profiles of a solver; {} when none were saved
+def load_profiles(solver):
+    path = profile_path(solver)
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r") as file:
+        return json.load(file)
+
+
+# Function to save the winning parameters of a tuning run, keeping the
+# profiles of the other families and size classes
+def save_profile(solver, family, size, params, report=None):
+    profiles = load_profiles(solver)
+    profiles[f"{family}/{size}"] = {"params": params, "report": report or {}}
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    path = profile_path(solver)
+    with open(path + ".tmp", "w") as file:
+        json.dump(profiles, file, indent=1, sort_keys=True)
+    os.replace(path + ".tmp", path)
+
+
+# Function to look up the parameters for an instance; None when no profile
+# matches. family may be None for instances outside jssp/.
+def profile_for(solver, jobs_data, family=None):
+    profiles = load_profiles(solver)
+    size = size_class(jobs_data)
+    for key in (f"{family}/{size}", f"{family}/*", f"*/{size}", "*/*"):
+        if key.startswith("None/"):
+            continue
+        if key in profiles:
+            return dict(profiles[key]["params"])
+    return None
+
+
+# Function to draw count distinct parameter sets from a search space
+# ({name: [values]}), the defaults ({}) first
+def sample_configs(search_space, count, seed):
+    rng = random.Random(seed)
+    configs = [{}]
+    seen = set()
+    attempts = 0
+    while len(configs) < count and attempts < 100 * count:
+        attempts += 1
+        config = {name: rng.choice(values) for name, values in search_space.items()}
+        key = tuple(sorted(config.items()))
+        if key not in seen:
+            seen.add(key)
+            configs.append(config)
+    return configs
+
+
+# Function to pick a seeded training subset of a family within a size class
+def training_set(family, size, count, seed):
+    instances = load_family(family)
+    names = [row["name"] for row in query([family]) if size_class(instances[row["name"]]) == size]
+    rng = random.Random(seed)
+    if count and len(names) > count:
+        names = sorted(rng.sample(names, count), key=names.index)
+    return names
+
+
+# Function to score a run: its time to optimal, or twice the time limit
+def par2(time_to_optimal, time_limit):
+    return time_to_optimal if time_to_optimal is not None else 2 * time_limit
+
+
+# Function to run every parameter set with the full time limit. evaluate is
+# called as evaluate(config, time_limit) and returns one score per training
+# instance. Returns [(median score, config)] best first.
+def random_search(configs, evaluate, time_limit, log=print):
+    results = []
+    for number, config in enumerate(configs):
+        score = statistics.median(evaluate(config, time_limit))
+        log(f"  [{number + 1}/{len(configs)}] {score:9.3f}s  {config or 'defaults'}")
+        results.append((score, number, config))
+    results.sort(key=lambda result: result[:2])
+    return [(score, config) for score, _, config in results]
+
+
+# Function to run successive halving; returns the survivors of the last
+# round as [(median score, config)] best first
+def successive_halving(configs, evaluate, time_limit, eta=2, log=print):
+    rounds = max(1, math.ceil(math.log(len(configs), eta)))
+    survivors = list(enumerate(configs))
+    for round_number in range(rounds):
+        budget = time_limit / eta ** (rounds - 1 - round_number)
+        log(f"  round {round_number + 1}/{rounds}: {len(survivors)} sets, {budget:.2f}s per solve")
+        results = []
+        for number, config in survivors:
+            score = statistics.median(evaluate(config, budget))
+            log(f"    {score:9.3f}s  {config or 'defaults'}")
+            results.append((score, number, config))
+        results.sort(key=lambda result: result[:2])
+        if round_number == rounds - 1:
+            return [(score, config) for score, _, config in results]
+        survivors = [(number, config) for _, number, config in results[:max(1, math.ceil(len(results) / eta))]]
+
+
+SEARCHES = {"random": random_search, "halving": successive_halving}
+
+
+# Function to run a sweep for one family and size class and save the
+# winner, with the defaults scored on the same instances for comparison.
+# evaluate is called as evaluate(config, names, time_limit).
+def sweep(solver, search_space, evaluate, family, size, strategy="halving", configs=16, train=5, time_limit=30,
+          seed=0, log=print):
+    names = training_set(family, size, train, seed)
+    if not names:
+        log(f"{family}/{size}: no instances")
+        return None
+    log(f"{family}/{size}: {strategy} over {configs} parameter sets on {', '.join(names)}")
+
+    def score(config, budget):
+        return evaluate(config, names, budget)
+
+    ranking = SEARCHES[strategy](sample_configs(search_space, configs, seed), score, time_limit, log=log)
+    best_score, best = ranking[0]
+    default_score = next((value for value, config in ranking if not config), None)
+    if default_score is None:
+        default_score = statistics.median(score({}, time_limit))
+    log(f"{family}/{size}: best {best_score:.3f}s {best or 'defaults'}, defaults {default_score:.3f}s")
+
+    save_profile(solver, family, size, best, {
+        "strategy": strategy,
+        "seed": seed,
+        "configs": configs,
+        "time_limit": time_limit,
+        "instances": names,
+        "median_par2": best_score,
+        "default_median_par2": default_score,
+    })
+    return best
+
+
+# Function to print the saved profiles of a solver
+def print_profiles(solver):
+    profiles = load_profiles(solver)
+    print(f"{len(profiles)} profiles in {profile_path(solver)}")
+    for key, profile in sorted(profiles.items()):
+        report = profile["report"]
+        if "median_par2" in report:
+            print(f"{key:20} {report['median_par2']:9.3f}s (defaults "
+                  f"{report['default_median_par2']:.3f}s)  {profile['params'] or 'defaults'}")
+        else:
+            print(f"{key:20} {'':>10}  {profile['params'] or 'defaults'}")
@@ -0,0 +1,295 @@
+import argparse
+import csv
+import datetime
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+import uuid
+import numpy as np
+from jsspCache import load_family
+from modelCache import instance_hash
+from schedule import FORMATS, Schedule
+
+# Append-only results database.
+#
+# Every solve of the batch runs (autoORTOOL.py, autoGurobi.py) is one row of
+# the "runs" table of a SQLite file, Results/results.sqlite by default. Rows
+# are only ever inserted. A row holds the instance (family, file name and
+# the hash of its arrays), the backend, the solver parameters and run
+# options as JSON, the status, makespan, bound, timings, conflicts and
+# branches (the node count for Gurobi) and the start times as a
+# [jobs, ops] int32 blob. "config" hashes the backend, parameters and
+# options, so the runs of one configuration are a single WHERE clause away.
+# Rows are written in batches, one transaction per batch.
+#
+#   python resultsDb.py summary
+#   python resultsDb.py export results.csv --where "backend = 'ortools' AND family = 'taillard'"
+#   python resultsDb.py export results.xlsx
+#   python resultsDb.py schedule 42 --format csv --output ta01.csv
+
+RESULTS_DB = os.path.join(os.path.dirname(os.path.abspath(__file__)), "Results", "results.sqlite")
+
+COLUMNS = (
+    ("created", "TEXT NOT NULL"),
+    ("batch", "TEXT"),
+    ("backend", "TEXT NOT NULL"),
+    ("family", "TEXT"),
+    ("instance", "TEXT NOT NULL"),
+    ("instance_hash", "TEXT NOT NULL"),
+    ("jobs", "INTEGER"),
+    ("machines", "INTEGER"),
+    ("config", "TEXT NOT NULL"),
+    ("params", "TEXT"),
+    ("options", "TEXT"),
+    ("status", "TEXT"),
+    ("makespan", "REAL"),
+    ("bound", "REAL"),
+    ("gap", "REAL"),
+    ("known_lo", "INTEGER"),
+    ("known_hi", "INTEGER"),
+    ("horizon", "INTEGER"),
+    ("heuristic_time", "REAL"),
+    ("build_time", "REAL"),
+    ("solve_time", "REAL"),
+    ("time_to_optimal", "REAL"),
+    ("first_incumbent_time", "REAL"),
+    ("conflicts", "INTEGER"),
+    ("branches", "INTEGER"),
+    ("starts", "BLOB"),
+)
+NAMES = tuple(name for name, _ in COLUMNS)
+
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    {", ".join(f"{name} {kind}" for name, kind in COLUMNS)}
+);
+CREATE INDEX IF NOT EXISTS runs_instance ON runs (instance_hash, backend, config);
+CREATE INDEX IF NOT EXISTS runs_family ON runs (family, instance);
+CREATE INDEX IF NOT EXISTS runs_batch ON runs (batch);
+"""
+
+
+# Function to open (and create if needed) a results database
+def connect(path=RESULTS_DB):
+    folder = os.path.dirname(path)
+    if folder:
+        os.makedirs(folder, exist_ok=True)
+    connection = sqlite3.connect(path)
+    connection.row_factory = sqlite3.Row
+    # WAL lets exports and queries read while a batch run is writing
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.executescript(SCHEMA)
+    return connection
+
+
+# Function to give a batch run its id
+def new_batch():
+    return f"{datetime.datetime.now():%Y%m%d-%H%M%S}-{uuid.uuid4().hex[:8]}"
+
+
+def _json(value):
+    return json.dumps(value, sort_keys=True, default=str)
+
+
+# Function to hash the configuration of a run: the backend, the solver
+# parameters and the run options
+def config_hash(backend, params=None, options=None):
+    description = _json({"backend": backend, "params": params or {}, "options": options or {}})
+    return hashlib.sha1(description.encode()).hexdigest()[:16]
+
+
+# Gurobi reports its status as a number
+def _status_name(status):
+    if not isinstance(status, int):
+        return status
+    from gurobipy import GRB
+    names = {getattr(GRB.Status, name): name for name in dir(GRB.Status) if name.isupper()}
+    return names.get(status, str(status))
+
+
+def _number(value):
+    return None if value is None else float(value)
+
+
+# Function to turn the stats dict of a solve_jobshop call into a row.
+# options are the run options that are not solver parameters (time limit,
+# warm start, formulation, ...); they must be JSON-serializable.
+def run_row(backend, family, instance, jobs_data, stats, options=None, batch=None):
+    known_lo, known_hi = stats.get("known_optimum") or (None, None)
+    starts = stats.get("starts")
+    params = stats.get("params")
+    return {
+        "created": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+        "batch": batch,
+        "backend": backend,
+        "family": family,
+        "instance": instance,
+        "instance_hash": instance_hash(jobs_data),
+        "jobs": len(jobs_data),
+        "machines": 1 + max(task[0] for job in jobs_data for task in job),
+        "config": config_hash(backend, params, options),
+        "params": _json(params or {}),
+        "options": _json(options or {}),
+        "status": _status_name(stats.get("status")),
+        "makespan": _number(stats.get("makespan")),
+        "bound": _number(stats.get("best_bound")),
+        "gap": stats.get("gap"),
+        "known_lo": known_lo,
+        "known_hi": known_hi,
+        "horizon": stats.get("horizon"),
+        "heuristic_time": stats.get("heuristic_time"),
+        "build_time": stats.get("build_time"),
+        "solve_time": stats.get("solve_time"),
+        "time_to_optimal": stats.get("time_to_optimal"),
+        "first_incumbent_time": stats.get("first_incumbent_time"),
+        "conflicts": stats.get("conflicts"),
+        "branches": stats.get("branches"),
+        "starts": None if starts is None else np.ascontiguousarray(starts, dtype="<i4").tobytes(),
+    }
+
+
+# Function to read the start times of a row back as a [jobs, ops] array
+def starts_of(row):
+    if row["starts"] is None:
+        return None
+    return np.frombuffer(row["starts"], dtype="<i4").reshape(row["jobs"], -1)
+
+
+# Function to rebuild the Schedule of a row, or None when the run found none
+def schedule_of(row):
+    starts = starts_of(row)
+    if starts is None:
+        return None
+    return Schedule.from_starts(load_family(row["family"])[row["instance"]], starts)
+
+
+# Buffered writer: rows are inserted in batches of batch_size, each batch in
+# one transaction, and the rest on flush() or when the writer is closed.
+class ResultsWriter:
+    def __init__(self, path=RESULTS_DB, batch_size=32):
+        self.path = path
+        self.batch_size = batch_size
+        self.connection = connect(path)
+        self._pending = []
+
+    def add(self, row):
+        self._pending.append(tuple(row[name] for name in NAMES))
+        if len(self._pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if not self._pending:
+            return
+        with self.connection:
+            self.connection.executemany(
+                f"INSERT INTO runs ({', '.join(NAMES)}) VALUES ({', '.join('?' * len(NAMES))})", self._pending,
+            )
+        self._pending = []
+
+    def close(self):
+        self.flush()
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+# Function to select runs; where is an SQL condition on the columns of runs
+def runs(connection, where=None, args=()):
+    query = "SELECT * FROM runs"
+    if where:
+        query += f" WHERE {where}"
+    return connection.execute(query + " ORDER BY id", args)
+
+
+# Function to return the (instance hash, config) pairs a backend has already
+# finished, with the batch of their last run
+def completed(connection, backend):
+    rows = connection.execute(
+        "SELECT instance_hash, config, MAX(batch) AS batch FROM runs WHERE backend = ? "
+        "GROUP BY instance_hash, config", (backend,),
+    )
+    return {(row["instance_hash"], row["config"]): row["batch"] for row in rows}
+
+
+# Function to export runs to CSV, or to xlsx (needs pandas and openpyxl).
+# The start times are left out: they are a binary column, read them with
+# starts_of().
+def export(path, where=None, args=(), db_path=RESULTS_DB):
+    connection = connect(db_path)
+    try:
+        cursor = runs(connection, where, args)
+        columns = [name for name in ["id", *NAMES] if name != "starts"]
+        if path.endswith(".xlsx"):
+            import pandas as pd
+            frame = pd.DataFrame.from_records((tuple(row[name] for name in columns) for row in cursor),
+                                             columns=columns)
+            frame.to_excel(path, index=False)
+            return len(frame)
+        count = 0
+        with open(path, "w", newline="") as file:
+            writer = csv.writer(file)
+            writer.writerow(columns)
+            for row in cursor:
+                writer.writerow([row[name] for name in columns])
+                count += 1
+        return count
+    finally:
+        connection.close()
+
+
+# Function to print the number of runs and solved runs per backend and family
+def print_summary(db_path=RESULTS_DB):
+    connection = connect(db_path)
+    try:
+        rows = connection.execute(
+            "SELECT backend, family, COUNT(*) AS runs, COUNT(DISTINCT instance_hash) AS instances, "
+            "COUNT(time_to_optimal) AS optimal, COUNT(DISTINCT config) AS configs, MAX(created) AS last "
+            "FROM runs GROUP BY backend, family ORDER BY backend, family"
+        ).fetchall()
+    finally:
+        connection.close()
+    print(f"{'backend':10}{'family':12}{'runs':>8}{'instances':>11}{'optimal':>9}{'configs':>9}  last run")
+    for row in rows:
+        print(f"{row['backend']:10}{row['family'] or '-':12}{row['runs']:>8}{row['instances']:>11}"
+              f"{row['optimal']:>9}{row['configs']:>9}  {row['last']}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Query and export the results database")
+    parser.add_argument("--db", default=RESULTS_DB, help="results database file")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("summary", help="runs per backend and family")
+    export_parser = commands.add_parser("export", help="export runs to .csv or .xlsx")
+    export_parser.add_argument("path")
+    export_parser.add_argument("--where", help="SQL condition on the runs table")
+    schedule_parser = commands.add_parser("schedule", help="write the schedule of one run")
+    schedule_parser.add_argument("id", type=int, help="run id")
+    schedule_parser.add_argument("--format", choices=sorted(FORMATS), default="text")
+    schedule_parser.add_argument("--output", help="output file (default: the console)")
+    args = parser.parse_args()
+
+    if args.command == "summary":
+        print_summary(args.db)
+    elif args.command == "export":
+        print(f"{export(args.path, args.where, db_path=args.db)} runs written to {args.path}")
+    else:
+        connection = connect(args.db)
+        row = connection.execute("SELECT * FROM runs WHERE id = ?", (args.id,)).fetchone()
+        connection.close()
+        if row is None:
+            sys.exit(f"no run {args.id} in {args.db}")
+        schedule = schedule_of(row)
+        if schedule is None:
+            sys.exit(f"run {args.id} found no schedule")
+        if args.output:
+            with open(args.output, "w", newline="") as file:
+                schedule.write(file, args.format)
+        else:
+            schedule.write(sys.stdout, args.format)
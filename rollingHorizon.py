@@ -0,0 +1,268 @@
+import time
+import numpy as np
+from ortools.sat.python import cp_model
+from autoORTOOL import build_model, set_parameters
+from disjunctiveGraph import DisjunctiveGraph
+from geneticAlgorithm import decode
+from heuristics import best_dispatch
+from jsspInstance import from_jobs_data
+from lowerBounds import lower_bounds
+from searchReport import run_family, search_parser, search_report
+from trajectory import Incumbent
+
+# Rolling-horizon decomposition of the job-shop problem, for instances too
+# large for one monolithic model (ta71-ta80 and larger synthetic ones). No
+# model ever holds more than one window of operations, so the peak model
+# size depends on window_ops and not on the instance.
+#
+# There is always a complete plan, first the best dispatching rule. A sweep
+# walks it in time: a window is the window_ops unfrozen operations that
+# start first in the plan. Their CP-SAT model is autoORTOOL.build_model on
+# just those operations, plus
+#   releases -- every operation starts after the frozen operations of its
+#               job and of its machine
+#   makespan -- the operations after the window keep their order in the
+#               plan, so the makespan is the longest end of a window
+#               operation plus the tail (in the plan) of its job successor
+#               or of the first later operation on its machine
+# It is solved under window_time seconds with the plan as hint, for the
+# lowest makespan and then, under that makespan, for the lowest sum of
+# ends. The solution is merged into the plan by an active decode
+# (geneticAlgorithm.decode) of the frozen operations, the window and the
+# rest, each group in order of start time, and kept when the makespan of
+# the whole plan does not get worse. Then every unfrozen operation that
+# starts in the first 1 - overlap of the window's time span is frozen, and
+# the next window starts after it, so consecutive windows share the rest.
+#
+# Later sweeps are the improvement pass: they roll over the finished plan
+# again with the frozen prefix cleared, every other one with a first window
+# of half the size, so its windows straddle the boundaries of the sweep
+# before. By default sweeps go on until the time limit, or until two sweeps
+# in a row found nothing better.
+#
+#   python rollingHorizon.py taillard --names ta71 --time-limit 60
+#   python rollingHorizon.py taillard --min-ops 2000 --window-ops 400 --overlap 0.5 --sweeps 1
+
+
+# Default time of a window: about two seconds for 300 operations, enough to
+# prove the lowest makespan of most windows of a 100x20 instance
+WINDOW_SECONDS_PER_OP = 1 / 150
+
+
+# Function to build the model of one window; tails are those of the
+# current plan (DisjunctiveGraph.tails). Returns the model, the start and
+# end variables of the window operations by flat index and the makespan
+# variable.
+def window_model(instance, plan, tails, frozen, ops, horizon):
+    durations = instance.durations.ravel()
+    machines = instance.machines.ravel()
+    num_ops = instance.num_ops
+    flat_plan = plan.ravel()
+    ends = flat_plan + durations
+    in_window = np.zeros(instance.total_ops, dtype=bool)
+    in_window[ops] = True
+
+    # The window operations of every job are a run of consecutive tasks
+    # right after its frozen ones
+    jobs = ops // num_ops
+    window_jobs = np.unique(jobs)
+    jobs_data = [[(int(machines[op]), int(durations[op])) for op in ops[jobs == job]] for job in window_jobs]
+    model, all_tasks, _ = build_model(jobs_data, horizon, 0)
+    start_vars = {}
+    end_vars = {}
+    for row, job in enumerate(window_jobs.tolist()):
+        for task_id, op in enumerate(ops[jobs == job].tolist()):
+            start_vars[op] = all_tasks[row, task_id].start
+            end_vars[op] = all_tasks[row, task_id].end
+
+    # Releases of the frozen prefix
+    machine_release = np.zeros(instance.num_machines, dtype=np.int64)
+    np.maximum.at(machine_release, machines[frozen], ends[frozen])
+    for op, var in start_vars.items():
+        release = machine_release[machines[op]]
+        if op % num_ops and frozen[op - 1]:
+            release = max(release, ends[op - 1])
+        if release:
+            model.add(var >= int(release))
+
+    # Makespan: the operations after the window keep their plan order and
+    # come after the window on every machine, so a window operation reaches
+    # the end through its job successor or the first of them on its machine
+    outside = np.flatnonzero(~frozen & ~in_window)
+    first_outside = np.full(instance.num_machines, -1)
+    by_start = outside[np.lexsort((outside, flat_plan[outside]))][::-1]
+    first_outside[machines[by_start]] = by_start
+    makespan = model.new_int_var(0, horizon, "plan_makespan")
+    for op, var in end_vars.items():
+        reach = 0
+        if op % num_ops < num_ops - 1 and not in_window[op + 1]:
+            reach = durations[op + 1] + tails[op + 1]
+        following = first_outside[machines[op]]
+        if following >= 0:
+            reach = max(reach, durations[following] + tails[following])
+        model.add(makespan >= var + int(reach))
+    model.minimize(makespan)
+
+    for op, var in start_vars.items():
+        model.add_hint(var, int(flat_plan[op]))
+        model.add_hint(end_vars[op], int(ends[op]))
+    return model, start_vars, end_vars, makespan
+
+
+# Function to merge new start times into a plan: an active schedule
+# (Giffler and Thompson) that gives priority to the operations of first (a
+# boolean mask) in order of their start times, then to all others in order
+# of theirs
+def merge(instance, starts, first=None):
+    flat_starts = np.asarray(starts, dtype=np.int64).ravel()
+    later = np.zeros(flat_starts.size, dtype=bool) if first is None else ~first
+    order = np.lexsort((np.arange(flat_starts.size), flat_starts, later))
+    chromosome = (order // instance.num_ops).astype(np.int32)
+    decoded = decode(instance, chromosome[None], "active")
+    return decoded.starts[0], int(decoded.makespans[0])
+
+
+# Function to make a solver that stops at deadline
+def window_solver(deadline, num_workers, params):
+    solver = cp_model.CpSolver()
+    set_parameters(solver, params or {})
+    if num_workers:
+        solver.parameters.num_workers = num_workers
+    solver.parameters.max_time_in_seconds = max(0.01, deadline - time.time())
+    return solver
+
+
+# OR-Tools rolling-horizon job-shop solver function
+#   time_limit  -- total seconds for all sweeps
+#   window_ops  -- operations per window
+#   overlap     -- share of a window's time span solved again by the next one
+#   window_time -- seconds per window (None = WINDOW_SECONDS_PER_OP per
+#                  window operation, at least one)
+#   sweeps      -- passes over the instance (None = until the time limit or
+#                  two sweeps without improvement); the ones after the first
+#                  are the improvement pass across window boundaries
+#   hint        -- start times ([jobs, ops]) of the first plan instead of the
+#                  best dispatching rule
+#   params      -- CP-SAT parameters of every window solve as {name: value}
+#   stats       -- optional dict that receives timings, the result, the
+#                  windows, the peak model size and the Schedule
+def solve_rolling(jobs_data, time_limit=60, window_ops=300, overlap=0.5, window_time=None, sweeps=None,
+                  hint=None, num_workers=None, params=None, known_optimum=None, stats=None):
+    if not 0 <= overlap < 1:
+        raise ValueError(f"overlap must be in [0, 1), got {overlap}")
+    inicio = time.time()
+    instance = from_jobs_data(jobs_data)
+    total = instance.total_ops
+    durations = instance.durations.ravel()
+    heuristic = best_dispatch(instance) if hint is None else None
+    plan, best = merge(instance, heuristic.starts if hint is None else np.asarray(hint, dtype=np.int64))
+    heuristic_time = time.time() - inicio
+
+    bounds = lower_bounds(instance)
+    lower_bound = bounds.best
+
+    window_ops = min(window_ops, total)
+    if window_time is None:
+        window_time = max(1.0, WINDOW_SECONDS_PER_OP * window_ops)
+    op_index = np.arange(total)
+
+    trajectory = [Incumbent(time.time() - inicio, best, lower_bound)]
+    windows = accepted = sweep = stalled = 0
+    peak_vars = peak_constraints = peak_ops = 0
+    build_time = 0.0
+    out_of_time = False
+    while not out_of_time and best > lower_bound and (sweep < sweeps if sweeps else stalled < 2):
+        sweep_best = best
+        frozen = np.zeros(total, dtype=bool)
+        size = window_ops if sweep % 2 == 0 else max(1, window_ops // 2)
+        sweep += 1
+        while not frozen.all() and best > lower_bound:
+            remaining = time_limit - (time.time() - inicio)
+            if remaining <= 0.01:
+                out_of_time = True
+                break
+            windows += 1
+
+            # The unfrozen operations that start first in the plan, ties to
+            # the earlier task of a job
+            flat_plan = plan.ravel()
+            unfrozen = op_index[~frozen]
+            ops = np.sort(unfrozen[np.lexsort((unfrozen, flat_plan[unfrozen]))[:size]])
+            last = len(unfrozen) <= size
+            size = window_ops
+
+            build_start = time.time()
+            tails = DisjunctiveGraph(instance, plan).tails
+            model, start_vars, end_vars, makespan_var = window_model(instance, plan, tails, frozen, ops, best)
+            build_time += time.time() - build_start
+            peak_ops = max(peak_ops, len(ops))
+            peak_vars = max(peak_vars, len(model.proto.variables))
+            peak_constraints = max(peak_constraints, len(model.proto.constraints))
+
+            # The lowest makespan first, then, under it, the window that ends
+            # earliest in total, which leaves the most room to the next ones
+            deadline = time.time() + min(window_time, remaining)
+            solver = window_solver(deadline, num_workers, params)
+            if solver.solve(model) in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+                candidate = plan.copy()
+                for op, var in start_vars.items():
+                    candidate.flat[op] = solver.value(var)
+                if deadline - time.time() > 0.01:
+                    model.clear_hints()
+                    for op, var in start_vars.items():
+                        model.add_hint(var, solver.value(var))
+                        model.add_hint(end_vars[op], solver.value(end_vars[op]))
+                    model.add(makespan_var <= int(solver.objective_value))
+                    model.minimize(sum(end_vars.values()))
+                    solver = window_solver(deadline, num_workers, params)
+                    if solver.solve(model) in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+                        for op, var in start_vars.items():
+                            candidate.flat[op] = solver.value(var)
+                placed = frozen.copy()
+                placed[ops] = True
+                candidate, makespan = merge(instance, candidate, placed)
+                if makespan <= best:
+                    accepted += 1
+                    plan = candidate
+                    if makespan < best:
+                        best = makespan
+                        trajectory.append(Incumbent(time.time() - inicio, best, lower_bound))
+
+            # Freeze the first 1 - overlap of the window's time span
+            if last:
+                frozen[:] = True
+            else:
+                window_starts = plan.flat[ops]
+                first, span_end = int(window_starts.min()), int(window_starts.max())
+                frozen |= plan.ravel() < first + (1 - overlap) * (span_end - first)
+                frozen[ops[np.argmin(window_starts)]] = True
+        stalled = stalled + 1 if best == sweep_best else 0
+
+    optimal = best <= lower_bound
+    lines = [
+        f"windows: {windows} ({accepted} kept) in {sweep} sweeps, {window_ops} operations, overlap {overlap}, "
+        f"{window_time:.2f}s each",
+        f"peak model: {peak_ops} operations, {peak_vars} variables, {peak_constraints} constraints",
+    ]
+    counters = dict(
+        windows=windows,
+        windows_kept=accepted,
+        peak_model={"operations": peak_ops, "variables": peak_vars, "constraints": peak_constraints},
+    )
+    return search_report(instance, plan, trajectory, optimal, bounds, heuristic, inicio, heuristic_time, build_time,
+                         lines, counters, known_optimum, stats)
+
+
+if __name__ == "__main__":
+    parser = search_parser("Solve job-shop instances with a rolling-horizon CP-SAT decomposition")
+    parser.add_argument("--window-ops", type=int, default=300, help="operations per window")
+    parser.add_argument("--overlap", type=float, default=0.5, help="share of a window solved again by the next one")
+    parser.add_argument("--window-time", type=float, help="seconds per window (default: 1 per 150 operations)")
+    parser.add_argument("--sweeps", type=int,
+                        help="passes over the instance, 1 = no improvement pass (default: until the time limit)")
+    parser.add_argument("--workers", type=int, help="CP-SAT num_workers of every window solve")
+    args = parser.parse_args()
+
+    run_family(args, lambda jobs_data, known_optimum: solve_rolling(
+        jobs_data, args.time_limit, args.window_ops, args.overlap, args.window_time, args.sweeps,
+        num_workers=args.workers, known_optimum=known_optimum))
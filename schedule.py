@@ -0,0 +1,141 @@
+import csv
+import json
+import numpy as np
+from jsspInstance import from_jobs_data
+
+# Compact schedule of a job-shop instance.
+#
+# A Schedule holds the start time of every operation as a [jobs, ops] array
+# and, computed once on first use, the order of the operations on every
+# machine: one argsort of all operations by (machine, start), cut per machine
+# by an offsets array. Renderers are generators that write one machine, job
+# or operation at a time, so a 100x20 schedule is never held as one big
+# string:
+#   lines()      -- the per-machine text report of autoORTOOL.py/autoGurobi.py
+#   write_text() -- the same lines, written to a file as they are made
+#   write_csv()  -- one row per operation: job, task, machine, start, end
+#   write_json() -- makespan, start times and the machine orders
+# FlexibleSchedule does the same for a flexible job-shop solution, where
+# every operation also has the machine option it was given.
+
+NAME_WIDTH = 15
+
+
+class Schedule:
+    def __init__(self, instance, starts):
+        self.instance = instance
+        self.starts = np.ascontiguousarray(starts, dtype=np.int64).reshape(instance.machines.shape)
+        num_jobs, num_ops = self.starts.shape
+        self._set_ops(
+            np.repeat(np.arange(num_jobs), num_ops), np.tile(np.arange(num_ops), num_jobs),
+            instance.machines.ravel(), instance.durations.ravel(), self.starts.ravel(), instance.num_machines,
+        )
+
+    # Flat per-operation arrays, in job order, that the renderers work on
+    def _set_ops(self, jobs, tasks, machines, durations, starts, num_machines):
+        self.op_job = jobs
+        self.op_task = tasks
+        self.op_machine = np.asarray(machines, dtype=np.int64)
+        self.op_start = np.asarray(starts, dtype=np.int64)
+        self.op_end = self.op_start + np.asarray(durations, dtype=np.int64)
+        self.num_machines = num_machines
+        self._order = None
+        self._offsets = None
+
+    # Function to build a Schedule from a job list (or instance) and starts
+    @classmethod
+    def from_starts(cls, jobs_data, starts):
+        return cls(from_jobs_data(jobs_data), starts)
+
+    @property
+    def ends(self):
+        return self.starts + self.instance.durations
+
+    @property
+    def makespan(self):
+        return int(self.op_end.max()) if self.op_end.size else 0
+
+    # Flat operation indices in machine order, and the offsets of every
+    # machine in it; ties on a machine go to the lower job
+    def machine_order(self):
+        if self._order is None:
+            self._order = np.lexsort((self.op_start, self.op_machine))
+            counts = np.bincount(self.op_machine, minlength=self.num_machines)
+            self._offsets = np.concatenate(([0], np.cumsum(counts)))
+        return self._order, self._offsets
+
+    # Function to return the flat operation indices of one machine, in order
+    def machine_ops(self, machine):
+        order, offsets = self.machine_order()
+        return order[offsets[machine]:offsets[machine + 1]]
+
+    # Function to yield the text report, two lines per machine: the operation
+    # names, and their [start,end] intervals below them
+    def lines(self):
+        jobs = self.op_job.tolist()
+        tasks = self.op_task.tolist()
+        starts = self.op_start.tolist()
+        ends = self.op_end.tolist()
+        for machine in range(self.num_machines):
+            ops = self.machine_ops(machine).tolist()
+            names = "".join(f"{f'job_{jobs[op]}_task_{tasks[op]}':{NAME_WIDTH}}" for op in ops)
+            intervals = "".join(f"{f'[{starts[op]},{ends[op]}]':{NAME_WIDTH}}" for op in ops)
+            yield f"Machine {machine}: {names}\n"
+            yield f"           {intervals}\n"
+
+    def text(self):
+        return "".join(self.lines())
+
+    def write_text(self, file):
+        for line in self.lines():
+            file.write(line)
+
+    def write_csv(self, file):
+        writer = csv.writer(file)
+        writer.writerow(("job", "task", "machine", "start", "end"))
+        writer.writerows(zip(self.op_job.tolist(), self.op_task.tolist(), self.op_machine.tolist(),
+                             self.op_start.tolist(), self.op_end.tolist()))
+
+    # The start times are one list per job and the machine orders lists of
+    # [job, task] pairs
+    def write_json(self, file):
+        jobs = self.op_job.tolist()
+        tasks = self.op_task.tolist()
+        file.write(f'{{"makespan": {self.makespan}, "starts": [')
+        splits = np.flatnonzero(np.diff(self.op_job)) + 1
+        for job_id, job_starts in enumerate(np.split(self.op_start, splits) if self.op_start.size else []):
+            file.write(("," if job_id else "") + "\n  " + json.dumps(job_starts.tolist()))
+        file.write('\n], "machines": [')
+        for machine in range(self.num_machines):
+            ops = [[jobs[op], tasks[op]] for op in self.machine_ops(machine).tolist()]
+            file.write(("," if machine else "") + "\n  " + json.dumps(ops))
+        file.write("\n]}\n")
+
+    # Function to write the schedule in one of FORMATS
+    def write(self, file, fmt="text"):
+        FORMATS[fmt](self, file)
+
+
+# Schedule of a flexible job-shop instance (jsspInstance.FlexibleInstance):
+# the start time ([total ops]) and the chosen option, an index into the
+# option arrays of the instance, of every operation
+class FlexibleSchedule(Schedule):
+    def __init__(self, instance, starts, options):
+        self.instance = instance
+        self.options = np.ascontiguousarray(options, dtype=np.int64)
+        self.starts = np.ascontiguousarray(starts, dtype=np.int64)
+        self._set_ops(
+            instance.op_job, instance.op_task, instance.option_machines[self.options],
+            instance.option_durations[self.options], self.starts, instance.num_machines,
+        )
+
+    @property
+    def ends(self):
+        return self.op_end
+
+
+FORMATS = {
+    "text": Schedule.write_text,
+    "csv": Schedule.write_csv,
+    "json": Schedule.write_json,
+}
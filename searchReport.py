@@ -0,0 +1,113 @@
+import argparse
+import time
+from heuristics import is_feasible
+from jsspCache import FAMILIES, load_family, query
+from lowerBounds import format_gap, gap
+from schedule import Schedule
+
+# Report, stats and command line shared by the searches that do not prove
+# bounds themselves: the tabu search, the genetic algorithm, the CP-SAT
+# large-neighborhood search and the rolling-horizon decomposition.
+#
+# search_report writes the text the other solver scripts print (the
+# schedule, the incumbent trajectory and the statistics) and fills the stats
+# dict with the keys of autoORTOOL.solve_jobshop. A search passes its own
+# statistics lines and counters on top. conflicts and branches are the
+# node counters of CP-SAT and Gurobi and stay None here.
+#
+# search_parser and run_family give every search the same command line: a
+# family, --names (with or without ".jss"), --min-ops and --time-limit.
+
+
+# Function to write the report of a finished search and fill stats
+#   starts        -- start times ([jobs, ops]) of the best schedule
+#   trajectory    -- the improving incumbents; the last one is the best
+#   optimal       -- the best makespan is proven optimal
+#   bounds        -- lowerBounds.lower_bounds of the instance
+#   start         -- the dispatching-rule schedule the search started from,
+#                    or None for a given one
+#   inicio        -- wall time at which the search started
+#   heuristic_time, build_time -- seconds of the start schedule and of the
+#                    search structures or models; the rest is solve time
+#   lines         -- the search's own statistics lines
+#   counters      -- the search's own stats entries
+def search_report(instance, starts, trajectory, optimal, bounds, start, inicio, heuristic_time, build_time,
+                  lines=(), counters=None, known_optimum=None, stats=None):
+    solve_time = time.time() - inicio - heuristic_time - build_time
+    schedule = Schedule(instance, starts)
+    best = trajectory[-1].makespan
+    lower_bound = bounds.best
+    known_low, known_high = known_optimum or (None, None)
+
+    output = "Solution:\n"
+    output += schedule.text()
+    if optimal:
+        output += f"Optimal Schedule Length: {float(best)}\n"
+    else:
+        output += f"Best Schedule Length: {float(best)} (bound {lower_bound})\n"
+
+    output += "\nIncumbents (wall time, makespan, bound)\n"
+    for incumbent in trajectory:
+        output += f"  {incumbent.time:10.3f}s {incumbent.makespan:8d} {incumbent.bound:8d}\n"
+
+    final_bound = best if optimal else lower_bound
+    output += "\nStatistics\n"
+    for line in lines:
+        output += f"  - {line}\n"
+    if start is not None:
+        output += f"  - start: {start.rule} dispatching rule, makespan {start.makespan}\n"
+    else:
+        output += "  - start: given schedule\n"
+    output += f"  - start heuristic time: {heuristic_time}s\n"
+    output += f"  - build time: {build_time}s\n"
+    output += f"  - lower bound: {final_bound} (job {bounds.job}, machine {bounds.machine}, jackson {bounds.jackson})\n"
+    output += f"  - gap: {format_gap(gap(best, final_bound))}\n"
+    if known_high is not None:
+        output += f"  - best known: {known_low}..{known_high}, gap to best known: {format_gap(gap(best, known_high))}\n"
+    output += f"  - time taken to solve the problem: {time.time() - inicio}s\n"
+
+    if stats is not None:
+        stats.update(
+            horizon=trajectory[0].makespan,
+            heuristic_time=heuristic_time,
+            build_time=build_time,
+            solve_time=solve_time,
+            status="OPTIMAL" if optimal else "FEASIBLE",
+            makespan=float(best),
+            best_bound=final_bound,
+            lower_bound=lower_bound,
+            gap=gap(best, final_bound),
+            known_optimum=known_optimum,
+            first_incumbent_time=trajectory[0].time,
+            time_to_optimal=trajectory[-1].time if optimal else None,
+            trajectory=trajectory,
+            conflicts=None,
+            branches=None,
+            feasible=is_feasible(instance, schedule.starts),
+            starts=schedule.starts,
+            schedule=schedule,
+        )
+        stats.update(counters or {})
+    return output
+
+
+# Function to build the command line every search shares; the search adds
+# its own options
+def search_parser(description):
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument("family", choices=FAMILIES)
+    parser.add_argument("--names", nargs="+", help="instances of the family (default: every instance)")
+    parser.add_argument("--min-ops", type=int, help="skip instances with fewer operations")
+    parser.add_argument("--time-limit", type=float, default=60, help="time per instance, in seconds")
+    return parser
+
+
+# Function to run a search on the selected instances of the family and print
+# every report; solve(jobs_data, known_optimum) returns the report text
+def run_family(args, solve):
+    instances = load_family(args.family)
+    for row in query([args.family], min_ops=args.min_ops):
+        if args.names and row["name"] not in args.names and row["name"].rsplit(".", 1)[0] not in args.names:
+            continue
+        print(f"Results for {row['name']}:")
+        print(solve(instances[row["name"]], (row["optimum_lo"], row["optimum_hi"])))
@@ -0,0 +1,243 @@
+import random
+import time
+from disjunctiveGraph import DisjunctiveGraph
+from heuristics import best_dispatch
+from jsspInstance import from_jobs_data
+from lowerBounds import lower_bounds
+from searchReport import run_family, search_parser, search_report
+from trajectory import Incumbent
+
+# Tabu search for the job-shop problem, without any solver.
+#
+# A solution is the order of the operations on every machine, kept in a
+# disjunctive graph (disjunctiveGraph.py) with the heads and tails of its
+# semi-active schedule; applying a move updates only the part of the graph
+# the move can reach.
+#
+# Every iteration takes one critical path, cuts it into blocks of
+# consecutive operations on one machine and builds the moves of the
+# neighborhood:
+#   n5 -- swap the first two and the last two operations of every block,
+#         except the first pair of the first block and the last pair of the
+#         last block (Nowicki and Smutnicki)
+#   n6 -- move an operation of a block to the front or the back of the
+#         block, or the first or last operation into it, where the
+#         conditions of Balas and Vazacopoulos guarantee no cycle
+# Every move is scored without being applied: the heads and tails of the
+# moved segment are recomputed from the unchanged heads of the job
+# predecessors and tails of the job successors. The best move that is not
+# tabu is applied; a tabu move is taken when it beats the best makespan
+# (aspiration). A move forbids undoing the precedences it reversed for a
+# random tenure. After max_stall iterations without improvement the search
+# restarts from the best solution, perturbed by a few random moves, with an
+# empty tabu list.
+#
+#   python tabuSearch.py taillard --names ta71 --time-limit 60
+#   python tabuSearch.py swv --min-ops 1000 --time-limit 300 --neighborhood n5
+
+NEIGHBORHOODS = ("n5", "n6")
+
+
+class TabuSearch(DisjunctiveGraph):
+    def __init__(self, jobs_data, starts, seed=0):
+        super().__init__(jobs_data, starts)
+        self.rng = random.Random(seed)
+
+    # Function to list the moves of a neighborhood, as the (machine, first,
+    # last, forward) moves of DisjunctiveGraph
+    def moves(self, neighborhood):
+        blocks = [block for block in self.critical_blocks()]
+        last_block = len(blocks) - 1
+        moves = []
+        position, machine_of = self.position, self.machine_of
+        for index, block in enumerate(blocks):
+            size = len(block)
+            if size < 2:
+                continue
+            machine = machine_of[block[0]]
+            first = position[block[0]]
+            if neighborhood == "n5":
+                if index > 0:
+                    moves.append((machine, first, first + 1, True))
+                if index < last_block and (size > 2 or index == 0):
+                    moves.append((machine, first + size - 2, first + size - 1, True))
+                continue
+            heads, tails, durations = self.heads, self.tails, self.durations
+            job_succ, job_pred = self.job_succ, self.job_pred
+            last_op = block[-1]
+            first_op = block[0]
+            for offset in range(size - 1):
+                # An operation of the block to the back of it
+                u = block[offset]
+                succ = job_succ[u]
+                if offset == size - 2 or succ < 0 or tails[last_op] + durations[last_op] >= tails[succ] + durations[succ]:
+                    moves.append((machine, first + offset, first + size - 1, True))
+            for offset in range(1, size - 1):
+                # The first operation of the block after one inside it
+                v = block[offset]
+                succ = job_succ[first_op]
+                if succ < 0 or tails[v] + durations[v] >= tails[succ] + durations[succ]:
+                    moves.append((machine, first, first + offset, True))
+            for offset in range(2, size):
+                # An operation of the block to the front of it (adjacent
+                # pairs are already forward moves)
+                v = block[offset]
+                pred = job_pred[v]
+                if pred < 0 or heads[first_op] + durations[first_op] >= heads[pred] + durations[pred]:
+                    moves.append((machine, first, first + offset, False))
+            for offset in range(1, size - 2):
+                # The last operation of the block before one inside it
+                u = block[offset]
+                pred = job_pred[last_op]
+                if pred < 0 or heads[u] + durations[u] >= heads[pred] + durations[pred]:
+                    moves.append((machine, first + offset, first + size - 1, False))
+        return moves
+
+    # Function to apply a swap of two adjacent operations on a random
+    # machine, retrying the swaps that close a cycle
+    def random_swap(self):
+        swaps = [(machine, first, first + 1, True) for machine, sequence in enumerate(self.sequences)
+                 for first in range(len(sequence) - 1)]
+        self.rng.shuffle(swaps)
+        for move in swaps:
+            if self.apply(move) is not None:
+                return move
+        return None
+
+
+# Tabu search job-shop solver function
+#   time_limit     -- seconds of search
+#   max_iterations -- stop after this many iterations (None = no limit)
+#   neighborhood   -- "n5" or "n6"
+#   tenure         -- (min, max) tabu tenure in iterations; None scales it
+#                     with the instance
+#   max_stall      -- iterations without improvement before a restart
+#   perturbation   -- random moves applied to the best solution on restart
+#   hint           -- start times ([jobs, ops]) of the start schedule instead
+#                     of the best dispatching rule
+#   stats          -- optional dict that receives timings, the result, the
+#                     search counters and the Schedule
+def tabu_search(jobs_data, time_limit=60, max_iterations=None, neighborhood="n6", tenure=None, max_stall=None,
+                perturbation=3, hint=None, seed=0, known_optimum=None, stats=None):
+    if neighborhood not in NEIGHBORHOODS:
+        raise ValueError(f"unknown neighborhood {neighborhood!r}, expected one of {NEIGHBORHOODS}")
+    inicio = time.time()
+    instance = from_jobs_data(jobs_data)
+    heuristic = best_dispatch(instance) if hint is None else None
+    start_schedule = heuristic.starts if hint is None else hint
+    heuristic_time = time.time() - inicio
+
+    bounds = lower_bounds(instance)
+    lower_bound = bounds.best
+
+    search = TabuSearch(instance, start_schedule, seed)
+    rng = search.rng
+    if tenure is None:
+        # Tenure of Zhang et al.: 10 + jobs / machines, and up to 1.4 times
+        base = 10 + instance.num_jobs // max(1, instance.num_machines)
+        tenure = (base, int(1.4 * base))
+    if max_stall is None:
+        max_stall = max(1000, 2 * instance.total_ops)
+    build_time = time.time() - inicio - heuristic_time
+
+    best = search.makespan
+    best_sequences = search.snapshot()
+    trajectory = [Incumbent(time.time() - inicio, best, lower_bound)]
+    tabu = {}
+    # Moves of the current solution that closed a cycle; with zero durations
+    # the N6 conditions do not rule that out
+    failed = set()
+    iterations = 0
+    evaluated = 0
+    failed_moves = 0
+    restarts = 0
+    stall = 0
+    optimal = best <= lower_bound
+    while not optimal:
+        if time.time() - inicio >= time_limit or (max_iterations is not None and iterations >= max_iterations):
+            break
+        iterations += 1
+        moves = search.moves(neighborhood)
+        if not moves:
+            # One block holds the whole critical path: the makespan is the
+            # load of one machine, a lower bound
+            optimal = True
+            break
+        evaluated += len(moves)
+
+        chosen = None
+        chosen_value = None
+        for move in moves:
+            if move in failed:
+                continue
+            value = search.estimate(move)
+            if chosen_value is not None and value >= chosen_value:
+                continue
+            if value < best or all(tabu.get(pair, 0) <= iterations for pair in search.created(move)):
+                chosen, chosen_value = move, value
+        if chosen is None:
+            candidates = [move for move in moves if move not in failed]
+            if not candidates:
+                # Every move of the neighborhood closes a cycle: leave the
+                # solution with a random swap instead
+                failed.clear()
+                search.random_swap()
+                stall += 1
+                continue
+            chosen = rng.choice(candidates)
+
+        created = search.created(chosen)
+        if search.apply(chosen) is None:
+            # The move closes a cycle and the solution is unchanged: rule it
+            # out until the solution changes
+            failed.add(chosen)
+            failed_moves += 1
+            stall += 1
+        else:
+            failed.clear()
+            expiry = iterations + rng.randint(*tenure)
+            for before, after in created:
+                tabu[after, before] = expiry
+
+            if search.makespan < best:
+                best = search.makespan
+                best_sequences = search.snapshot()
+                trajectory.append(Incumbent(time.time() - inicio, best, lower_bound))
+                stall = 0
+                optimal = best <= lower_bound
+            else:
+                stall += 1
+        if stall >= max_stall:
+            # Restart from the best solution, a few random moves away
+            restarts += 1
+            stall = 0
+            tabu.clear()
+            failed.clear()
+            search.restore(best_sequences)
+            for _ in range(perturbation):
+                moves = search.moves("n6")
+                if moves:
+                    search.apply(rng.choice(moves))
+
+    search.restore(best_sequences)
+    minutes = max(time.time() - inicio - heuristic_time - build_time, 1e-9) / 60
+    lines = [
+        f"neighborhood: {neighborhood}, tenure {tenure[0]}..{tenure[1]}, restart after {max_stall}",
+        f"iterations: {iterations} ({iterations / minutes:.0f} per minute)",
+        f"moves evaluated: {evaluated} ({evaluated / minutes:.0f} per minute)",
+        f"moves that closed a cycle: {failed_moves}",
+        f"restarts: {restarts}",
+    ]
+    counters = dict(iterations=iterations, moves_evaluated=evaluated, failed_moves=failed_moves, restarts=restarts)
+    return search_report(instance, search.starts(), trajectory, optimal, bounds, heuristic, inicio, heuristic_time,
+                         build_time, lines, counters, known_optimum, stats)
+
+
+if __name__ == "__main__":
+    parser = search_parser("Solve job-shop instances with tabu search")
+    parser.add_argument("--neighborhood", choices=NEIGHBORHOODS, default="n6")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    run_family(args, lambda jobs_data, known_optimum: tabu_search(
+        jobs_data, args.time_limit, neighborhood=args.neighborhood, seed=args.seed, known_optimum=known_optimum))
@@ -0,0 +1,84 @@
+import collections
+import json
+import os
+import numpy as np
+
+# Anytime behaviour of a solve: every improving incumbent with the wall time
+# at which it was found and the best bound known at that moment. The metrics
+# below turn a trajectory into numbers that can be compared across runs.
+
+Incumbent = collections.namedtuple("Incumbent", "time makespan bound")
+
+
+# Function to compute the first time a makespan <= target was reached
+# (None if the solve never got there)
+def time_to_target(trajectory, target):
+    for incumbent in trajectory:
+        if incumbent.makespan <= target:
+            return incumbent.time
+    return None
+
+
+# Function to compute the area under the primal gap curve (primal integral)
+# between 0 and end_time. Before the first incumbent the gap counts as 1,
+# afterwards it is (makespan - reference) / makespan. Smaller is better: a
+# solver that finds the reference value instantly scores 0, one that finds
+# nothing scores end_time.
+def area_under_curve(trajectory, reference, end_time):
+    area = 0.0
+    previous_time = 0.0
+    previous_gap = 1.0
+    for incumbent in trajectory:
+        if incumbent.time >= end_time:
+            break
+        area += previous_gap * (incumbent.time - previous_time)
+        previous_time = incumbent.time
+        previous_gap = max(0.0, (incumbent.makespan - reference) / incumbent.makespan) if incumbent.makespan else 0.0
+    area += previous_gap * max(0.0, end_time - previous_time)
+    return area
+
+
+# Function to compute the time of the last improvement (time after which
+# the solver was only proving the bound or idling)
+def last_improvement(trajectory):
+    return trajectory[-1].time if trajectory else None
+
+
+# Function to write a trajectory (and any extra fields, e.g. the instance
+# name or the status) to a JSON file
+def save_trajectory(path, trajectory, **extra):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    data = dict(extra)
+    data["trajectory"] = [list(incumbent) for incumbent in trajectory]
+    with open(path, "w") as file:
+        json.dump(data, file, indent=1)
+
+
+# Function to read a trajectory file back, returning (trajectory, extra fields)
+def load_trajectory(path):
+    with open(path, "r") as file:
+        data = json.load(file)
+    trajectory = [Incumbent(*entry) for entry in data.pop("trajectory")]
+    return trajectory, data
+
+
+# Function to save the start times ([jobs, ops]) of an incumbent as the
+# checkpoint of a solve, through a temporary name so an interrupted write
+# never leaves a broken checkpoint behind
+def save_checkpoint(path, starts, makespan):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path + ".tmp", "wb") as file:
+        np.savez(file, starts=np.asarray(starts, dtype=np.int64), makespan=np.int64(makespan))
+    os.replace(path + ".tmp", path)
+
+
+# Function to read a checkpoint back as (starts, makespan), or None
+def load_checkpoint(path):
+    if not os.path.exists(path):
+        return None
+    with np.load(path) as checkpoint:
+        return checkpoint["starts"], int(checkpoint["makespan"])